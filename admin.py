@@ -4,9 +4,12 @@ import os
 from datetime import datetime
 import pandas as pd
 
+from results_store import SQLiteResultsStore, split_problem_key
+
 st.set_page_config(page_title="관리자 페이지", layout="wide")
 
 RESULTS_DIR = "results"
+RESULTS_DB = f"{RESULTS_DIR}/results.db"  # level_test.py가 기록하는 SQLite 결과 DB
 CHAPTERS_INFO = [
     ("출력", 100),
     ("변수와 입력", 100),
@@ -30,89 +33,242 @@ CHAPTERS_INFO = [
 ]
 PROBLEMS_PER_CHAPTER = 10
 
+class ResultsFileCache:
+    """결과 파일별 (mtime, size)를 기억해 새로 생기거나 바뀐 파일만 다시 읽는 로더"""
+
+    def __init__(self, results_dir):
+        self.results_dir = results_dir
+        self.version = 0  # 결과 목록이 바뀔 때마다 증가
+        self._files = {}  # filename -> ((mtime_ns, size), data)
+        self._results = []
+
+    def load(self):
+        """모든 결과 목록 (바뀐 것이 없으면 이전에 만든 목록을 그대로 반환)"""
+        if not os.path.exists(self.results_dir):
+            return []
+
+        changed = False
+        seen = set()
+        with os.scandir(self.results_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith("_result.json"):
+                    continue
+                seen.add(entry.name)
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                signature = (stat.st_mtime_ns, stat.st_size)
+                cached = self._files.get(entry.name)
+                if cached is not None and cached[0] == signature:
+                    continue
+                try:
+                    with open(entry.path, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except:
+                    data = None
+                self._files[entry.name] = (signature, data)
+                changed = True
+
+        for filename in set(self._files) - seen:
+            del self._files[filename]
+            changed = True
+
+        if changed:
+            self._results = [data for _, (_, data) in sorted(self._files.items()) if data is not None]
+            self.version += 1
+        return self._results
+
+
+class ResultsDBCache:
+    """SQLite 결과 DB 조회 결과를 DB가 바뀔 때까지 재사용"""
+
+    def __init__(self, db_path):
+        self.store = SQLiteResultsStore(db_path)
+        self.version = 0
+        self._data_version = None
+        self._results = []
+
+    def load(self):
+        data_version = self.store.data_version()
+        if data_version != self._data_version:
+            self._results = self.store.load_results()
+            self._data_version = data_version
+            self.version += 1
+        return self._results
+
+
+def get_results_cache():
+    """세션에 보관하는 결과 로더 (SQLite DB가 있으면 DB, 없으면 결과 파일)"""
+    use_db = os.path.exists(RESULTS_DB)
+    cache = st.session_state.get('results_cache')
+    if cache is None or isinstance(cache, ResultsDBCache) != use_db:
+        cache = ResultsDBCache(RESULTS_DB) if use_db else ResultsFileCache(RESULTS_DIR)
+        st.session_state['results_cache'] = cache
+    return cache
+
 def load_all_results():
-    """모든 결과 파일 로드"""
-    if not os.path.exists(RESULTS_DIR):
-        return []
-    
-    results = []
-    for filename in os.listdir(RESULTS_DIR):
-        if filename.endswith("_result.json"):
-            filepath = os.path.join(RESULTS_DIR, filename)
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                    results.append(data)
-            except:
-                continue
-    
-    return results
+    """모든 결과 로드 (바뀐 결과만 다시 읽음)"""
+    return get_results_cache().load()
 
-def calculate_score(solve_status, selected_problems):
-    """점수 계산"""
-    if not solve_status:
-        return 0, 0, 0
-    
-    # selected_problems가 없으면 solve_status의 키에서 추정
-    if not selected_problems:
-        # 기존 형식 호환: chapter_idx_problemId 형식에서 추정
-        total_problems = len(solve_status)
-    else:
-        total_problems = sum(len(probs) for probs in selected_problems.values() if isinstance(probs, list))
-    
-    if total_problems == 0:
-        return 0, 0, 0
-    
-    pass_count = 0
-    for key, value in solve_status.items():
-        if isinstance(value, dict):
-            if value.get("status") == "PASS":
-                pass_count += 1
-        elif value == "PASS":
-            pass_count += 1
-    
-    score = (pass_count / total_problems) * 100 if total_problems > 0 else 0
-    return pass_count, total_problems, score
-
-def get_chapter_scores(solve_status, selected_problems):
-    """단원별 점수"""
-    chapter_scores = []
-    for idx, (chapter_name, _) in enumerate(CHAPTERS_INFO):
-        if selected_problems:
-            chapter_problems = selected_problems.get(str(idx), [])
-            if not chapter_problems:
-                chapter_problems = selected_problems.get(idx, [])
-        else:
-            # selected_problems가 없으면 solve_status에서 추정
-            chapter_problems = []
-            for key in solve_status.keys():
-                if key.startswith(f"{idx}_"):
-                    try:
-                        pid = int(key.split("_")[1])
-                        chapter_problems.append(pid)
-                    except:
-                        pass
-        
-        pass_count = 0
-        for pid in chapter_problems:
-            prob_key = f"{idx}_{pid}"
-            status_info = solve_status.get(prob_key, {})
-            if isinstance(status_info, dict):
-                if status_info.get("status") == "PASS":
-                    pass_count += 1
-            elif status_info == "PASS":
-                pass_count += 1
-        
-        total = len(chapter_problems)
-        rate = (pass_count / total * 100) if total > 0 else 0
-        chapter_scores.append({
-            "단원": chapter_name,
-            "정답": pass_count,
-            "총 문제": total,
-            "정답률": f"{rate:.1f}%"
-        })
-    
-    return chapter_scores
+SESSION_COLUMNS = ["session_id", "user_name", "date", "start_time", "is_finished", "exit_count", "has_selected"]
+METRIC_COLUMNS = ["wall_time", "cpu_time", "peak_memory_kb", "output_bytes", "max_wall_time"]
+PROBLEM_COLUMNS = ["session_id", "chapter", "problem", "selected", "has_status", "legacy",
+                   "status", "submissions", "first_pass", *METRIC_COLUMNS]
+SLOW_SOLUTIONS_LIMIT = 20  # 실행 성능 탭에 보여줄 느린 풀이 수
+STATUS_LABELS = {"PASS": "✅ 정답", "FAIL": "❌ 오답"}
+
+def build_results_frames(all_results):
+    """결과 목록을 한 번 훑어 세션 표와 (학생, 세션, 단원, 문제)당 한 행인 긴 표로 정규화
+
+    sessions: 세션(결과 파일)당 한 행
+    problems: 출제되었거나 풀이 기록이 있는 문제당 한 행
+        selected   - selected_problems에 포함된 문제인지
+        has_status - solve_status에 기록이 있는지
+        legacy     - 기존 형식("PASS" 문자열) 기록인지
+        counted    - 점수 계산 대상인지 (출제 목록이 있으면 출제 문제, 없으면 기록이 있는 문제)
+        wall_time 등 METRIC_COLUMNS - 마지막 제출의 실행 지표 (기록이 없으면 NaN)
+    """
+    session_rows = []
+    sel_sid, sel_chapter, sel_problem = [], [], []
+    status_sid, status_keys, status_values = [], [], []
+    for sid, result in enumerate(all_results):
+        selected_problems = result.get('selected_problems') or {}
+        solve_status = result.get('solve_status') or {}
+        session_rows.append((sid, result.get('user_name', ''), result.get('date', ''), result.get('start_time', ''),
+                             bool(result.get('is_finished', False)), len(result.get('exit_logs') or []),
+                             bool(selected_problems)))
+        for chapter, pids in selected_problems.items():
+            if isinstance(pids, list):
+                sel_sid.extend([sid] * len(pids))
+                sel_chapter.extend([int(chapter)] * len(pids))
+                sel_problem.extend(pids)
+        status_sid.extend([sid] * len(solve_status))
+        status_keys.extend(solve_status.keys())
+        status_values.extend(solve_status.values())
+
+    sessions = pd.DataFrame(session_rows, columns=SESSION_COLUMNS)
+
+    selected = pd.DataFrame({"session_id": sel_sid, "chapter": sel_chapter, "problem": sel_problem}, dtype="int64")
+    selected = selected.drop_duplicates(["session_id", "chapter", "problem"])
+    selected["selected"] = True
+
+    # "단원_문제번호" 키는 세션마다 반복되므로 서로 다른 키만 한 번씩 분해한다
+    key_codes, unique_keys = pd.factorize(pd.Series(status_keys, dtype=object))
+    parsed = pd.DataFrame([split_problem_key(k) or (None, None) for k in unique_keys], columns=["chapter", "problem"],
+                          dtype="float64")
+    is_dict = [isinstance(v, dict) for v in status_values]
+    recorded = pd.DataFrame({
+        "session_id": pd.Series(status_sid, dtype="int64"),
+        "chapter": parsed["chapter"].to_numpy()[key_codes] if len(parsed) else [],
+        "problem": parsed["problem"].to_numpy()[key_codes] if len(parsed) else [],
+        "legacy": [not d for d in is_dict],
+        "status": [v.get("status") if d else v for v, d in zip(status_values, is_dict)],
+        "submissions": [(v.get("submissions", 0) or 0) if d else 0 for v, d in zip(status_values, is_dict)],
+        "first_pass": pd.array([v.get("first_pass") if d else None for v, d in zip(status_values, is_dict)],
+                               dtype="Int64"),
+        **{name: pd.Series([v.get(name) if d else None for v, d in zip(status_values, is_dict)], dtype="float64")
+           for name in METRIC_COLUMNS},
+    }).dropna(subset=["chapter", "problem"])
+    recorded = recorded.astype({"chapter": "int64", "problem": "int64"})
+    recorded["has_status"] = True
+
+    problems = selected.merge(recorded, on=["session_id", "chapter", "problem"], how="outer", sort=True)
+    problems["selected"] = problems["selected"].fillna(False).astype(bool)
+    problems["has_status"] = problems["has_status"].fillna(False).astype(bool)
+    problems["legacy"] = problems["legacy"].fillna(False).astype(bool)
+    problems["submissions"] = problems["submissions"].fillna(0).astype("int64")
+    problems = problems[PROBLEM_COLUMNS]
+    problems["passed"] = problems["status"].eq("PASS")
+
+    chapter_names = pd.Series([name for name, _ in CHAPTERS_INFO])
+    problems["chapter_name"] = problems["chapter"].map(chapter_names).fillna("단원" + problems["chapter"].astype(str))
+
+    has_selected = problems["session_id"].map(sessions["has_selected"]).astype(bool)
+    problems["counted"] = problems["selected"].where(has_selected, problems["has_status"])
+    return sessions, problems
+
+def add_session_scores(sessions, problems):
+    """세션별 정답 수/전체 문제 수/점수 열을 그룹 연산으로 계산"""
+    by_session = problems.groupby("session_id")
+    pass_count = by_session["passed"].sum()
+    selected_total = by_session["selected"].sum()
+    status_total = by_session["has_status"].sum()
+
+    ids = sessions["session_id"]
+    total = ids.map(selected_total).where(sessions["has_selected"], ids.map(status_total)).fillna(0)
+    # 풀이 기록이 하나도 없으면 0점 처리
+    total = total.where(ids.map(status_total).fillna(0) > 0, 0).astype(int)
+    sessions = sessions.assign(
+        pass_count=ids.map(pass_count).fillna(0).astype(int).where(total > 0, 0),
+        total=total,
+    )
+    sessions["score"] = (sessions["pass_count"] / sessions["total"].where(sessions["total"] > 0) * 100).fillna(0.0)
+    return sessions
+
+def chapter_score_table(problems, session_id):
+    """한 세션의 단원별 정답/총 문제/정답률"""
+    counted = problems[(problems["session_id"] == session_id) & problems["counted"]]
+    stats = counted.groupby("chapter").agg(pass_count=("passed", "sum"), total=("problem", "size"))
+    stats = stats.reindex(range(len(CHAPTERS_INFO)), fill_value=0)
+    rate = (stats["pass_count"] / stats["total"].where(stats["total"] > 0) * 100).fillna(0.0)
+    return pd.DataFrame({
+        "단원": [name for name, _ in CHAPTERS_INFO],
+        "정답": stats["pass_count"].to_numpy(),
+        "총 문제": stats["total"].to_numpy(),
+        "정답률": rate.to_numpy(),
+    })
+
+def get_results_frames(all_results):
+    """정규화 + 점수 계산 결과를 결과 목록이 바뀔 때까지 세션에 캐시"""
+    cache = get_results_cache()
+    key = (id(cache), cache.version)
+    cached = st.session_state.get('results_frames')
+    if cached is None or cached[0] != key:
+        sessions, problems = build_results_frames(all_results)
+        cached = (key, add_session_scores(sessions, problems), problems)
+        st.session_state['results_frames'] = cached
+    return cached[1], cached[2]
+
+def problem_performance_table(problems):
+    """문제별 실행 지표 (마지막 제출 기준, 가장 느린 문제 순)"""
+    measured = problems[problems["wall_time"].notna()]
+    stats = measured.groupby(["chapter", "problem"]).agg(
+        chapter_name=("chapter_name", "first"),
+        count=("session_id", "size"),
+        median=("wall_time", "median"),
+        p95=("wall_time", lambda x: x.quantile(0.95)),
+        slowest=("max_wall_time", "max"),
+        cpu=("cpu_time", "median"),
+        memory=("peak_memory_kb", "max"),
+        output=("output_bytes", "max"),
+    ).reset_index().sort_values("p95", ascending=False, kind="stable")
+    return pd.DataFrame({
+        "단원": stats["chapter_name"],
+        "문제 번호": stats["problem"],
+        "기록 수": stats["count"],
+        "실행 시간 중앙값(ms)": (stats["median"] * 1000).round(1),
+        "실행 시간 p95(ms)": (stats["p95"] * 1000).round(1),
+        "가장 느린 케이스(ms)": (stats["slowest"] * 1000).round(1),
+        "CPU 시간 중앙값(ms)": (stats["cpu"] * 1000).round(1),
+        "최대 메모리(MB)": (stats["memory"] / 1024).round(1),
+        "최대 출력(KB)": (stats["output"] / 1024).round(1),
+    })
+
+def slow_solutions_table(sessions, problems, limit=SLOW_SOLUTIONS_LIMIT):
+    """실행 시간이 가장 긴 풀이 (학생, 문제별 마지막 제출)"""
+    slowest = problems[problems["wall_time"].notna()].nlargest(limit, "wall_time")
+    return pd.DataFrame({
+        "학생 이름": slowest["session_id"].map(sessions["user_name"]),
+        "날짜": slowest["session_id"].map(sessions["date"]),
+        "단원": slowest["chapter_name"],
+        "문제 번호": slowest["problem"],
+        "상태": slowest["status"].map(STATUS_LABELS),
+        "실행 시간(ms)": (slowest["wall_time"] * 1000).round(1),
+        "CPU 시간(ms)": (slowest["cpu_time"] * 1000).round(1),
+        "최대 메모리(MB)": (slowest["peak_memory_kb"] / 1024).round(1),
+        "출력(KB)": (slowest["output_bytes"] / 1024).round(1),
+    })
 
 def main():
     st.title("📊 관리자 페이지 - 학생 테스트 결과 관리")
@@ -137,13 +293,16 @@ def main():
         st.warning("아직 테스트 결과가 없습니다.")
         return
     
+    # 세션별 점수 / 문제별 기록 (결과가 바뀌었을 때만 다시 계산)
+    sessions, problems = get_results_frames(all_results)
+    
     # 전체 통계
     st.header("📈 전체 통계")
     col1, col2, col3, col4 = st.columns(4)
     
-    total_students = len(set(r['user_name'] for r in all_results))
-    finished_tests = sum(1 for r in all_results if r.get('is_finished', False))
-    total_tests = len(all_results)
+    total_students = sessions["user_name"].nunique()
+    finished_tests = int(sessions["is_finished"].sum())
+    total_tests = len(sessions)
     
     with col1:
         st.metric("총 학생 수", total_students)
@@ -152,15 +311,7 @@ def main():
     with col3:
         st.metric("진행 중인 테스트", total_tests - finished_tests)
     with col4:
-        avg_score = 0
-        if finished_tests > 0:
-            scores = []
-            for r in all_results:
-                if r.get('is_finished', False):
-                    selected = r.get('selected_problems', {})
-                    _, _, score = calculate_score(r.get('solve_status', {}), selected)
-                    scores.append(score)
-            avg_score = sum(scores) / len(scores) if scores else 0
+        avg_score = sessions.loc[sessions["is_finished"], "score"].mean() if finished_tests > 0 else 0
         st.metric("평균 점수", f"{avg_score:.1f}점")
     
     st.markdown("---")
@@ -171,57 +322,44 @@ def main():
     # 검색 기능
     search_term = st.text_input("🔍 학생 이름 검색", "")
     
-    # 학생별로 그룹화
-    student_data = {}
-    for result in all_results:
-        name = result['user_name']
-        if search_term and search_term.lower() not in name.lower():
-            continue
-        
-        if name not in student_data:
-            student_data[name] = []
-        student_data[name].append(result)
+    filtered = sessions
+    if search_term:
+        filtered = sessions[sessions["user_name"].str.lower().str.contains(search_term.lower(), regex=False)]
     
-    # 학생별로 정렬 (최신순)
-    sorted_students = sorted(student_data.items(), 
-                            key=lambda x: max(r.get('date', '') for r in x[1]), 
-                            reverse=True)
+    # 학생별 최근 테스트 (같은 날짜면 먼저 저장된 결과), 최신순 정렬
+    test_counts = filtered.groupby("user_name").size()
+    latest = (filtered.sort_values(["date", "session_id"], ascending=[False, True], kind="stable")
+                      .drop_duplicates("user_name"))
     
     # 탭으로 구분
-    tab1, tab2 = st.tabs(["학생 목록", "상세 통계"])
+    tab1, tab2, tab3 = st.tabs(["학생 목록", "상세 통계", "실행 성능"])
     
     with tab1:
         # 학생별 요약 테이블
-        summary_data = []
-        for name, results in sorted_students:
-            latest = max(results, key=lambda x: x.get('date', ''))
-            selected = latest.get('selected_problems', {})
-            pass_count, total, score = calculate_score(latest.get('solve_status', {}), selected)
-            
-            summary_data.append({
-                "학생 이름": name,
-                "최근 테스트 날짜": latest.get('date', ''),
-                "완료 여부": "✅ 완료" if latest.get('is_finished', False) else "⏳ 진행중",
-                "정답 수": f"{pass_count}/{total}",
-                "점수": f"{score:.1f}점",
-                "이탈 횟수": len(latest.get('exit_logs', [])),
-                "테스트 횟수": len(results)
+        if not latest.empty:
+            df = pd.DataFrame({
+                "학생 이름": latest["user_name"],
+                "최근 테스트 날짜": latest["date"],
+                "완료 여부": latest["is_finished"].map({True: "✅ 완료", False: "⏳ 진행중"}),
+                "정답 수": latest["pass_count"].astype(str) + "/" + latest["total"].astype(str),
+                "점수": latest["score"].map("{:.1f}점".format),
+                "이탈 횟수": latest["exit_count"],
+                "테스트 횟수": latest["user_name"].map(test_counts),
             })
-        
-        if summary_data:
-            df = pd.DataFrame(summary_data)
             st.dataframe(df, use_container_width=True, hide_index=True)
         else:
             st.info("검색 결과가 없습니다.")
     
     with tab2:
         # 선택한 학생의 상세 정보
-        if sorted_students:
-            student_names = [name for name, _ in sorted_students]
+        if not latest.empty:
+            student_names = latest["user_name"].tolist()
             selected_student = st.selectbox("학생 선택", student_names)
             
-            student_results = student_data[selected_student]
-            latest_result = max(student_results, key=lambda x: x.get('date', ''))
+            student_sessions = filtered[filtered["user_name"] == selected_student]
+            latest_row = latest[latest["user_name"] == selected_student].iloc[0]
+            latest_id = int(latest_row["session_id"])
+            latest_result = all_results[latest_id]
             
             st.subheader(f"📋 {selected_student}님의 테스트 결과")
             
@@ -241,8 +379,7 @@ def main():
                         st.write(f"{i+1}. {log}")
             
             # 점수 정보
-            selected = latest_result.get('selected_problems', {})
-            pass_count, total, score = calculate_score(latest_result.get('solve_status', {}), selected)
+            pass_count, total, score = int(latest_row["pass_count"]), int(latest_row["total"]), latest_row["score"]
             
             st.markdown("### 📊 점수 정보")
             col1, col2, col3 = st.columns(3)
@@ -255,134 +392,76 @@ def main():
             
             # 단원별 성취도
             st.markdown("### 📈 단원별 성취도")
-            chapter_scores = get_chapter_scores(latest_result.get('solve_status', {}), selected)
+            chapter_scores = chapter_score_table(problems, latest_id)
             
-            for item in chapter_scores:
-                rate_val = float(item['정답률'].replace('%', ''))
+            for item in chapter_scores.itertuples(index=False):
                 col_c1, col_c2 = st.columns([1, 3])
                 with col_c1:
-                    st.write(f"**{item['단원']}** ({item['정답']}/{item['총 문제']})")
+                    st.write(f"**{item[0]}** ({item[1]}/{item[2]})")
                 with col_c2:
-                    st.progress(rate_val / 100)
+                    st.progress(item[3] / 100)
             
             # 제출 횟수 통계
             st.markdown("### 📝 제출 횟수 통계")
-            solve_status = latest_result.get('solve_status', {})
-            total_submissions = 0
-            pass_submissions = []
-            fail_submissions = []
-            
-            for key, value in solve_status.items():
-                if isinstance(value, dict):
-                    submissions = value.get('submissions', 0)
-                    total_submissions += submissions
-                    if value.get('status') == 'PASS':
-                        first_pass = value.get('first_pass', submissions)
-                        pass_submissions.append(first_pass)
-                    else:
-                        fail_submissions.append(submissions)
+            session_problems = problems[problems["session_id"] == latest_id]
+            recorded = session_problems[session_problems["has_status"] & ~session_problems["legacy"]]
+            total_submissions = int(recorded["submissions"].sum())
             
             if total_submissions > 0:
+                passed = recorded[recorded["passed"]]
+                failed = recorded[~recorded["passed"]]
                 col1, col2, col3 = st.columns(3)
                 with col1:
                     st.metric("총 제출 횟수", total_submissions)
                 with col2:
-                    avg_pass = sum(pass_submissions) / len(pass_submissions) if pass_submissions else 0
+                    avg_pass = passed["first_pass"].fillna(passed["submissions"]).mean() if not passed.empty else 0
                     st.metric("평균 정답 도달 횟수", f"{avg_pass:.1f}회")
                 with col3:
-                    avg_fail = sum(fail_submissions) / len(fail_submissions) if fail_submissions else 0
+                    avg_fail = failed["submissions"].mean() if not failed.empty else 0
                     st.metric("평균 오답 제출 횟수", f"{avg_fail:.1f}회")
             
             # 문제별 상세 정보
             st.markdown("### 📋 문제별 상세 정보")
             with st.expander("문제별 정답/오답 및 제출 횟수 보기"):
-                problem_details = []
-                solve_status = latest_result.get('solve_status', {})
-                
-                if selected:
-                    # selected_problems가 있는 경우
-                    for idx, (chapter_name, _) in enumerate(CHAPTERS_INFO):
-                        chapter_problems = selected.get(str(idx), selected.get(idx, []))
-                        for pid in chapter_problems:
-                            prob_key = f"{idx}_{pid}"
-                            status_info = solve_status.get(prob_key, {})
-                            
-                            if isinstance(status_info, dict):
-                                status = status_info.get('status', '미제출')
-                                submissions = status_info.get('submissions', 0)
-                                first_pass = status_info.get('first_pass', None)
-                                
-                                problem_details.append({
-                                    "단원": chapter_name,
-                                    "문제 번호": pid,
-                                    "상태": "✅ 정답" if status == "PASS" else "❌ 오답" if status == "FAIL" else "⭕ 미제출",
-                                    "제출 횟수": submissions,
-                                    "정답 도달 횟수": first_pass if first_pass else "-"
-                                })
-                            elif status_info:  # 기존 형식
-                                problem_details.append({
-                                    "단원": chapter_name,
-                                    "문제 번호": pid,
-                                    "상태": "✅ 정답" if status_info == "PASS" else "❌ 오답" if status_info == "FAIL" else "⭕ 미제출",
-                                    "제출 횟수": "-",
-                                    "정답 도달 횟수": "-"
-                                })
-                else:
-                    # selected_problems가 없는 경우 (기존 형식)
-                    for key, value in solve_status.items():
-                        try:
-                            parts = key.split('_')
-                            if len(parts) == 2:
-                                idx = int(parts[0])
-                                pid = int(parts[1])
-                                chapter_name = CHAPTERS_INFO[idx][0] if idx < len(CHAPTERS_INFO) else f"단원{idx}"
-                                
-                                if isinstance(value, dict):
-                                    status = value.get('status', '미제출')
-                                    submissions = value.get('submissions', 0)
-                                    first_pass = value.get('first_pass', None)
-                                    
-                                    problem_details.append({
-                                        "단원": chapter_name,
-                                        "문제 번호": pid,
-                                        "상태": "✅ 정답" if status == "PASS" else "❌ 오답" if status == "FAIL" else "⭕ 미제출",
-                                        "제출 횟수": submissions,
-                                        "정답 도달 횟수": first_pass if first_pass else "-"
-                                    })
-                                else:
-                                    problem_details.append({
-                                        "단원": chapter_name,
-                                        "문제 번호": pid,
-                                        "상태": "✅ 정답" if value == "PASS" else "❌ 오답" if value == "FAIL" else "⭕ 미제출",
-                                        "제출 횟수": "-",
-                                        "정답 도달 횟수": "-"
-                                    })
-                        except:
-                            continue
+                details = session_problems[session_problems["counted"]].sort_values(["chapter", "problem"])
                 
-                if problem_details:
-                    df_details = pd.DataFrame(problem_details)
+                if not details.empty:
+                    df_details = pd.DataFrame({
+                        "단원": details["chapter_name"],
+                        "문제 번호": details["problem"],
+                        "상태": details["status"].map(STATUS_LABELS).fillna("⭕ 미제출"),
+                        "제출 횟수": details["submissions"].astype(object).where(~details["legacy"], "-"),
+                        "정답 도달 횟수": details["first_pass"].astype("Int64").astype(object).where(
+                            details["first_pass"].notna() & (details["first_pass"] != 0) & ~details["legacy"], "-"),
+                    })
                     st.dataframe(df_details, use_container_width=True, hide_index=True)
                 else:
                     st.info("문제 정보가 없습니다.")
             
             # 이전 테스트 기록
-            if len(student_results) > 1:
+            if len(student_sessions) > 1:
                 st.markdown("### 📚 이전 테스트 기록")
-                history_data = []
-                for result in sorted(student_results, key=lambda x: x.get('date', ''), reverse=True):
-                    selected_h = result.get('selected_problems', {})
-                    pass_c, total_h, score_h = calculate_score(result.get('solve_status', {}), selected_h)
-                    history_data.append({
-                        "날짜": result.get('date', ''),
-                        "완료 여부": "✅" if result.get('is_finished', False) else "⏳",
-                        "점수": f"{score_h:.1f}점",
-                        "정답 수": f"{pass_c}/{total_h}"
-                    })
-                
-                df_history = pd.DataFrame(history_data)
+                history = student_sessions.sort_values("date", ascending=False, kind="stable")
+                df_history = pd.DataFrame({
+                    "날짜": history["date"],
+                    "완료 여부": history["is_finished"].map({True: "✅", False: "⏳"}),
+                    "점수": history["score"].map("{:.1f}점".format),
+                    "정답 수": history["pass_count"].astype(str) + "/" + history["total"].astype(str),
+                })
                 st.dataframe(df_history, use_container_width=True, hide_index=True)
     
+    with tab3:
+        # 문제별/풀이별 실행 지표 (전체 학생, 마지막 제출 기준)
+        if problems["wall_time"].notna().any():
+            st.markdown("### ⏱️ 문제별 실행 성능")
+            st.caption("학생별 마지막 제출의 테스트 케이스 실행 시간 합계 기준 (p95가 큰 문제 순)")
+            st.dataframe(problem_performance_table(problems), use_container_width=True, hide_index=True)
+            
+            st.markdown(f"### 🐢 가장 느린 풀이 (상위 {SLOW_SOLUTIONS_LIMIT}개)")
+            st.dataframe(slow_solutions_table(sessions, problems), use_container_width=True, hide_index=True)
+        else:
+            st.info("아직 실행 지표가 기록된 제출이 없습니다.")
+    
     # 로그아웃 및 메인 이동
     st.sidebar.markdown("---")
     st.sidebar.markdown("### 이동")
@@ -394,5 +473,4 @@ def main():
         st.rerun()
 
 if __name__ == "__main__":
-    main()
-
+    main()
\ No newline at end of file
@@ -0,0 +1,375 @@
+"""
+채점 경로 마이크로 벤치마크
+
+채점/문제 은행/결과 저장/관리자 점수 계산의 핵심 함수들을 반복 실행해 호출당 시간을 재고,
+버전 사이의 성능 변화를 자동으로 비교할 수 있게 JSON으로 저장한다.
+문제는 실제 problems/ 문제 은행을, 관리자 페이지 벤치마크는 결과 파일 10/1천/10만 개짜리
+합성 결과 폴더(임시 폴더에 만들고 끝나면 지움)를 사용한다.
+
+    python benchmark.py                                   # 전체 실행, benchmark_results.json 저장
+    python benchmark.py --only grader --output new.json   # 이름에 grader가 들어간 벤치마크만
+    python benchmark.py --sizes 10,1000                   # 합성 결과 폴더 크기 지정
+    python benchmark.py --compare old.json new.json       # 두 결과 비교 (느려진 항목이 있으면 종료 코드 1)
+    python benchmark.py --compare old.json                # 지금 실행한 결과를 old.json과 비교
+
+측정 방법: 한 묶음이 MIN_BATCH_TIME 이상 걸리도록 반복 횟수를 늘린 뒤, 묶음을 여러 번 재서
+호출당 최소/중앙값/평균/표준편차를 기록한다. 비교는 중앙값 기준이다.
+level_test.py와 admin.py 중 Streamlit 화면에 묶인 함수(load_problem, save_results)는
+같은 일을 하는 문제 은행/결과 저장소 호출로 잰다.
+"""
+import argparse
+import itertools
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from grader import (MockInput, WORKER_COUNT, compile_user_code, execute_user_code, get_pool, normalize_output,
+                    run_test_cases, stdout_capture)
+from load_test import lookup_solution
+from problem_bank import PROBLEMS_DIR, build_packed_bank, discover_chapters, get_problem_bank, PackedProblemBank
+from results_store import RESULTS_DB_FILENAME, RESULT_SUFFIX, ResultsWriter
+
+DEFAULT_SIZES = (10, 1000, 100000)
+DEFAULT_OUTPUT = "benchmark_results.json"
+MIN_BATCH_TIME = 0.02  # 한 묶음의 최소 시간 (초)
+REPEAT = 7  # 묶음 측정 횟수
+MAX_TIME = 5.0  # 벤치마크 하나에 쓰는 최대 시간 (초, 느린 항목은 REPEAT보다 적게 잴 수 있음)
+REGRESSION_THRESHOLD = 0.10  # 중앙값이 이 비율 이상 느려지면 회귀
+
+
+# ==========================================
+# 측정
+# ==========================================
+
+class BenchmarkRunner:
+    def __init__(self, only=None, repeat=REPEAT, max_time=MAX_TIME):
+        self.only = only
+        self.repeat = repeat
+        self.max_time = max_time
+        self.results = {}
+
+    def bench(self, name, func, setup=None, **params):
+        """func()의 호출당 시간 측정 (setup()은 묶음마다 측정 밖에서 호출)"""
+        if self.only and not any(key in name for key in self.only):
+            return
+        if setup:
+            setup()
+        # 한 묶음이 MIN_BATCH_TIME 이상이 되도록 반복 횟수 결정 (첫 호출은 예열)
+        started = time.perf_counter()
+        func()
+        single = time.perf_counter() - started
+        number = max(1, int(MIN_BATCH_TIME / single)) if single > 0 else 1000
+
+        per_call = []
+        deadline = time.perf_counter() + self.max_time
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            started = time.perf_counter()
+            for _ in range(number):
+                func()
+            per_call.append((time.perf_counter() - started) / number)
+            if time.perf_counter() > deadline:
+                break
+
+        median = statistics.median(per_call)
+        self.results[name] = {
+            "params": params,
+            "number": number,
+            "rounds": len(per_call),
+            "min": min(per_call),
+            "median": median,
+            "mean": statistics.fmean(per_call),
+            "stdev": statistics.stdev(per_call) if len(per_call) > 1 else 0.0,
+            "ops_per_sec": 1 / median if median > 0 else None,
+        }
+        print(f"  {name:<48} {_format_time(median):>10}  (x{number}, {len(per_call)}회)", flush=True)
+
+    def once(self, name, func, **params):
+        """한 번만 재는 항목 (콜드 로딩처럼 반복하면 의미가 바뀌는 경우)"""
+        if self.only and not any(key in name for key in self.only):
+            return None
+        started = time.perf_counter()
+        value = func()
+        elapsed = time.perf_counter() - started
+        self.results[name] = {"params": params, "number": 1, "rounds": 1, "min": elapsed, "median": elapsed,
+                              "mean": elapsed, "stdev": 0.0, "ops_per_sec": 1 / elapsed if elapsed > 0 else None}
+        print(f"  {name:<48} {_format_time(elapsed):>10}  (1회)", flush=True)
+        return value
+
+
+def _format_time(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.2f}us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f}ms"
+    return f"{seconds:.2f}s"
+
+
+# ==========================================
+# 벤치마크
+# ==========================================
+
+def _chapter_names(problems_dir):
+    chapters = {idx: name for idx, name, _ in discover_chapters(problems_dir)}
+    return [chapters.get(i, "") for i in range(max(chapters) + 1)] if chapters else []
+
+
+def _pick_problem(bank, chapter_count):
+    """입력과 출력이 있는 테스트 케이스가 가장 많은 문제"""
+    best = None
+    for idx in range(chapter_count):
+        for problem in (bank.get_chapter(idx) or {}).get("problems", []):
+            cases = [tc for tc in problem.get("test_cases") or [] if tc.get("input") and tc.get("output")]
+            if cases and (best is None or len(cases) > len(best[1]["test_cases"])):
+                best = (idx, {**problem, "test_cases": cases})
+    return best
+
+
+def bench_grader(runner):
+    print("grader")
+    lines = "\n".join(str(i) for i in range(100))
+    def read_all():
+        mock = MockInput(lines)
+        for _ in range(100):
+            mock()
+    runner.bench("grader.MockInput[100 lines]", read_all)
+
+    def capture():
+        with stdout_capture() as out:
+            for i in range(100):
+                print(i)
+        return out.getvalue()
+    runner.bench("grader.stdout_capture[100 prints]", capture)
+
+    output = "\r\n".join(f"line {i}  " for i in range(1000)) + "\r\n\r\n"
+    runner.bench("grader.normalize_output[1000 lines]", lambda: normalize_output(output), size=len(output))
+
+    source = "n = int(input())\nprint(sum(range(n)))\n"
+    runner.bench("grader.compile_user_code[cached]", lambda: compile_user_code(source))
+
+    get_pool()  # 워커 프로세스 준비는 측정에서 제외
+    runner.bench("grader.execute_user_code[print]", lambda: execute_user_code("print('hello')"))
+    runner.bench("grader.execute_user_code[input+loop]", lambda: execute_user_code(source, "100000"))
+
+
+def bench_run_test_cases(runner, bank, chapter_count):
+    picked = _pick_problem(bank, chapter_count)
+    if picked is None:
+        print("run_test_cases: 입력/출력이 있는 문제가 없어 건너뜀")
+        return
+    chapter_index, problem = picked
+    cases = problem["test_cases"]
+    code = problem.get("reference_solution") or lookup_solution(cases)
+    key = f"{chapter_index}_{problem['id']}"
+    print(f"run_test_cases (단원 {chapter_index} 문제 {problem['id']}, 테스트 케이스 {len(cases)}개)")
+
+    counter = itertools.count()
+    def uncached(parallel):
+        # 코드를 매번 바꿔 실행 결과 캐시를 피한다
+        return run_test_cases(f"run = {next(counter)}\n{code}", cases, parallel=parallel, problem_key=key)
+    runner.bench("grader.run_test_cases[sequential]", lambda: uncached(False), cases=len(cases))
+    runner.bench("grader.run_test_cases[parallel]", lambda: uncached(True), cases=len(cases))
+    runner.bench("grader.run_test_cases[verdict cache hit]",
+                 lambda: run_test_cases(code, cases, parallel=True, problem_key=key), cases=len(cases))
+    runner.bench("grader.run_test_cases[fail_fast wrong]",
+                 lambda: run_test_cases("print('x')", cases, parallel=True, fail_fast=True), cases=len(cases))
+
+
+def bench_problem_bank(runner, problems_dir, chapter_names, work_dir):
+    print("problem_bank (load_problem)")
+    bank = get_problem_bank(chapter_names, problems_dir)
+    packed_path, _ = build_packed_bank(problems_dir, os.path.join(work_dir, "problems.bank"))
+    packed = PackedProblemBank(packed_path)
+    indexes = itertools.cycle(range(len(chapter_names)))  # 단원을 돌아가며 조회
+
+    for label, backend in (("json", bank), ("packed", packed)):
+        runner.bench(f"problem_bank.get_chapter[{label}]", lambda: backend.get_chapter(next(indexes)),
+                     backend=type(backend).__name__)
+        runner.bench(f"problem_bank.get_problem[{label}]", lambda: backend.get_problem(next(indexes), 50),
+                     backend=type(backend).__name__)
+
+
+def synthetic_result(rng, sid, chapter_count):
+    """level_test.py가 저장하는 것과 같은 모양의 결과 하나
+
+    학생은 단원 3~8개를 열어보고(단원마다 10문제 출제), 연 단원에서 1~4문제를 제출한다.
+    """
+    visited = rng.sample(range(chapter_count), rng.randint(min(3, chapter_count), min(8, chapter_count)))
+    selected = {str(c): sorted(rng.sample(range(1, 101), 10)) for c in visited}
+    solve_status = {}
+    for chapter, pid in ((c, pid) for c in visited for pid in rng.sample(selected[str(c)], rng.randint(1, 4))):
+        submissions = rng.randint(1, 5)
+        passed = rng.random() < 0.6
+        solve_status[f"{chapter}_{pid}"] = {
+            "status": "PASS" if passed else "FAIL",
+            "submissions": submissions,
+            "first_pass": rng.randint(1, submissions) if passed else None,
+            "wall_time": round(rng.expovariate(50), 4),
+            "cpu_time": round(rng.expovariate(60), 4),
+            "peak_memory_kb": rng.randint(9000, 40000),
+            "output_bytes": rng.randint(0, 500),
+            "max_wall_time": round(rng.expovariate(80), 4),
+        }
+    return {
+        "user_name": f"학생{sid:06d}",
+        "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+        "start_time": "10:00:00",
+        "end_time": "11:00:00",
+        "last_updated": "11:00:00",
+        "is_finished": rng.random() < 0.9,
+        "solve_status": solve_status,
+        "selected_problems": selected,
+        "exit_logs": ["10:30:00"] * rng.randint(0, 2),
+    }
+
+
+def make_results_dir(path, size, chapter_count, seed=0):
+    """합성 결과 파일 size개 (학생마다 날짜가 다른 *_result.json)"""
+    os.makedirs(path, exist_ok=True)
+    rng = random.Random(f"{seed}:{size}")
+    for sid in range(size):
+        data = synthetic_result(rng, sid, chapter_count)
+        with open(os.path.join(path, f"{data['date']}_{data['user_name']}{RESULT_SUFFIX}"), "w",
+                  encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def bench_save_results(runner, work_dir, chapter_count):
+    print("results_store (save_results)")
+    results_dir = os.path.join(work_dir, "save_results")
+    writer = ResultsWriter(results_dir, os.path.join(results_dir, RESULTS_DB_FILENAME))
+    rng = random.Random(0)
+    snapshot = synthetic_result(rng, 0, chapter_count)
+    key = next(iter(snapshot["solve_status"]))
+    event = {"type": "submission", "key": key, **snapshot["solve_status"][key]}
+    runner.bench("results_store.record[enqueue]", lambda: writer.record(snapshot, event))
+    writer.flush()
+    def record_and_wait():
+        writer.record(snapshot, event)
+        writer.flush()
+    runner.bench("results_store.record[wait for disk]", record_and_wait)
+
+
+def bench_admin(runner, work_dir, chapter_count, sizes):
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+    import admin  # Streamlit 없이 불러오면 화면 함수는 아무것도 하지 않는다
+
+    for size in sizes:
+        results_dir = os.path.join(work_dir, f"results_{size}")
+        print(f"admin 결과 폴더 {size}개 생성 중...", flush=True)
+        make_results_dir(results_dir, size, chapter_count)
+        cache = admin.ResultsFileCache(results_dir)
+        results = runner.once(f"admin.ResultsFileCache.load[cold {size}]", cache.load, files=size)
+        if results is None:
+            results = cache.load()
+        runner.bench(f"admin.ResultsFileCache.load[unchanged {size}]", cache.load, files=size)
+        runner.bench(f"admin.build_results_frames+scores[{size}]",
+                     lambda: admin.add_session_scores(*admin.build_results_frames(results)), files=size)
+        shutil.rmtree(results_dir, ignore_errors=True)
+
+
+# ==========================================
+# 저장 / 비교
+# ==========================================
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def compare(old, new, threshold=REGRESSION_THRESHOLD):
+    """두 결과의 중앙값 비교 -> 회귀 항목 수"""
+    print(f"\n비교: {old['meta'].get('revision')} ({old['meta']['generated_at']}) -> "
+          f"{new['meta'].get('revision')} ({new['meta']['generated_at']})")
+    regressions = 0
+    for name in sorted(set(old["benchmarks"]) | set(new["benchmarks"])):
+        before, after = old["benchmarks"].get(name), new["benchmarks"].get(name)
+        if before is None or after is None:
+            print(f"  {name:<48} {'(새 항목)' if before is None else '(없어짐)'}")
+            continue
+        change = after["median"] / before["median"] - 1 if before["median"] else 0.0
+        mark = ""
+        if change >= threshold:
+            mark = "  <- 느려짐"
+            regressions += 1
+        elif change <= -threshold:
+            mark = "  빨라짐"
+        print(f"  {name:<48} {_format_time(before['median']):>10} -> {_format_time(after['median']):>10} "
+              f"({change * 100:+.1f}%){mark}")
+    print(f"회귀 {regressions}개 (기준 {threshold * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="채점 경로 마이크로 벤치마크")
+    parser.add_argument("--only", nargs="*", help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)),
+                        help="관리자 벤치마크의 합성 결과 파일 수 (쉼표 구분)")
+    parser.add_argument("--problems-dir", default=PROBLEMS_DIR, help="문제 폴더")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="결과 JSON 파일")
+    parser.add_argument("--compare", nargs="+", metavar="JSON", help="이전 결과와 비교 (파일 두 개면 실행 없이 비교만)")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="회귀로 볼 중앙값 증가 비율")
+    args = parser.parse_args()
+
+    if args.compare and len(args.compare) >= 2:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            old = json.load(f)
+        with open(args.compare[1], "r", encoding="utf-8") as f:
+            new = json.load(f)
+        sys.exit(1 if compare(old, new, args.threshold) else 0)
+
+    chapter_names = _chapter_names(args.problems_dir)
+    if not chapter_names:
+        print(f"{args.problems_dir}: 단원 파일이 없습니다.")
+        return
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    runner = BenchmarkRunner(args.only)
+    work_dir = tempfile.mkdtemp(prefix="benchmark_")
+    started = time.perf_counter()
+    try:
+        bank = get_problem_bank(chapter_names, args.problems_dir)
+        bench_grader(runner)
+        bench_run_test_cases(runner, bank, len(chapter_names))
+        bench_problem_bank(runner, args.problems_dir, chapter_names, work_dir)
+        bench_save_results(runner, work_dir, len(chapter_names))
+        bench_admin(runner, work_dir, len(chapter_names), sizes)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "grader_workers": WORKER_COUNT,
+            "elapsed": round(time.perf_counter() - started, 1),
+            "unit": "seconds per call",
+        },
+        "benchmarks": runner.results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n{len(runner.results)}개 벤치마크, {report['meta']['elapsed']}초, 결과 저장: {args.output}")
+
+    if args.compare:
+        with open(args.compare[0], "r", encoding="utf-8") as f:
+            old = json.load(f)
+        sys.exit(1 if compare(old, report, args.threshold) else 0)
+
+if __name__ == "__main__":
+    main()
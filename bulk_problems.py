@@ -0,0 +1,134 @@
+"""
+문제 은행 일괄 처리
+
+단원 파일마다 독립적인 작업(확장 -> 템플릿 채우기)을 프로세스 풀에서 단원별로 동시에 실행하고,
+끝난 단원부터 진행 상황을 출력한 뒤 마지막에 요약을 보여준다.
+템플릿의 무작위 선택은 (시드, 단원, 문제 번호)로 정해지므로 워커 수나 실행 순서와 관계없이
+같은 시드면 항상 같은 결과가 나온다.
+
+    python bulk_problems.py                      # expand, fill, validate 모두
+    python bulk_problems.py expand fill --workers 8 --seed 42
+    python bulk_problems.py validate
+
+단계:
+    expand    빠진 번호를 기본 템플릿으로 채워 단원마다 --target개까지 확장 (expand_problems.py)
+    fill      빈 템플릿을 실제 문제로 채움 (generate_problems_direct.py)
+              문제 은행의 문제와 거의 같은 문제는 다시 뽑고, 끝내 겹치면 빈 템플릿으로 남긴다 (dedup_index.py)
+    validate  정답 코드로 테스트 케이스 검증 (validate_problems.py, 보고서 problems/validation_report.json)
+    pack      패킹된 문제 은행 problems/problems.bank 다시 빌드 (problem_bank.py)
+
+validate는 채점 워커 풀이 이미 모든 코어를 쓰므로 단원 프로세스 풀 대신 메인 프로세스에서 실행한다.
+fill의 중복 검사는 워커 프로세스마다 색인을 따로 만들므로, 다른 단원과의 비교는 그 워커가
+색인을 만든 시점의 파일 기준이다 (템플릿은 단원마다 달라 단원 사이 중복은 드물다).
+"""
+import argparse
+import io
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import redirect_stdout
+
+from chapter_io import DEFAULT_SEED, read_chapter_name
+from expand_problems import expand_problems_file
+from generate_problems_direct import fill_problems_file
+from problem_bank import PROBLEMS_DIR, build_packed_bank, discover_chapters
+from file_io import write_json_atomic
+from validate_problems import REPORT_FILENAME, validate_bank
+
+STAGES = ["expand", "fill", "validate", "pack"]
+DEFAULT_STAGES = ["expand", "fill", "validate"]
+CHAPTER_STAGES = ["expand", "fill"]  # 단원별로 프로세스 풀에서 실행하는 단계
+TARGET_COUNT = 100
+
+
+def process_chapter(path, stages, target_count=TARGET_COUNT, seed=DEFAULT_SEED):
+    """단원 파일 하나에 단계들을 차례로 실행 (프로세스 풀 워커에서 실행)
+
+    -> {"file", "chapter_name", "added", "filled", "elapsed", "error"}
+    """
+    started = time.perf_counter()
+    result = {"file": os.path.basename(path), "chapter_name": None, "added": 0, "filled": 0, "error": None}
+    try:
+        result["chapter_name"] = read_chapter_name(path)
+        # 스크립트별 출력은 버리고 결과는 메인 프로세스가 모아서 출력한다
+        with redirect_stdout(io.StringIO()):
+            if "expand" in stages:
+                result["added"] = expand_problems_file(path, target_count)
+            if "fill" in stages:
+                result["filled"] = fill_problems_file(path, seed)
+    except Exception:
+        result["error"] = traceback.format_exc(limit=3).strip().splitlines()[-1]
+    result["elapsed"] = round(time.perf_counter() - started, 3)
+    return result
+
+
+def run_chapter_stages(problems_dir, stages, workers, target_count=TARGET_COUNT, seed=DEFAULT_SEED):
+    """모든 단원에 단계들을 프로세스 풀로 실행하고 단원 순서대로 결과 목록을 반환"""
+    paths = [path for _, _, path in discover_chapters(problems_dir)]
+    if not paths:
+        print(f"{problems_dir}: 단원 파일이 없습니다.")
+        return []
+
+    results = []
+    workers = max(1, min(workers, len(paths)))
+    print(f"단원 {len(paths)}개 처리 시작 ({', '.join(stages)}, 프로세스 {workers}개, 시드 {seed})")
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(process_chapter, path, stages, target_count, seed) for path in paths]
+        for done, future in enumerate(as_completed(futures), 1):
+            result = future.result()
+            results.append(result)
+            if result["error"]:
+                status = f"실패: {result['error']}"
+            else:
+                status = f"확장 +{result['added']}, 채움 {result['filled']}"
+            print(f"  [{done}/{len(paths)}] {result['file']}: {status} ({result['elapsed']:.2f}초)")
+    return sorted(results, key=lambda r: r["file"])
+
+
+def print_summary(results, elapsed):
+    failed = [r for r in results if r["error"]]
+    print(f"\n단원 {len(results)}개, {elapsed:.2f}초: "
+          f"확장 {sum(r['added'] for r in results)}문제, 채움 {sum(r['filled'] for r in results)}문제"
+          + (f", 실패 {len(failed)}개" if failed else ""))
+    for r in failed:
+        print(f"  - {r['file']}: {r['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="문제 은행 일괄 처리 (단원별 프로세스 병렬)")
+    parser.add_argument("stages", nargs="*", metavar="stage",
+                        help=f"실행할 단계 {STAGES} (기본: expand fill validate)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="단원 프로세스 수 (기본: 코어 수)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="템플릿 무작위 선택 시드")
+    parser.add_argument("--target", type=int, default=TARGET_COUNT, help="expand 단계의 단원별 목표 문제 수")
+    parser.add_argument("--dir", default=PROBLEMS_DIR, help="문제 폴더")
+    args = parser.parse_args()
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"알 수 없는 단계: {', '.join(unknown)} (가능한 단계: {', '.join(STAGES)})")
+    stages = [stage for stage in STAGES if stage in (args.stages or DEFAULT_STAGES)]
+
+    started = time.perf_counter()
+    chapter_stages = [stage for stage in stages if stage in CHAPTER_STAGES]
+    if chapter_stages:
+        results = run_chapter_stages(args.dir, chapter_stages, args.workers, args.target, args.seed)
+        print_summary(results, time.perf_counter() - started)
+
+    if "validate" in stages:
+        print("\n문제 검증 시작")
+        report = validate_bank(args.dir)
+        report_path = os.path.join(args.dir, REPORT_FILENAME)
+        write_json_atomic(report_path, report)
+        print(f"검증 {sum(report['summary'].values())}문제, {report['elapsed']}초: " +
+              ", ".join(f"{status} {count}" for status, count in report["summary"].items() if count))
+        print(f"보고서 저장: {report_path}")
+
+    if "pack" in stages:
+        path, count = build_packed_bank(args.dir)
+        print(f"\n패킹 완료: {path} ({count}문제)")
+
+    print(f"\n전체 {time.perf_counter() - started:.2f}초")
+
+if __name__ == "__main__":
+    main()
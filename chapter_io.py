@@ -0,0 +1,231 @@
+"""
+단원 문제 파일 입출력
+
+단원 파일({"chapter_name": ..., "problems": [...]})을 통째로 json.load 해서 고친 뒤
+indent=2로 다시 쓰는 대신 문제 단위로 흘려보낸다.
+
+- iter_problems(path): 파일 전체를 파싱하지 않고 problems 배열의 문제를 하나씩 읽는다
+- ChapterWriter / write_chapter: 임시 파일에 문제를 한 줄에 하나씩 compact JSON으로 쓰고
+  fsync 한 뒤 원자적으로 교체한다 (중간에 죽어도 원래 파일은 그대로 남는다)
+- update_chapter: 문제를 하나씩 읽어 고치면서 바로 임시 파일에 쓴다
+  (고친 문제가 없으면 원래 파일을 건드리지 않는다)
+- merge_problems: 문제 번호 순서를 유지하며 새 문제를 끼워 넣는다
+- problem_rng: (시드, 단원, 문제 번호)로 정해지는 난수 생성기 (템플릿 생성 스크립트가
+  어떤 순서/프로세스에서 실행되어도 같은 문제를 만들도록)
+
+쓰는 형식도 일반 JSON이라 json.load로 그대로 읽을 수 있다:
+    {"chapter_name":"출력","problems":[
+    {"id":1,"title":...},
+    {"id":2,"title":...}
+    ]}
+"""
+import heapq
+import json
+import os
+import random
+import threading
+
+from file_io import replace_file
+
+READ_CHUNK_SIZE = 64 * 1024
+DEFAULT_SEED = 0  # 템플릿 생성 스크립트의 기본 시드
+_WHITESPACE = " \t\r\n"
+
+
+def _dumps(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class _JSONStream:
+    """파일을 조금씩 읽으며 JSON 토큰/값을 하나씩 디코딩"""
+
+    def __init__(self, f):
+        self.f = f
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self):
+        chunk = self.f.read(READ_CHUNK_SIZE)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self):
+        """다음 공백이 아닌 글자 (파일 끝이면 "")"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def skip(self, char):
+        """다음 글자가 char이면 건너뛰고 True"""
+        if self.peek() == char:
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, char):
+        if not self.skip(char):
+            raise ValueError(f"단원 파일 형식 오류: '{char}'가 필요합니다 ({self.f.name})")
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # 값이 버퍼 끝에서 잘렸으면 더 읽어서 다시 시도
+                if not self._fill():
+                    raise
+                continue
+            # 숫자는 버퍼 끝에서 잘려도 디코딩되므로 끝에 닿았으면 더 읽어서 확인
+            if end == len(self.buf) and not self.eof and self._fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_problems(path, header=None):
+    """problems 배열의 문제를 하나씩 반환
+
+    header dict를 주면 problems 외의 최상위 값(chapter_name 등)을 읽는 대로 채운다.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        stream = _JSONStream(f)
+        stream.expect("{")
+        if stream.skip("}"):
+            return
+        while True:
+            key = stream.value()
+            stream.expect(":")
+            if key == "problems":
+                stream.expect("[")
+                if not stream.skip("]"):
+                    while True:
+                        yield stream.value()
+                        if not stream.skip(","):
+                            break
+                    stream.expect("]")
+            else:
+                value = stream.value()
+                if header is not None:
+                    header[key] = value
+            if not stream.skip(","):
+                break
+        stream.expect("}")
+
+
+def read_chapter_name(path):
+    """단원 이름 (파일 앞부분만 읽는다)"""
+    header = {}
+    for _ in iter_problems(path, header):
+        if "chapter_name" in header:
+            break
+    return header.get("chapter_name")
+
+
+class ChapterWriter:
+    """단원 파일을 임시 파일에 한 문제씩 써 두었다가 close() 때 원자적으로 교체
+
+        with ChapterWriter(path, chapter_name) as writer:
+            for problem in problems:
+                writer.write(problem)
+
+    with 블록이 예외로 끝나거나 discard()를 부르면 임시 파일을 지우고 원래 파일을 유지한다.
+    """
+
+    def __init__(self, path, chapter_name):
+        self.path = path
+        self.count = 0
+        self._tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        self._file = open(self._tmp_path, "w", encoding="utf-8", newline="\n")
+        self._file.write('{"chapter_name":' + _dumps(chapter_name) + ',"problems":[')
+
+    def write(self, problem):
+        self._file.write(("\n" if self.count == 0 else ",\n") + _dumps(problem))
+        self.count += 1
+
+    def close(self):
+        if self._file is None:
+            return
+        self._file.write("\n]}\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        self._file = None
+        replace_file(self._tmp_path, self.path)
+
+    def discard(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+
+def write_chapter(path, chapter_name, problems):
+    """문제 목록(반복자 가능)으로 단원 파일을 원자적으로 다시 쓰고 문제 수를 반환"""
+    with ChapterWriter(path, chapter_name) as writer:
+        for problem in problems:
+            writer.write(problem)
+    return writer.count
+
+
+def update_chapter(path, update):
+    """문제를 하나씩 update(problem)에 넘겨 고친 내용으로 단원 파일을 다시 쓴다
+
+    update는 문제 dict를 그 자리에서 고치고, 고쳤으면 True를 반환한다.
+    고친 문제 수를 반환하며, 0이면 원래 파일을 그대로 둔다.
+    """
+    changed = 0
+    writer = ChapterWriter(path, read_chapter_name(path))
+    try:
+        for problem in iter_problems(path):
+            if update(problem):
+                changed += 1
+            writer.write(problem)
+    except BaseException:
+        writer.discard()
+        raise
+    if changed:
+        writer.close()
+    else:
+        writer.discard()
+    return changed
+
+
+def merge_problems(path, new_problems):
+    """문제 번호 순서를 유지하며 new_problems를 단원 파일에 끼워 넣는다 (파일의 문제는 번호 순이라고 가정)
+
+    같은 번호의 문제가 이미 있으면 새 문제로 바꾼다. 최종 문제 수를 반환한다.
+    """
+    new_problems = sorted(new_problems, key=lambda p: p["id"])
+    new_ids = {p["id"] for p in new_problems}
+    existing = (p for p in iter_problems(path) if p["id"] not in new_ids)
+    return write_chapter(path, read_chapter_name(path),
+                         heapq.merge(existing, new_problems, key=lambda p: p["id"]))
+
+
+def problem_rng(chapter_name, problem_id, seed=DEFAULT_SEED):
+    """문제마다 독립적인 난수 생성기 (문자열 시드는 PYTHONHASHSEED와 무관하게 항상 같은 값)"""
+    return random.Random(f"{seed}:{chapter_name}:{problem_id}")
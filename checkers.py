@@ -0,0 +1,450 @@
+"""
+출력 채점기 (checker)
+
+문제마다 단원 JSON의 "checker" 값으로 출력 비교 방식을 고른다 (없으면 exact).
+
+    "checker": "float"
+    "checker": {"type": "float", "abs_tol": 0.01}
+    "checker": {"type": "custom", "code": "def check(input, expected, actual):\\n    ..."}
+
+내장 채점기 (expected는 normalize_output을 거친 예상 출력):
+    exact            normalize_output 후 완전히 같아야 통과 (기본값)
+    tokens           공백으로 나눈 토큰이 순서대로 모두 같으면 통과 (공백/줄바꿈 모양은 무시)
+    float            tokens와 같되 실수로 읽히는 토큰은 abs_tol/rel_tol 오차 안이면 같다고 본다
+    unordered_lines  줄 순서와 관계없이 같은 줄들이 같은 개수만큼 있으면 통과 (줄 앞뒤 공백, 빈 줄 무시)
+    regex            출력의 줄마다 같은 번호의 정규식 줄과 fullmatch 하면 통과 (줄 끝 공백 무시)
+                     pattern을 주지 않으면 테스트 케이스의 예상 출력을 줄별 정규식으로 쓴다
+
+내장 채점기는 모두 출력 조각을 받는 대로 한 번만 훑는 스트리밍 비교기라서, 채점 워커가
+학생 코드의 출력을 쓰는 즉시 비교하고 틀리는 순간 실행을 멈출 수 있다.
+
+custom 채점기는 check(input, expected, actual)를 정의한 코드로, 채점 워커 풀(샌드박스)에서
+학생 코드와 같은 제한을 받으며 실행된다. True/False 또는 (True/False, 메시지)를 반환한다.
+"""
+import json
+import math
+import re
+from collections import Counter
+
+CHECKER_TYPES = ("exact", "tokens", "float", "unordered_lines", "regex", "custom")
+FLOAT_ABS_TOL = 1e-6
+FLOAT_REL_TOL = 1e-6
+FLOAT_TOKEN_SLACK = 32  # 실수 토큰이 예상 토큰보다 이만큼 넘게 길어지면 틀린 것으로 본다
+CUSTOM_VERDICT_MARK = "\x00__checker_verdict__"
+
+_WHITESPACE = re.compile(r"\s+")
+_TOKEN = re.compile(r"\S+")
+
+_CUSTOM_HARNESS = f"""
+
+__checker_verdict__ = check(__checker_input__, __checker_expected__, __checker_actual__)
+__checker_message__ = ""
+if isinstance(__checker_verdict__, tuple):
+    __checker_verdict__, __checker_message__ = (tuple(__checker_verdict__) + ("",))[:2]
+print({CUSTOM_VERDICT_MARK!r}, bool(__checker_verdict__), __checker_message__ or "", sep="\\t")
+"""
+
+
+def normalize_output(output):
+    """출력을 정규화하여 비교 (공백 제거, 줄바꿈 정리)"""
+    if output is None:
+        return ""
+    return output.strip().replace('\r\n', '\n').replace('\r', '\n')
+
+
+def line_col(text, offset):
+    """text의 offset 위치를 {"line", "col"} (1부터)로"""
+    line_start = text.rfind("\n", 0, offset) + 1
+    return {"line": text.count("\n", 0, line_start) + 1, "col": offset - line_start + 1}
+
+
+# ==========================================
+# 설정
+# ==========================================
+
+def parse_checker(spec):
+    """문제의 checker 값을 {"type", ...설정} dict로 정리 (잘못된 값이면 ValueError)"""
+    if spec is None:
+        return {"type": "exact"}
+    checker_type = spec.get("type") if isinstance(spec, dict) else spec
+    if checker_type not in CHECKER_TYPES:
+        raise ValueError(f"알 수 없는 채점기: {checker_type!r} (가능한 값: {', '.join(CHECKER_TYPES)})")
+    if isinstance(spec, str):
+        spec = {"type": spec}
+
+    checker_type = spec["type"]
+    if checker_type == "float":
+        checker = {"type": "float",
+                   "abs_tol": spec.get("abs_tol", FLOAT_ABS_TOL), "rel_tol": spec.get("rel_tol", FLOAT_REL_TOL)}
+        if not all(isinstance(checker[k], (int, float)) and checker[k] >= 0 for k in ("abs_tol", "rel_tol")):
+            raise ValueError("float 채점기의 abs_tol/rel_tol은 0 이상의 숫자여야 합니다.")
+        return checker
+    if checker_type == "regex":
+        pattern = spec.get("pattern")
+        if pattern is not None and not isinstance(pattern, str):
+            raise ValueError("regex 채점기의 pattern은 문자열이어야 합니다.")
+        for line in normalize_output(pattern).split("\n") if pattern else ():
+            try:
+                re.compile(line)
+            except re.error as e:
+                raise ValueError(f"regex 채점기의 정규식 오류: {line!r} ({e})")
+        return {"type": "regex", "pattern": pattern}
+    if checker_type == "custom":
+        code = spec.get("code")
+        if not isinstance(code, str) or not code.strip():
+            raise ValueError("custom 채점기에는 check(input, expected, actual)를 정의한 code가 필요합니다.")
+        try:
+            compile(code, "<checker>", "exec")
+        except (SyntaxError, ValueError) as e:
+            raise ValueError(f"custom 채점기 문법 오류: {e}")
+        return {"type": "custom", "code": code}
+    return {"type": checker_type}
+
+
+def checker_key(checker):
+    """실행 결과 캐시 키에 넣을 채점기 식별 문자열 (parse_checker 결과를 받는다)"""
+    if checker["type"] == "exact":
+        return "exact"
+    return json.dumps(checker, sort_keys=True, ensure_ascii=False)
+
+
+def make_checker(checker, expected):
+    """parse_checker 결과와 정규화된 예상 출력으로 스트리밍 비교기를 만든다 (custom이면 None)"""
+    checker_type = checker["type"]
+    if checker_type == "exact":
+        return OutputMatcher(expected)
+    if checker_type == "tokens":
+        return TokenChecker(expected)
+    if checker_type == "float":
+        return FloatChecker(expected, checker["abs_tol"], checker["rel_tol"])
+    if checker_type == "unordered_lines":
+        return UnorderedLinesChecker(expected)
+    if checker_type == "regex":
+        return RegexLinesChecker(expected, checker.get("pattern"))
+    return None
+
+
+def custom_checker_source(checker):
+    """custom 채점기 코드에 check()를 불러 판정을 출력하는 부분을 붙인 소스"""
+    return checker["code"] + _CUSTOM_HARNESS
+
+
+def custom_checker_context(test_input, expected, actual):
+    """custom 채점기를 실행할 때 전역 변수로 넣을 값"""
+    return {"__checker_input__": test_input, "__checker_expected__": expected, "__checker_actual__": actual}
+
+
+def parse_custom_verdict(output):
+    """custom 채점기의 출력에서 (통과 여부, 메시지)를 꺼낸다 (판정이 없으면 None)"""
+    for line in reversed((output or "").splitlines()):
+        if line.startswith(CUSTOM_VERDICT_MARK):
+            _, verdict, message = (line.split("\t", 2) + ["", ""])[:3]
+            return verdict == "True", message
+    return None
+
+
+# ==========================================
+# 스트리밍 비교기
+# ==========================================
+
+class StreamChecker:
+    """출력 조각을 받아 바로바로 판정하는 비교기의 공통 부분
+
+    feed(text)  조각 하나를 비교하고 아직 맞을 수 있으면 True (False면 실행을 멈춰도 된다)
+    finish()    출력이 끝났을 때 최종 판정
+    position()  처음 틀린 곳 {"line", "col"} (맞으면 None)
+    """
+
+    def __init__(self, expected):
+        self.expected = expected  # 정규화된 예상 출력
+        self.matched = True
+        self.mismatch_at = None
+        self._cr = False  # 조각 끝의 \r (다음 조각이 \n으로 시작할 수 있음)
+
+    def _newlines(self, text):
+        """\\r\\n, \\r을 \\n으로 (조각 끝의 \\r은 다음 조각과 이어서 처리)"""
+        if self._cr:
+            text = "\r" + text
+        self._cr = text.endswith("\r")
+        if self._cr:
+            text = text[:-1]
+        if "\r" in text:
+            text = text.replace("\r\n", "\n").replace("\r", "\n")
+        return text
+
+    def _fail(self, at):
+        self.matched = False
+        self.mismatch_at = at
+        return False
+
+
+class OutputMatcher(StreamChecker):
+    """조각으로 들어오는 출력을 normalize_output(expected)와 바로바로 비교 (exact 채점기)
+
+    normalize_output과 같은 규칙(앞뒤 공백 무시, \\r\\n/\\r -> \\n)을 흘려보내며 적용하므로
+    전체 출력을 모으거나 복사하지 않는다. 공백 구간은 뒤에 글자가 이어질 때까지 보류한다
+    (출력 끝의 공백이면 버려진다).
+    달라지면 예상 출력에서 처음 달라지는 위치를 mismatch_at에 기록한다 (position()으로 줄/칸).
+    """
+
+    def __init__(self, expected):
+        super().__init__(expected)
+        self.pos = 0
+        self._started = False
+        self._pending = ""  # 보류 중인 공백
+
+    def feed(self, text):
+        """출력 조각 하나를 비교하고 아직 일치할 수 있으면 True"""
+        if not self.matched:
+            return False
+        text = self._newlines(text)
+        if not self._started:
+            text = text.lstrip()
+            if not text:
+                return True
+            self._started = True
+        body = text.rstrip()
+        if not body:
+            self._pending += text
+            return True
+        chunk = self._pending + body if self._pending else body
+        if not self.expected.startswith(chunk, self.pos):
+            return self._fail(self.pos + self._common_prefix(chunk))
+        self.pos += len(chunk)
+        self._pending = text[len(body):]
+        return True
+
+    def _common_prefix(self, chunk):
+        """pos부터 예상 출력과 chunk가 같은 길이 (startswith로 이진 탐색)"""
+        lo, hi = 0, min(len(chunk), len(self.expected) - self.pos)
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if self.expected.startswith(chunk[:mid], self.pos):
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def finish(self):
+        """출력이 끝났을 때 예상 출력과 같은지"""
+        if self.matched and self.pos != len(self.expected):
+            # 출력이 예상보다 짧게 끝남
+            self._fail(self.pos)
+        return self.matched
+
+    def position(self):
+        """처음 달라지는 위치 {"line", "col"} (1부터, 일치하면 None)"""
+        if self.mismatch_at is None:
+            return None
+        return line_col(self.expected, self.mismatch_at)
+
+
+class _ItemChecker(StreamChecker):
+    """출력을 항목(토큰 또는 줄)으로 나눠 완성된 항목마다 비교하는 비교기
+
+    조각 경계에 걸친 항목은 조각 목록으로 보류했다가 끝나면 한 번만 이어 붙인다.
+    """
+
+    def __init__(self, expected):
+        super().__init__(expected)
+        self.count = 0  # 비교를 마친 항목 수
+        self._pieces = []  # 아직 끝나지 않은 항목의 조각
+        self._pending_length = 0
+
+    def _split(self, text):
+        """[끝난 항목..., 끝나지 않은 나머지] (첫 항목은 보류 중인 조각에 이어진다)"""
+        raise NotImplementedError
+
+    def _item(self, item):
+        """완성된 항목 하나를 비교하고 아직 맞을 수 있으면 True"""
+        raise NotImplementedError
+
+    def _max_pending_length(self):
+        """끝나지 않은 항목이 이보다 길어지면 틀린 것으로 본다 (None이면 제한 없음)"""
+        return None
+
+    def _end(self):
+        """모든 항목을 비교한 뒤의 최종 확인"""
+
+    def feed(self, text):
+        if not self.matched:
+            return False
+        parts = self._split(self._newlines(text))
+        rest = parts.pop()
+        if parts:
+            if self._pieces:
+                parts[0] = "".join(self._pieces) + parts[0]
+                self._pieces.clear()
+                self._pending_length = 0
+            for item in parts:
+                if not self._item(item):
+                    return False
+        if rest:
+            self._pieces.append(rest)
+            self._pending_length += len(rest)
+            limit = self._max_pending_length()
+            if limit is not None and self._pending_length > limit:
+                return self._fail(self.count)
+        return True
+
+    def finish(self):
+        if self.matched and self._pieces:
+            item = "".join(self._pieces)
+            self._pieces.clear()
+            self._item(item)
+        if self.matched:
+            self._end()
+        return self.matched
+
+
+class TokenChecker(_ItemChecker):
+    """공백으로 나눈 토큰이 순서대로 모두 같으면 통과 (tokens 채점기)
+
+    mismatch_at은 처음 틀린 예상 토큰의 번호.
+    """
+
+    def __init__(self, expected):
+        super().__init__(expected)
+        self.tokens = expected.split()
+
+    def _split(self, text):
+        return _WHITESPACE.split(text)
+
+    def equal(self, expected, actual):
+        return expected == actual
+
+    def _item(self, token):
+        if not token:
+            return True
+        if self.count >= len(self.tokens) or not self.equal(self.tokens[self.count], token):
+            return self._fail(self.count)
+        self.count += 1
+        return True
+
+    def _max_pending_length(self):
+        return len(self.tokens[self.count]) if self.count < len(self.tokens) else 0
+
+    def _end(self):
+        if self.count != len(self.tokens):
+            self._fail(self.count)
+
+    def position(self):
+        """처음 틀린 예상 토큰의 시작 위치 (예상 토큰이 모자라면 예상 출력의 끝)"""
+        if self.mismatch_at is None:
+            return None
+        offset = len(self.expected)
+        for i, match in enumerate(_TOKEN.finditer(self.expected)):
+            if i == self.mismatch_at:
+                offset = match.start()
+                break
+        return line_col(self.expected, offset)
+
+
+class FloatChecker(TokenChecker):
+    """실수로 읽히는 토큰은 허용 오차 안이면 같다고 보는 tokens 채점기 (float 채점기)"""
+
+    def __init__(self, expected, abs_tol=FLOAT_ABS_TOL, rel_tol=FLOAT_REL_TOL):
+        super().__init__(expected)
+        self.abs_tol = abs_tol
+        self.rel_tol = rel_tol
+
+    def equal(self, expected, actual):
+        if expected == actual:
+            return True
+        try:
+            expected_value, actual_value = float(expected), float(actual)
+        except ValueError:
+            return False
+        if math.isnan(expected_value) or math.isnan(actual_value):
+            return math.isnan(expected_value) and math.isnan(actual_value)
+        return math.isclose(actual_value, expected_value, rel_tol=self.rel_tol, abs_tol=self.abs_tol)
+
+    def _max_pending_length(self):
+        return super()._max_pending_length() + FLOAT_TOKEN_SLACK
+
+
+class UnorderedLinesChecker(_ItemChecker):
+    """줄 순서와 관계없이 같은 줄들이 같은 개수만큼 있으면 통과 (unordered_lines 채점기)
+
+    줄 앞뒤 공백과 빈 줄은 무시한다. 예상 출력에 없는(또는 더 많은) 줄이 나오는 즉시 틀리며,
+    mismatch_at은 그 줄이 실제 출력에서 몇 번째 줄인지 (모자라면 출력 끝 다음 줄).
+    """
+
+    def __init__(self, expected):
+        super().__init__(expected)
+        self.remaining = Counter(line.strip() for line in expected.split("\n") if line.strip())
+        self.lines = 0  # 실제 출력에서 지금까지 끝난 줄 수
+
+    def _split(self, text):
+        return text.split("\n")
+
+    def _item(self, line):
+        self.lines += 1
+        line = line.strip()
+        if not line:
+            return True
+        if self.remaining[line] <= 0:
+            return self._fail(self.lines)
+        self.remaining[line] -= 1
+        self.count += 1
+        return True
+
+    def _end(self):
+        if any(count > 0 for count in self.remaining.values()):
+            self._fail(self.lines + 1)
+
+    def position(self):
+        if self.mismatch_at is None:
+            return None
+        return {"line": self.mismatch_at, "col": 1}
+
+
+class RegexLinesChecker(_ItemChecker):
+    """출력의 줄마다 같은 번호의 정규식 줄과 fullmatch 하면 통과 (regex 채점기)
+
+    출력은 normalize_output처럼 앞뒤 빈 줄과 첫 줄 앞 공백을 무시하고, 줄 끝 공백은 비교하지 않는다.
+    mismatch_at은 처음 틀린 줄의 번호 (0부터).
+    """
+
+    def __init__(self, expected, pattern=None):
+        super().__init__(expected)
+        source = normalize_output(pattern if pattern is not None else expected)
+        try:
+            self.patterns = [re.compile(line) for line in source.split("\n")] if source else []
+        except re.error as e:
+            raise ValueError(f"regex 채점기의 정규식 오류: {e}")
+        self._started = False
+        self._blank_lines = 0  # 보류 중인 빈 줄 (뒤에 글자가 있는 줄이 오면 비교, 끝나면 버림)
+
+    def _split(self, text):
+        return text.split("\n")
+
+    def _item(self, line):
+        line = line.rstrip()
+        if not line:
+            if self._started:
+                self._blank_lines += 1
+            return True
+        if not self._started:
+            self._started = True
+            line = line.lstrip()
+        for _ in range(self._blank_lines):
+            if not self._match(""):
+                return False
+        self._blank_lines = 0
+        return self._match(line)
+
+    def _match(self, line):
+        if self.count >= len(self.patterns) or not self.patterns[self.count].fullmatch(line):
+            return self._fail(self.count)
+        self.count += 1
+        return True
+
+    def _end(self):
+        if self.count != len(self.patterns):
+            self._fail(self.count)
+
+    def position(self):
+        if self.mismatch_at is None:
+            return None
+        return {"line": self.mismatch_at + 1, "col": 1}
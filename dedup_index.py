@@ -0,0 +1,263 @@
+"""
+유사 문제(거의 같은 문제) 검출 색인
+
+문제마다 제목+설명의 글자 3-gram과 테스트 케이스 형태(입력 -> 출력)를 shingle로 만들고,
+MinHash 서명을 LSH 밴드로 나눠 버킷에 넣는다. 질의는 같은 버킷에 들어간 후보만
+실제 Jaccard 유사도로 확인하므로 문제 수가 늘어도 전체를 비교하지 않는다.
+숫자는 모두 0으로 바꿔 비교하므로 "문자열 출력 3"과 "문자열 출력 7"처럼
+숫자만 다른 템플릿 문제는 같은 문제로 본다.
+
+템플릿 생성 스크립트(generate_problems_direct.py, fill_problem_templates.py)는 draw_unique()로
+문제를 채우기 전에 색인과 비교해, 겹치면 다시 뽑고 끝내 겹치면 빈 템플릿으로 남긴다.
+
+문제 은행 전체의 유사 문제 묶음 보고서 (problems/duplicate_report.json):
+    python dedup_index.py [문제 폴더] [보고서 파일]
+"""
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+from collections import defaultdict
+from datetime import datetime
+
+import numpy as np
+
+from problem_bank import PROBLEMS_DIR, discover_chapters
+from file_io import write_json_atomic
+from validate_problems import is_placeholder
+
+NUM_PERM = 128  # MinHash 서명 길이
+LSH_BANDS = 16  # 밴드 수 (밴드당 NUM_PERM // LSH_BANDS 행, 유사도 약 0.7부터 후보가 됨)
+SHINGLE_SIZE = 3  # 글자 n-gram 크기
+DUPLICATE_THRESHOLD = 0.8  # 이 Jaccard 유사도 이상이면 중복
+TEMPLATE_REDRAWS = 5  # 템플릿 문제가 중복이면 다시 뽑는 횟수
+REPORT_FILENAME = "duplicate_report.json"
+
+_rng = np.random.default_rng(20240501)
+_PERM_A = _rng.integers(1, 2**63, NUM_PERM, dtype=np.uint64) | np.uint64(1)
+_PERM_B = _rng.integers(0, 2**63, NUM_PERM, dtype=np.uint64)
+
+
+def _normalize(text):
+    text = re.sub(r"\d+", "0", str(text or "").lower())
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def problem_shingles(problem):
+    """문제 하나의 shingle 집합 (제목+설명 글자 n-gram, 테스트 케이스 형태)"""
+    text = _normalize(f"{problem.get('title', '')} {problem.get('description', '')}")
+    shingles = {"w:" + text[i:i + SHINGLE_SIZE] for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    for tc in problem.get("test_cases") or []:
+        if isinstance(tc, dict):
+            shingles.add(f"io:{_normalize(tc.get('input'))[:40]}->{_normalize(tc.get('output'))[:40]}")
+    return shingles
+
+
+def minhash(shingles):
+    """shingle 집합의 MinHash 서명 (uint32 NUM_PERM개)"""
+    hashes = np.fromiter(
+        (int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=4).digest(), "little") for s in shingles),
+        dtype=np.uint64, count=len(shingles),
+    )
+    # multiply-shift 해시로 NUM_PERM개의 순열을 흉내 낸다 (uint64 곱셈은 2^64로 나눈 나머지)
+    permuted = (_PERM_A[:, None] * hashes[None, :] + _PERM_B[:, None]) >> np.uint64(32)
+    return permuted.min(axis=1).astype(np.uint32)
+
+
+def jaccard(a, b):
+    return len(a & b) / len(a | b) if a or b else 1.0
+
+
+class DuplicateIndex:
+    """MinHash + LSH 유사 문제 색인 (스레드 공유)
+
+    key는 보통 (단원 인덱스, 문제 번호). query()는 threshold 이상 유사한 문제를 돌려준다.
+    여러 스레드가 문제를 만들며 저장할지 정할 때는 add_if_unique()로 확인과 추가를 한 번에 한다.
+    """
+
+    def __init__(self, threshold=DUPLICATE_THRESHOLD, bands=LSH_BANDS):
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = NUM_PERM // bands
+        self._buckets = [defaultdict(list) for _ in range(bands)]
+        self._shingles = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._shingles)
+
+    def _band_keys(self, signature):
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    def _insert(self, key, shingles, band_keys):
+        # self._lock을 잡은 상태에서 부른다
+        self._shingles[key] = shingles
+        for bucket, band_key in zip(self._buckets, band_keys):
+            bucket[band_key].append(key)
+
+    def _matches(self, shingles, band_keys, exclude):
+        # self._lock을 잡은 상태에서 부른다
+        candidates = set()
+        for bucket, band_key in zip(self._buckets, band_keys):
+            candidates.update(bucket.get(band_key, ()))
+        candidates.discard(exclude)
+        matches = [(key, jaccard(shingles, self._shingles[key])) for key in candidates]
+        matches = [(key, round(sim, 3)) for key, sim in matches if sim >= self.threshold]
+        return sorted(matches, key=lambda m: -m[1])
+
+    def add(self, key, problem):
+        shingles = problem_shingles(problem)
+        band_keys = self._band_keys(minhash(shingles))
+        with self._lock:
+            self._insert(key, shingles, band_keys)
+
+    def query(self, problem, exclude=None):
+        """threshold 이상 유사한 [(key, 유사도)] (유사도 내림차순)"""
+        shingles = problem_shingles(problem)
+        band_keys = self._band_keys(minhash(shingles))
+        with self._lock:
+            return self._matches(shingles, band_keys, exclude)
+
+    def add_if_unique(self, key, problem, exclude=None):
+        """유사한 문제가 없으면 추가하고 [], 있으면 추가하지 않고 query()와 같은 목록을 반환
+
+        확인과 추가를 한 번의 잠금 안에서 하므로 두 스레드가 서로 비슷한 문제를
+        동시에 넣어도 하나만 들어간다.
+        """
+        shingles = problem_shingles(problem)
+        band_keys = self._band_keys(minhash(shingles))
+        with self._lock:
+            matches = self._matches(shingles, band_keys, exclude)
+            if not matches:
+                self._insert(key, shingles, band_keys)
+        return matches
+
+
+def _load_chapters(problems_dir):
+    for chapter_index, chapter_name, path in discover_chapters(problems_dir):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        yield chapter_index, data.get("chapter_name", chapter_name), data.get("problems", [])
+
+
+def build_index(problems_dir=PROBLEMS_DIR, threshold=DUPLICATE_THRESHOLD):
+    """문제 은행 전체 색인 (입출력이 빈 기본 템플릿 문제는 제외)"""
+    index = DuplicateIndex(threshold)
+    for chapter_index, _, problems in _load_chapters(problems_dir):
+        for problem in problems:
+            if problem.get("test_cases") and not is_placeholder(problem["test_cases"]):
+                index.add((chapter_index, problem["id"]), problem)
+    return index
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_duplicate_index(problems_dir=PROBLEMS_DIR):
+    """프로세스 전체에서 공유하는 문제 은행 색인 (처음 호출할 때 만든다)"""
+    key = os.path.abspath(problems_dir)
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = build_index(problems_dir)
+        return _indexes[key]
+
+
+def draw_unique(index, key, draw, redraws=TEMPLATE_REDRAWS):
+    """draw()로 만든 문제가 색인의 문제와 겹치지 않으면 key로 색인에 추가하고 반환
+
+    겹치면 draw()를 다시 불러 (무작위 선택이 있는 템플릿은 다른 문제가 나온다) redraws번까지
+    더 시도하고, 끝내 겹치면 None을 반환한다. 입출력이 빈 기본 템플릿은 색인에 넣지 않고 그대로 반환한다.
+    """
+    for _ in range(1 + redraws):
+        problem = draw()
+        if is_placeholder(problem.get("test_cases") or []):
+            return problem
+        if not index.add_if_unique(key, problem, exclude=key):
+            return problem
+    return None
+
+
+def find_duplicate_clusters(problems_dir=PROBLEMS_DIR, threshold=DUPLICATE_THRESHOLD):
+    """유사 문제 묶음 보고서 dict (단원별, 묶음마다 대표 제목과 문제 목록)"""
+    index = DuplicateIndex(threshold)
+    chapters = {}
+    problems_by_key = {}
+    skipped = 0
+    for chapter_index, chapter_name, problems in _load_chapters(problems_dir):
+        chapters[chapter_index] = chapter_name
+        for problem in problems:
+            if not problem.get("test_cases") or is_placeholder(problem["test_cases"]):
+                skipped += 1
+                continue
+            key = (chapter_index, problem["id"])
+            problems_by_key[key] = problem
+            index.add(key, problem)
+
+    # 유사한 쌍을 union-find로 묶는다
+    parent = {key: key for key in problems_by_key}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, problem in problems_by_key.items():
+        for other, _ in index.query(problem, exclude=key):
+            root_a, root_b = find(key), find(other)
+            if root_a != root_b:
+                parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    clusters = defaultdict(list)
+    for key in problems_by_key:
+        clusters[find(key)].append(key)
+
+    report_chapters = defaultdict(list)
+    for root, members in clusters.items():
+        if len(members) < 2:
+            continue
+        members.sort()
+        report_chapters[root[0]].append({
+            "size": len(members),
+            "title": problems_by_key[root].get("title", ""),
+            "problems": [{"chapter": chapters[c], "id": pid, "title": problems_by_key[(c, pid)].get("title", "")}
+                         for c, pid in members],
+        })
+
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "threshold": threshold,
+        "indexed": len(problems_by_key),
+        "skipped_placeholders": skipped,
+        "chapters": [
+            {
+                "chapter_index": idx,
+                "chapter_name": chapters[idx],
+                "duplicates": sum(c["size"] for c in report_chapters[idx]),
+                "clusters": sorted(report_chapters[idx], key=lambda c: -c["size"]),
+            }
+            for idx in sorted(chapters)
+        ],
+    }
+
+
+def main():
+    problems_dir = sys.argv[1] if len(sys.argv) > 1 else PROBLEMS_DIR
+    report_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(problems_dir, REPORT_FILENAME)
+
+    report = find_duplicate_clusters(problems_dir)
+    for chapter in report["chapters"]:
+        clusters = chapter["clusters"]
+        print(f"[{chapter['chapter_name']}] 유사 문제 묶음 {len(clusters)}개 ({chapter['duplicates']}문제)")
+        for cluster in clusters[:5]:
+            ids = ", ".join(str(p["id"]) if p["chapter"] == chapter["chapter_name"] else f"{p['chapter']} {p['id']}"
+                            for p in cluster["problems"][:10])
+            more = " ..." if cluster["size"] > 10 else ""
+            print(f"  - {cluster['title']} ({cluster['size']}문제): {ids}{more}")
+    write_json_atomic(report_path, report)
+    print(f"\n색인 {report['indexed']}문제 (빈 템플릿 {report['skipped_placeholders']}문제 제외), 보고서 저장: {report_path}")
+
+if __name__ == "__main__":
+    main()
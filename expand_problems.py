@@ -1,6 +1,7 @@
-import json
 import os
 
+from chapter_io import iter_problems, merge_problems, read_chapter_name
+
 # 단원별 난이도 가이드라인 (generate_problems_gemini.py에서 가져옴)
 DIFFICULTY_GUIDES = {
     "출력": {
@@ -125,20 +126,16 @@ def generate_problem_template(chapter_name, problem_id, difficulty):
     }
 
 def expand_problems_file(filepath, target_count=100):
-    """문제 파일을 target_count개까지 확장"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    """문제 파일을 target_count개까지 확장하고 새로 추가한 문제 수를 반환 (빠진 번호의 템플릿만 끼워 넣고 원자적으로 저장)"""
+    chapter_name = read_chapter_name(filepath)
     
-    chapter_name = data['chapter_name']
-    existing_problems = data['problems']
-    existing_count = len(existing_problems)
+    # 기존 문제 ID 추출 (문제를 하나씩 읽으며 번호만 모음)
+    existing_ids = {p['id'] for p in iter_problems(filepath)}
+    existing_count = len(existing_ids)
     
     if existing_count >= target_count:
         print(f"{filepath}: 이미 {existing_count}개 문제가 있습니다. (목표: {target_count}개)")
-        return
-    
-    # 기존 문제 ID 추출
-    existing_ids = {p['id'] for p in existing_problems}
+        return 0
     
     # 새로운 문제 생성
     new_problems = []
@@ -148,18 +145,11 @@ def expand_problems_file(filepath, target_count=100):
             new_problem = generate_problem_template(chapter_name, i, difficulty)
             new_problems.append(new_problem)
     
-    # 기존 문제와 새 문제 합치기
-    all_problems = existing_problems + new_problems
-    all_problems.sort(key=lambda x: x['id'])
-    
-    # 데이터 업데이트
-    data['problems'] = all_problems
-    
-    # 파일 저장
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 기존 문제 사이에 번호 순서대로 끼워 넣어 저장
+    total_count = merge_problems(filepath, new_problems)
     
-    print(f"{filepath}: {existing_count}개 → {len(all_problems)}개 확장 완료 (새로 추가: {len(new_problems)}개)")
+    print(f"{filepath}: {existing_count}개 → {total_count}개 확장 완료 (새로 추가: {len(new_problems)}개)")
+    return len(new_problems)
 
 def main():
     problems_dir = "problems"
@@ -0,0 +1,71 @@
+"""
+파일 입출력 공용 함수
+
+결과 저장소(results_store.py), 지표 파일(latency_metrics.py), 문제 생성/검증 도구가 함께 쓴다.
+다른 프로젝트 모듈을 불러오지 않으므로 어디서든 순환 import 없이 불러올 수 있다.
+
+- write_json_atomic / replace_file: 임시 파일에 쓰고 fsync 한 뒤 원자적으로 교체
+  (중간에 죽어도 원래 파일은 그대로 남는다)
+- fsync_dir: os.replace로 바뀐 디렉터리 항목을 디스크에 반영
+- read_jsonl: 한 줄에 JSON 값 하나인 파일을 읽는다 (비정상 종료로 잘린 줄은 건너뜀)
+"""
+import json
+import os
+import threading
+import time
+
+
+def write_json_atomic(path, data, indent=2):
+    """임시 파일에 쓴 뒤 원자적으로 교체"""
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    replace_file(tmp_path, path)
+
+
+def replace_file(tmp_path, path):
+    """다 쓴 임시 파일로 path를 원자적으로 교체"""
+    for attempt in range(5):
+        try:
+            os.replace(tmp_path, path)
+            return
+        except PermissionError:
+            # Windows에서 다른 프로세스가 파일을 읽는 중이면 잠시 후 재시도
+            if attempt == 4:
+                raise
+            time.sleep(0.05)
+
+
+def fsync_dir(path):
+    """디렉터리 항목 변경(os.replace)을 디스크에 반영 (지원하지 않는 OS에서는 무시)"""
+    try:
+        fd = os.open(path or ".", os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def read_jsonl(path):
+    """JSONL 파일의 값 목록 (파일이 없으면 빈 목록)"""
+    values = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    values.append(json.loads(line))
+                except ValueError:
+                    # 비정상 종료로 잘린 마지막 줄
+                    continue
+    except OSError:
+        pass
+    return values
@@ -1,7 +1,10 @@
-import json
 import os
 import random
 
+from chapter_io import DEFAULT_SEED, problem_rng, read_chapter_name, update_chapter
+from dedup_index import draw_unique, get_duplicate_index
+from problem_bank import parse_chapter_filename
+
 # 단원별 문제 생성 가이드라인
 PROBLEM_TEMPLATES = {
     "출력": {
@@ -35,8 +38,8 @@ PROBLEM_TEMPLATES = {
     }
 }
 
-def generate_problem_content(chapter_name, problem_id, difficulty):
-    """난이도에 따라 문제 내용 생성"""
+def generate_problem_content(chapter_name, problem_id, difficulty, rng=random):
+    """난이도에 따라 문제 내용 생성 (rng: 무작위 선택에 쓸 난수 생성기)"""
     # 간단한 문제 생성 로직
     if chapter_name == "출력":
         if difficulty == "기초":
@@ -49,11 +52,12 @@ def generate_problem_content(chapter_name, problem_id, difficulty):
                 }
             else:
                 texts = ["Hello", "World", "Python", "Programming", "Test"]
+                text = rng.choice(texts)  # 설명과 기대 출력이 같은 문자열이어야 한다
                 return {
                     "title": f"문자열 출력 {problem_id}",
-                    "description": f"화면에 '{random.choice(texts)}'를 출력하시오.",
+                    "description": f"화면에 '{text}'를 출력하시오.",
                     "default_code": "# 여기에 코드를 작성하세요\n",
-                    "test_cases": [{"input": "", "output": random.choice(texts)}]
+                    "test_cases": [{"input": "", "output": text}]
                 }
         elif difficulty == "중급":
             return {
@@ -78,32 +82,44 @@ def generate_problem_content(chapter_name, problem_id, difficulty):
         "test_cases": [{"input": "", "output": ""}]
     }
 
-def fill_problems_file(filepath):
-    """문제 파일의 빈 템플릿을 채움"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    chapter_name = data['chapter_name']
-    problems = data['problems']
+def fill_problems_file(filepath, seed=DEFAULT_SEED, reject_duplicates=True):
+    """문제 파일의 빈 템플릿을 채우고 채운 문제 수를 반환 (문제를 하나씩 읽고 쓰며, 바뀐 문제가 있을 때만 원자적으로 저장)
+
+    무작위 선택은 (seed, 단원, 문제 번호)로 정해지므로 같은 seed면 항상 같은 문제가 만들어진다.
+    reject_duplicates면 문제 은행에 이미 있는 문제와 거의 같은 문제는 다시 뽑고,
+    끝내 겹치면 빈 템플릿으로 남긴다 (dedup_index.draw_unique).
+    """
+    chapter_name = read_chapter_name(filepath)
+    chapter_index, _ = parse_chapter_filename(filepath) or (None, None)
+    index = get_duplicate_index(os.path.dirname(filepath) or ".") if reject_duplicates else None
+    duplicates = []
     
-    updated_count = 0
-    for problem in problems:
+    def fill(problem):
         # 템플릿 문제인지 확인 (description에 "Gemini API"가 포함되어 있으면)
-        if "Gemini API를 사용하여 생성해야 합니다" in problem.get('description', ''):
-            problem_id = problem['id']
-            difficulty = "기초" if problem_id <= 30 else ("중급" if problem_id <= 70 else "고급")
-            
-            # 실제 문제 내용 생성
-            new_content = generate_problem_content(chapter_name, problem_id, difficulty)
-            problem.update(new_content)
-            updated_count += 1
+        if "Gemini API를 사용하여 생성해야 합니다" not in problem.get('description', ''):
+            return False
+        problem_id = problem['id']
+        difficulty = "기초" if problem_id <= 30 else ("중급" if problem_id <= 70 else "고급")
+        
+        # 실제 문제 내용 생성
+        rng = problem_rng(chapter_name, problem_id, seed)
+        draw = lambda: generate_problem_content(chapter_name, problem_id, difficulty, rng)
+        new_content = draw() if index is None else draw_unique(index, (chapter_index, problem_id), draw)
+        if new_content is None:
+            duplicates.append(problem_id)
+            return False
+        problem.update(new_content)
+        return True
+    
+    updated_count = update_chapter(filepath, fill)
     
     if updated_count > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"{filepath}: {updated_count}개 문제 내용 생성 완료")
     else:
         print(f"{filepath}: 업데이트할 문제가 없습니다.")
+    if duplicates:
+        print(f"{filepath}: 기존 문제와 중복되어 빈 템플릿으로 남긴 문제 {len(duplicates)}개")
+    return updated_count
 
 def main():
     problems_dir = "problems"
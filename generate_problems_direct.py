@@ -2,10 +2,13 @@
 프롬프트 가이드라인에 따라 각 단원별로 100개 문제를 생성하는 스크립트
 기존 문제는 유지하고, 빈 템플릿만 있는 문제들을 실제 문제로 채움
 """
-import json
 import os
 import random
 
+from chapter_io import DEFAULT_SEED, problem_rng, read_chapter_name, update_chapter
+from dedup_index import draw_unique, get_duplicate_index
+from problem_bank import parse_chapter_filename
+
 def get_difficulty(problem_id):
     """문제 번호에 따라 난이도 결정"""
     if problem_id <= 30:
@@ -15,7 +18,7 @@ def get_difficulty(problem_id):
     else:
         return "고급"
 
-def generate_output_problem(problem_id, difficulty):
+def generate_output_problem(problem_id, difficulty, rng=random):
     """출력 단원 문제 생성"""
     if difficulty == "기초":
         patterns = [
@@ -37,7 +40,7 @@ def generate_output_problem(problem_id, difficulty):
             ("복잡한 포맷팅", f"변수 name='User{problem_id}', score={problem_id * 10.5:.1f}, grade='A'일 때, 'User{problem_id}의 점수는 {problem_id * 10.5:.1f}점이며, 등급은 A입니다.'를 출력하시오.", f"name = 'User{problem_id}'\nscore = {problem_id * 10.5}\ngrade = 'A'\n# 여기에 코드를 작성하세요\n"),
         ]
     
-    pattern = random.choice(patterns)
+    pattern = rng.choice(patterns)
     title, desc, code = pattern
     
     # test_cases 생성
@@ -58,7 +61,7 @@ def generate_output_problem(problem_id, difficulty):
         "test_cases": [{"input": "", "output": output}]
     }
 
-def generate_variable_input_problem(problem_id, difficulty):
+def generate_variable_input_problem(problem_id, difficulty, rng=random):
     """변수와 입력 단원 문제 생성"""
     if difficulty == "기초":
         return {
@@ -88,7 +91,7 @@ def generate_variable_input_problem(problem_id, difficulty):
             ]
         }
 
-def generate_operator_problem(problem_id, difficulty):
+def generate_operator_problem(problem_id, difficulty, rng=random):
     """연산자 단원 문제 생성"""
     if difficulty == "기초":
         return {
@@ -112,7 +115,7 @@ def generate_operator_problem(problem_id, difficulty):
             "test_cases": [{"input": "", "output": str((problem_id + problem_id*2) * problem_id*3 - problem_id)}]
         }
 
-def generate_string1_problem(problem_id, difficulty):
+def generate_string1_problem(problem_id, difficulty, rng=random):
     """문자열1 단원 문제 생성"""
     if difficulty == "기초":
         return {
@@ -138,8 +141,8 @@ def generate_string1_problem(problem_id, difficulty):
             ]
         }
 
-def generate_problem_by_chapter(chapter_name, problem_id, difficulty):
-    """단원별로 문제 생성"""
+def generate_problem_by_chapter(chapter_name, problem_id, difficulty, rng=random):
+    """단원별로 문제 생성 (rng: 무작위 선택에 쓸 난수 생성기)"""
     generators = {
         "출력": generate_output_problem,
         "변수와 입력": generate_variable_input_problem,
@@ -149,7 +152,7 @@ def generate_problem_by_chapter(chapter_name, problem_id, difficulty):
     
     generator = generators.get(chapter_name)
     if generator:
-        return generator(problem_id, difficulty)
+        return generator(problem_id, difficulty, rng)
     
     # 기본 템플릿 (다른 단원들은 나중에 Gemini API로 생성)
     return {
@@ -159,33 +162,45 @@ def generate_problem_by_chapter(chapter_name, problem_id, difficulty):
         "test_cases": [{"input": "", "output": ""}]
     }
 
-def fill_problems_file(filepath):
-    """문제 파일의 빈 템플릿을 실제 문제로 채움"""
-    with open(filepath, 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    chapter_name = data['chapter_name']
-    problems = data['problems']
+def fill_problems_file(filepath, seed=DEFAULT_SEED, reject_duplicates=True):
+    """문제 파일의 빈 템플릿을 실제 문제로 채우고 채운 문제 수를 반환 (문제를 하나씩 읽고 쓰며, 바뀐 문제가 있을 때만 원자적으로 저장)
+
+    무작위 선택은 (seed, 단원, 문제 번호)로 정해지므로 같은 seed면 항상 같은 문제가 만들어진다.
+    reject_duplicates면 문제 은행에 이미 있는 문제와 거의 같은 문제는 다시 뽑고,
+    끝내 겹치면 빈 템플릿으로 남긴다 (dedup_index.draw_unique).
+    """
+    chapter_name = read_chapter_name(filepath)
+    chapter_index, _ = parse_chapter_filename(filepath) or (None, None)
+    index = get_duplicate_index(os.path.dirname(filepath) or ".") if reject_duplicates else None
+    duplicates = []
     
-    updated_count = 0
-    for problem in problems:
+    def fill(problem):
         # 템플릿 문제인지 확인
         desc = problem.get('description', '')
-        if "Gemini API를 사용하여 생성해야 합니다" in desc or not desc.strip() or desc == f"{chapter_name} 단원의 {problem.get('id')}번 문제입니다.":
-            problem_id = problem['id']
-            difficulty = get_difficulty(problem_id)
-            
-            # 실제 문제 내용 생성
-            new_content = generate_problem_by_chapter(chapter_name, problem_id, difficulty)
-            problem.update(new_content)
-            updated_count += 1
+        if not ("Gemini API를 사용하여 생성해야 합니다" in desc or not desc.strip() or desc == f"{chapter_name} 단원의 {problem.get('id')}번 문제입니다."):
+            return False
+        problem_id = problem['id']
+        difficulty = get_difficulty(problem_id)
+        
+        # 실제 문제 내용 생성
+        rng = problem_rng(chapter_name, problem_id, seed)
+        draw = lambda: generate_problem_by_chapter(chapter_name, problem_id, difficulty, rng)
+        new_content = draw() if index is None else draw_unique(index, (chapter_index, problem_id), draw)
+        if new_content is None:
+            duplicates.append(problem_id)
+            return False
+        problem.update(new_content)
+        return True
+    
+    updated_count = update_chapter(filepath, fill)
     
     if updated_count > 0:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
         print(f"{filepath}: {updated_count}개 문제 내용 생성 완료")
     else:
         print(f"{filepath}: 업데이트할 문제가 없습니다.")
+    if duplicates:
+        print(f"{filepath}: 기존 문제와 중복되어 빈 템플릿으로 남긴 문제 {len(duplicates)}개")
+    return updated_count
 
 def main():
     problems_dir = "problems"
@@ -2,16 +2,25 @@ import os
 import json
 import time
 import re
-import google.generativeai as genai
+import random
+import sys
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+
+from chapter_io import iter_problems, write_chapter
+from file_io import read_jsonl
+from dedup_index import get_duplicate_index
+from validate_problems import is_placeholder, validate_problems
 
 # Gemini API 설정
 GEMINI_API_KEY = os.getenv('gemini')
-if not GEMINI_API_KEY:
-    raise ValueError("GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
-
-genai.configure(api_key=GEMINI_API_KEY)
-model = genai.GenerativeModel('gemini-3-flash-preview')
+GEMINI_MODEL_NAME = 'gemini-3-flash-preview'
+# GEMINI_FAKE=1 이면 API 대신 로컬 가짜 모델을 사용 (테스트용, API 키 불필요)
+USE_FAKE_MODEL = os.getenv('GEMINI_FAKE', '') not in ('', '0')
 
 # 챕터 정보
 CHAPTERS_INFO = [
@@ -37,9 +46,23 @@ CHAPTERS_INFO = [
 ]
 
 PROBLEMS_DIR = "problems"
+JOURNAL_DIR = os.path.join(PROBLEMS_DIR, ".journal")  # 생성 중인 단원의 체크포인트
+GENERATION_METRICS_FILE = os.path.join(PROBLEMS_DIR, "generation_metrics.jsonl")  # API 호출별 비용 기록
+TITLE_SUMMARY_SIZE = 30  # 프롬프트에 넣는 최근 문제 제목 수 (단원이 커져도 프롬프트 크기 고정)
+TITLE_SUMMARY_MAX_CHARS = 40  # 제목 하나당 최대 글자 수
 
-# API 호출 제한 설정 (무료 티어: 분당 5개)
-MIN_REQUEST_INTERVAL = 15  # 최소 15초 간격 (분당 4개 이하로 제한)
+# API 호출 제한 설정 (기본값은 무료 티어: 분당 5개 -> 4개 이하로 제한)
+# 할당량이 더 크면 환경변수로 올린다
+REQUESTS_PER_MINUTE = float(os.getenv('GEMINI_RPM', 4))
+TOKENS_PER_MINUTE = float(os.getenv('GEMINI_TPM', 250000))
+MAX_CONCURRENT_REQUESTS = int(os.getenv('GEMINI_CONCURRENCY', 4))
+BATCH_SIZE = int(os.getenv('GEMINI_BATCH_SIZE', 5))  # 요청 한 번에 생성할 문제 수 (1이면 한 문제씩)
+# 생성된 정답 코드를 샌드박스에서 실행해 테스트 케이스를 검증 (0이면 끔)
+VALIDATE_GENERATED = os.getenv('GEMINI_VALIDATE', '1') not in ('', '0')
+# 문제 은행에 이미 있는 문제와 거의 같은 문제는 저장하지 않고 다시 요청 (0이면 끔)
+REJECT_DUPLICATES = os.getenv('GEMINI_DEDUP', '1') not in ('', '0')
+EXPECTED_OUTPUT_TOKENS = 800  # 응답 토큰 수 추정치 (실제 사용량은 응답을 받은 뒤 정산)
+MIN_REQUEST_INTERVAL = 15  # 에러 메시지에 대기 시간이 없을 때 기본 대기 (초)
 MAX_RETRIES = 3  # 최대 재시도 횟수
 
 def parse_retry_delay(error_message):
@@ -50,6 +73,246 @@ def parse_retry_delay(error_message):
         return float(match.group(1))
     return MIN_REQUEST_INTERVAL  # 기본값
 
+def is_rate_limit_error(error_message):
+    lowered = error_message.lower()
+    return "429" in error_message or "quota" in lowered or "rate limit" in lowered
+
+def estimate_tokens(text):
+    """프롬프트 토큰 수 대략 추정 (한글 위주 텍스트 기준 2글자당 1토큰)"""
+    return len(text) // 2 + 1
+
+# ==========================================
+# 호출 속도 제한 (토큰 버킷)
+# ==========================================
+
+class _Bucket:
+    def __init__(self, per_minute, capacity):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount):
+        # 버킷보다 큰 요청은 가득 찼을 때 통과시키고 잔량을 음수(빚)로 남긴다
+        needed = min(amount, self.capacity)
+        return 0.0 if self.level >= needed else (needed - self.level) / self.rate
+
+
+class RateLimiter:
+    """분당 요청 수/토큰 수 토큰 버킷 (생성 스레드 전체가 공유)
+
+    acquire()는 두 버킷 모두 여유가 생길 때까지 기다린다.
+    429 응답을 받으면 pause()로 버킷 전체를 멈춰 모든 요청이 함께 기다린다.
+    """
+
+    def __init__(self, requests_per_minute=REQUESTS_PER_MINUTE, tokens_per_minute=TOKENS_PER_MINUTE):
+        # 요청은 한 번에 하나씩 고르게 흘려보내고, 토큰은 10초 분량까지 몰아 쓸 수 있다
+        self._requests = _Bucket(requests_per_minute, 1)
+        self._tokens = _Bucket(tokens_per_minute, tokens_per_minute / 6)
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens):
+        with self._cond:
+            while True:
+                now = time.monotonic()
+                self._requests.refill(now)
+                self._tokens.refill(now)
+                wait = max(self._paused_until - now,
+                           self._requests.wait_time(1),
+                           self._tokens.wait_time(tokens))
+                if wait <= 0:
+                    self._requests.level -= 1
+                    self._tokens.level -= tokens
+                    return
+                self._cond.wait(wait)
+
+    def settle(self, reserved_tokens, used_tokens):
+        """추정치로 예약한 토큰을 실제 사용량으로 정산"""
+        if used_tokens is None:
+            return
+        with self._cond:
+            self._tokens.level -= used_tokens - reserved_tokens
+            self._cond.notify_all()
+
+    def pause(self, seconds):
+        """seconds 동안 모든 요청을 멈춘다 (429 retry 안내 반영)"""
+        with self._cond:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._requests.refill(now)
+            self._requests.level = min(self._requests.level, 0)
+
+
+_limiter = None
+_limiter_lock = threading.Lock()
+
+def get_rate_limiter():
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+# ==========================================
+# 생성 비용 기록
+# ==========================================
+
+class GenerationMetrics:
+    """API 호출마다 프롬프트 크기/토큰/지연 시간/재시도를 metrics 파일(JSONL)에 한 줄씩 기록"""
+
+    def __init__(self, path=GENERATION_METRICS_FILE):
+        self.path = path
+        self.entries = []  # 이 실행에서 기록한 항목 (단원 요약 출력용)
+        self._lock = threading.Lock()
+
+    def record(self, **entry):
+        entry = {"time": datetime.now().isoformat(timespec="seconds"), **entry}
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with self._lock:
+            self.entries.append(entry)
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+def summarize_metrics(entries):
+    """metrics 기록을 단원별로 합산 {단원: {...}}"""
+    summary = {}
+    for entry in entries:
+        chapter = summary.setdefault(entry.get("chapter"), {
+            "calls": 0, "retries": 0, "rate_limited": 0, "errors": 0, "problems": 0,
+            "prompt_chars": 0, "prompt_tokens": 0, "output_tokens": 0, "cached_tokens": 0, "latency": 0.0,
+        })
+        chapter["calls"] += 1
+        chapter["retries"] += entry.get("attempt", 1) > 1
+        chapter["rate_limited"] += entry.get("status") == "rate_limited"
+        chapter["errors"] += entry.get("status") == "error"
+        chapter["problems"] += entry.get("parsed", 0)
+        chapter["prompt_chars"] += entry.get("prompt_chars", 0)
+        chapter["prompt_tokens"] += entry.get("prompt_tokens") or entry.get("prompt_tokens_estimate", 0)
+        chapter["output_tokens"] += entry.get("output_tokens") or 0
+        chapter["cached_tokens"] += entry.get("cached_tokens") or 0
+        chapter["latency"] += entry.get("latency", 0.0)
+    return summary
+
+
+def print_metrics_summary(summary):
+    for chapter, m in summary.items():
+        per_problem = m["prompt_tokens"] / m["problems"] if m["problems"] else 0
+        print(f"[{chapter}] 호출 {m['calls']}회 (재시도 {m['retries']}, 429 {m['rate_limited']}, 에러 {m['errors']}), "
+              f"문제 {m['problems']}개, 프롬프트 {m['prompt_chars']:,}자/{m['prompt_tokens']:,}토큰 "
+              f"(문제당 {per_problem:,.0f}, 캐시 {m['cached_tokens']:,}), 응답 {m['output_tokens']:,}토큰, "
+              f"평균 지연 {m['latency'] / m['calls']:.1f}초")
+
+
+_metrics = None
+_metrics_lock = threading.Lock()
+
+def get_generation_metrics():
+    global _metrics
+    with _metrics_lock:
+        if _metrics is None:
+            _metrics = GenerationMetrics()
+        return _metrics
+
+# ==========================================
+# 모델
+# ==========================================
+
+class FakeModel:
+    """API 없이 generate_content()를 흉내 내는 로컬 모델 (테스트용)
+
+    GEMINI_FAKE_LATENCY 초 기다린 뒤 프롬프트의 문제 번호로 만든 JSON 문제를 돌려주고
+    (문제 번호가 여러 개면 JSON 배열), GEMINI_FAKE_429_RATE 비율로 "retry in Xs" 안내가 담긴
+    429 에러를, GEMINI_FAKE_BAD_RATE 비율로 형식이 틀린 문제 항목을, GEMINI_FAKE_WRONG_RATE
+    비율로 정답 코드와 맞지 않는 기대 출력을 낸다.
+    """
+
+    def __init__(self, latency=None, error_rate=None, bad_rate=None, retry_delay=1.0, seed=None):
+        self.latency = float(os.getenv('GEMINI_FAKE_LATENCY', 0.2)) if latency is None else latency
+        self.error_rate = float(os.getenv('GEMINI_FAKE_429_RATE', 0)) if error_rate is None else error_rate
+        self.bad_rate = float(os.getenv('GEMINI_FAKE_BAD_RATE', 0)) if bad_rate is None else bad_rate
+        self.wrong_rate = float(os.getenv('GEMINI_FAKE_WRONG_RATE', 0))
+        self.retry_delay = retry_delay
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    _WORDS = ["사과", "버스", "도서관", "주차장", "시험", "체육관", "택배", "우산", "기차", "카페",
+              "은행", "학급", "텃밭", "공연", "수족관", "편의점", "캠핑", "자전거", "박물관", "식당"]
+
+    def _topic(self, problem_id):
+        # 문제마다 다른 단어 조합 (숫자만 다른 문제는 중복으로 걸러지므로)
+        return random.Random(problem_id).sample(self._WORDS, 6)
+
+    def generate_content(self, prompt):
+        with self._lock:
+            self.calls += 1
+            rate_limited = self._random.random() < self.error_rate
+        time.sleep(self.latency)
+        if rate_limited:
+            raise RuntimeError(f"429 Resource has been exhausted (e.g. check quota). "
+                               f"Please retry in {self.retry_delay}s.")
+        chapter = re.search(r"단원: (.+)", prompt)
+        chapter = chapter.group(1).strip() if chapter else "단원"
+        problem_ids = [int(pid) for pid in re.findall(r"문제 번호: (\d+)", prompt)] or [0]
+        problems = []
+        for problem_id in problem_ids:
+            with self._lock:
+                bad = self._random.random() < self.bad_rate
+                wrong = self._random.random() < self.wrong_rate
+            problems.append({
+                "id": problem_id,
+                "title": f"{chapter} 연습 {problem_id}",
+                "description": f"정수 두 개를 입력받아 합을 출력하세요. 상황: {' '.join(self._topic(problem_id))}",
+                "default_code": "# 여기에 코드를 작성하세요\n",
+                "reference_solution": "a, b = map(int, input().split())\nprint(a + b)\n",
+                "test_cases": "잘못된 형식" if bad else [
+                    {"input": f"{problem_id} {k}", "output": str(problem_id + k + wrong)} for k in range(1, 4)
+                ],
+            })
+        data = problems if len(problems) > 1 else problems[0]
+        text = "```json\n" + json.dumps(data, ensure_ascii=False, indent=2) + "\n```"
+        usage = SimpleNamespace(prompt_token_count=estimate_tokens(prompt), candidates_token_count=estimate_tokens(text),
+                                total_token_count=estimate_tokens(prompt) + estimate_tokens(text))
+        return SimpleNamespace(text=text, usage_metadata=usage)
+
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    """생성 모델 (처음 호출할 때 API를 설정, GEMINI_FAKE=1 이면 FakeModel)"""
+    global _model
+    with _model_lock:
+        if _model is None:
+            if USE_FAKE_MODEL:
+                _model = FakeModel()
+            else:
+                import google.generativeai as genai
+                if not GEMINI_API_KEY:
+                    raise ValueError("GEMINI_API_KEY 환경변수가 설정되지 않았습니다.")
+                genai.configure(api_key=GEMINI_API_KEY)
+                _model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+        return _model
+
+def _usage(response):
+    """응답의 토큰 사용량 {"prompt", "output", "cached", "total"} (정보가 없으면 None)"""
+    usage = getattr(response, "usage_metadata", None)
+    if usage is None:
+        return {}
+    return {
+        "prompt": getattr(usage, "prompt_token_count", None),
+        "output": getattr(usage, "candidates_token_count", None),
+        "cached": getattr(usage, "cached_content_token_count", None),
+        "total": getattr(usage, "total_token_count", None),
+    }
+
 def get_difficulty_level(problem_id, total_problems):
     """문제 번호에 따라 난이도 결정"""
     if problem_id <= total_problems * 0.3:
@@ -59,71 +322,74 @@ def get_difficulty_level(problem_id, total_problems):
     else:
         return "고급"
 
-def generate_problem_with_gemini(chapter_name, problem_id, existing_problems, retry_count=0):
-    """Gemini API를 사용하여 문제를 생성"""
-    
-    # 단원별 난이도 가이드라인
-    difficulty_guides = {
-        "출력": {
-            "기초": "print() 함수 사용, 간단한 문자열 출력",
-            "중급": "여러 값 출력, sep/end 파라미터 사용, 포맷팅",
-            "고급": "복잡한 포맷팅, 정렬, 서식 문자 활용"
-        },
-        "변수와 입력": {
-            "기초": "변수 선언, 기본 자료형, input() 사용",
-            "중급": "여러 입력 받기, 타입 변환, 연산과 함께 사용",
-            "고급": "입력 파싱, 공백/줄바꿈 처리, 복잡한 변환"
-        },
-        "연산자": {
-            "기초": "사칙연산, 기본 연산자",
-            "중급": "복합 연산자, 비교 연산, 논리 연산",
-            "고급": "복잡한 수식, 우선순위, 실수 연산 정밀도"
-        },
-        "문자열1": {
-            "기초": "문자열 생성, 인덱싱, 기본 슬라이싱",
-            "중급": "문자열 메서드, 포맷팅(format, f-string), 연결",
-            "고급": "서식 문자 활용, 복잡한 포맷팅, 입력 파싱과 출력 포맷팅"
-        },
-        "문자열 2": {
-            "기초": "문자열 메서드 기본 사용",
-            "중급": "문자열 검색, 치환, 분할",
-            "고급": "정규표현식 개념, 복잡한 문자열 처리"
-        },
-        "리스트 1": {
-            "기초": "리스트 생성, 인덱싱, 기본 조작",
-            "중급": "리스트 메서드, 슬라이싱, 반복문과 함께",
-            "고급": "리스트 컴프리헨션, 중첩 리스트, 복잡한 조작"
-        },
-        "선택제어문": {
-            "기초": "if-else 기본, 단순 조건",
-            "중급": "elif 사용, 중첩 if, 복합 조건",
-            "고급": "복잡한 논리, 다중 조건, 실용적 문제"
-        },
-        "반복제어문 1": {
-            "기초": "for 기본, range() 사용",
-            "중급": "중첩 반복, 조건과 함께",
-            "고급": "복잡한 패턴, 알고리즘 기초"
-        },
-        "반복제어문 2": {
-            "기초": "while 기본, 조건 반복",
-            "중급": "break/continue, 중첩 while",
-            "고급": "복잡한 반복 제어, 실용적 문제"
-        },
-        "함수 1": {
-            "기초": "함수 정의, 기본 매개변수",
-            "중급": "반환값, 여러 매개변수",
-            "고급": "기본값 매개변수, 가변 인자"
-        }
+def fallback_problem(chapter_name, problem_id):
+    """생성에 실패한 문제 자리에 넣는 기본 템플릿"""
+    return {
+        "id": problem_id,
+        "title": f"{chapter_name} 문제 {problem_id}",
+        "description": f"{chapter_name} 단원의 {problem_id}번 문제입니다.",
+        "default_code": "# 여기에 코드를 작성하세요\n",
+        "test_cases": [{"input": "", "output": ""}]
     }
-    
-    total_problems = 100  # 각 단원당 100문제
-    difficulty = get_difficulty_level(problem_id, total_problems)
-    guide = difficulty_guides.get(chapter_name, {}).get(difficulty, "해당 단원의 적절한 난이도 문제")
-    
-    # 단원별 예시 문제
-    example_problems = {
-        "문자열1": {
-            "중급": '''예시 문제:
+
+# 단원별 난이도 가이드라인
+DIFFICULTY_GUIDES = {
+    "출력": {
+        "기초": "print() 함수 사용, 간단한 문자열 출력",
+        "중급": "여러 값 출력, sep/end 파라미터 사용, 포맷팅",
+        "고급": "복잡한 포맷팅, 정렬, 서식 문자 활용"
+    },
+    "변수와 입력": {
+        "기초": "변수 선언, 기본 자료형, input() 사용",
+        "중급": "여러 입력 받기, 타입 변환, 연산과 함께 사용",
+        "고급": "입력 파싱, 공백/줄바꿈 처리, 복잡한 변환"
+    },
+    "연산자": {
+        "기초": "사칙연산, 기본 연산자",
+        "중급": "복합 연산자, 비교 연산, 논리 연산",
+        "고급": "복잡한 수식, 우선순위, 실수 연산 정밀도"
+    },
+    "문자열1": {
+        "기초": "문자열 생성, 인덱싱, 기본 슬라이싱",
+        "중급": "문자열 메서드, 포맷팅(format, f-string), 연결",
+        "고급": "서식 문자 활용, 복잡한 포맷팅, 입력 파싱과 출력 포맷팅"
+    },
+    "문자열 2": {
+        "기초": "문자열 메서드 기본 사용",
+        "중급": "문자열 검색, 치환, 분할",
+        "고급": "정규표현식 개념, 복잡한 문자열 처리"
+    },
+    "리스트 1": {
+        "기초": "리스트 생성, 인덱싱, 기본 조작",
+        "중급": "리스트 메서드, 슬라이싱, 반복문과 함께",
+        "고급": "리스트 컴프리헨션, 중첩 리스트, 복잡한 조작"
+    },
+    "선택제어문": {
+        "기초": "if-else 기본, 단순 조건",
+        "중급": "elif 사용, 중첩 if, 복합 조건",
+        "고급": "복잡한 논리, 다중 조건, 실용적 문제"
+    },
+    "반복제어문 1": {
+        "기초": "for 기본, range() 사용",
+        "중급": "중첩 반복, 조건과 함께",
+        "고급": "복잡한 패턴, 알고리즘 기초"
+    },
+    "반복제어문 2": {
+        "기초": "while 기본, 조건 반복",
+        "중급": "break/continue, 중첩 while",
+        "고급": "복잡한 반복 제어, 실용적 문제"
+    },
+    "함수 1": {
+        "기초": "함수 정의, 기본 매개변수",
+        "중급": "반환값, 여러 매개변수",
+        "고급": "기본값 매개변수, 가변 인자"
+    }
+}
+
+# 단원별 예시 문제
+EXAMPLE_PROBLEMS = {
+    "문자열1": {
+        "중급": '''예시 문제:
 이름과 키, 몸무게를 입력 받아 서식 문자를 사용하여 다음과 같이 출력하는 프로그램을 작성하라.
 
 입력: "창호 170 68.47"
@@ -133,51 +399,68 @@ def generate_problem_with_gemini(chapter_name, problem_id, existing_problems, re
 - input().split()으로 여러 값 입력받기
 - 서식 문자(format, f-string) 사용
 - 실수 포맷팅 (68.47 -> 68.5) 필요''',
-            "고급": "서식 문자를 활용한 복잡한 출력 포맷팅, 입력 파싱, 타입 변환, 실수 포맷팅 등을 포함한 실용적 문제"
-        },
-        "변수와 입력": {
-            "중급": "여러 값을 한 줄에 입력받아 변수에 저장하고 처리하는 문제",
-            "고급": "복잡한 입력 형식 파싱, 타입 변환, 검증이 필요한 문제"
-        }
+        "고급": "서식 문자를 활용한 복잡한 출력 포맷팅, 입력 파싱, 타입 변환, 실수 포맷팅 등을 포함한 실용적 문제"
+    },
+    "변수와 입력": {
+        "중급": "여러 값을 한 줄에 입력받아 변수에 저장하고 처리하는 문제",
+        "고급": "복잡한 입력 형식 파싱, 타입 변환, 검증이 필요한 문제"
     }
-    
-    example = ""
-    if chapter_name in example_problems and difficulty in example_problems[chapter_name]:
-        example = f"\n\n참고 예시:\n{example_problems[chapter_name][difficulty]}"
-    
-    prompt = f"""
+}
+
+@lru_cache(maxsize=None)
+def chapter_prompt_prefix(chapter_name):
+    """단원마다 변하지 않는 프롬프트 앞부분 (단원당 한 번만 만들어 재사용)
+
+    요청마다 달라지는 부분은 build_prompt가 뒤에 붙이므로, 같은 단원의 요청은
+    앞부분이 글자 단위로 같아 모델 쪽 프롬프트 캐시도 그대로 적중한다.
+    """
+    guides = DIFFICULTY_GUIDES.get(chapter_name, {})
+    guide_lines = "\n".join(
+        f"- {difficulty}: {guides.get(difficulty, '해당 단원의 적절한 난이도 문제')}"
+        for difficulty in ("기초", "중급", "고급")
+    )
+    example = "".join(
+        f"\n\n참고 예시 ({difficulty}):\n{text}"
+        for difficulty, text in EXAMPLE_PROBLEMS.get(chapter_name, {}).items()
+    )
+    return f"""
 파이썬 프로그래밍 문제를 생성해주세요. JUNGOL, 백준 온라인 저지 등의 실제 코딩 테스트 문제 수준을 참고하세요.
 
 단원: {chapter_name}
-문제 번호: {problem_id}
-난이도: {difficulty}
-난이도 가이드: {guide}
-{example}
+
+난이도 가이드:
+{guide_lines}{example}
 
 요구사항:
-1. {difficulty} 수준의 파이썬 문제를 만들어주세요
+1. 각 문제에 지정된 난이도 수준의 파이썬 문제를 만들어주세요
 2. 문제 설명은 명확하고 이해하기 쉽게 작성해주세요
 3. 입력이 필요한 경우 입력 예시를 제공해주세요 (공백으로 구분된 여러 값도 가능)
 4. 출력 예시를 정확히 제공해주세요 (공백, 줄바꿈 포함)
 5. 기본 코드 템플릿은 빈 상태로 제공해주세요 (정답 코드 없이)
 6. 실용적이고 실제 코딩 테스트에서 나올 수 있는 문제를 만들어주세요
+7. 이미 만든 문제 제목 목록이 있으면 그와 겹치지 않는 새로운 문제를 만들어주세요
+8. reference_solution에는 모든 test_cases를 통과하는 정답 코드를 넣어주세요 (input()으로 입력, print()로 출력)
 
 난이도별 특징:
 - 기초: 기본 문법, 단순한 입출력, print()만 사용
 - 중급: 여러 개념 조합, 입력 파싱(input().split()), 포맷팅(format/f-string), 타입 변환 필요
 - 고급: 복잡한 로직, 실수 처리 및 포맷팅, 서식 문자 활용, 실용적 문제
 
-응답 형식 (JSON):
-{{
-  "title": "문제 제목",
-  "description": "문제 설명 (\\n으로 줄바꿈, 입력/출력 형식 명시)",
-  "default_code": "# 여기에 코드를 작성하세요\\n",
-  "test_cases": [
-    {{"input": "입력값1", "output": "출력값1"}},
-    {{"input": "입력값2", "output": "출력값2"}},
-    {{"input": "입력값3", "output": "출력값3"}}
-  ]
-}}
+응답 형식 (JSON 배열, 아래 요청한 문제마다 하나씩 순서대로, id에는 요청한 문제 번호를 그대로):
+[
+  {{
+    "id": 문제 번호,
+    "title": "문제 제목",
+    "description": "문제 설명 (\\n으로 줄바꿈, 입력/출력 형식 명시)",
+    "default_code": "# 여기에 코드를 작성하세요\\n",
+    "reference_solution": "정답 코드 (\\n으로 줄바꿈)",
+    "test_cases": [
+      {{"input": "입력값1", "output": "출력값1"}},
+      {{"input": "입력값2", "output": "출력값2"}},
+      {{"input": "입력값3", "output": "출력값3"}}
+    ]
+  }}
+]
 
 중요:
 - test_cases는 최소 3개 이상 제공해주세요 (다양한 케이스)
@@ -189,56 +472,257 @@ def generate_problem_with_gemini(chapter_name, problem_id, existing_problems, re
 - 중급 이상 문제는 입력 파싱, 타입 변환, 포맷팅 등이 포함되어야 합니다
 - JSON 형식만 반환하고 다른 설명은 추가하지 마세요
 """
+
+class TitleSummary:
+    """이미 만든 문제 제목의 최근 TITLE_SUMMARY_SIZE개만 유지하는 슬라이딩 요약 (스레드 공유)"""
+
+    def __init__(self, problems=(), size=TITLE_SUMMARY_SIZE):
+        self._titles = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.total = 0
+        for problem in problems:
+            self.add(problem)
+
+    def add(self, problem):
+        title = str(problem.get("title", "")).strip()
+        if not title:
+            return
+        with self._lock:
+            self._titles.append(title[:TITLE_SUMMARY_MAX_CHARS])
+            self.total += 1
+
+    def render(self):
+        with self._lock:
+            if not self._titles:
+                return ""
+            titles = list(self._titles)
+            total = self.total
+        lines = "\n".join(f"- {title}" for title in titles)
+        return f"\n이미 만든 문제 제목 (전체 {total}개 중 최근 {len(titles)}개):\n{lines}\n"
+
+def build_prompt(chapter_name, problem_ids, titles=None):
+    """문제 생성 프롬프트 = 단원별 고정 앞부분 + 이번 요청의 문제 번호/난이도 + 최근 제목 요약"""
+    lines = "\n".join(
+        f"- 문제 번호: {pid} / 난이도: {get_difficulty_level(pid, 100)}"  # 각 단원당 100문제 기준
+        for pid in problem_ids
+    )
+    summary = titles.render() if titles is not None else ""
+    return f"""{chapter_prompt_prefix(chapter_name)}{summary}
+생성할 문제 ({len(problem_ids)}개):
+{lines}
+"""
+
+def _extract_json(response_text):
+    """응답에서 JSON 추출 (마크다운 코드 블록 제거)"""
+    response_text = response_text.strip()
+    if "```json" in response_text:
+        response_text = response_text.split("```json")[1].split("```")[0].strip()
+    elif "```" in response_text:
+        response_text = response_text.split("```")[1].split("```")[0].strip()
+    return json.loads(response_text)
+
+def _to_problem(chapter_name, problem_id, problem_data):
+    """응답 항목 하나를 문제 dict로 변환 (형식이 맞지 않으면 None)"""
+    if not isinstance(problem_data, dict):
+        return None
+    test_cases = problem_data.get("test_cases", [{"input": "", "output": ""}])
+    if not isinstance(test_cases, list) or not all(
+            isinstance(tc, dict) and "input" in tc and "output" in tc for tc in test_cases):
+        return None
+    problem = {
+        "id": problem_id,
+        "title": problem_data.get("title", f"{chapter_name} 문제 {problem_id}"),
+        "description": problem_data.get("description", ""),
+        "default_code": problem_data.get("default_code", "# 여기에 코드를 작성하세요\n"),
+        "test_cases": test_cases
+    }
+    if isinstance(problem_data.get("reference_solution"), str):
+        problem["reference_solution"] = problem_data["reference_solution"]
+    return problem
+
+def parse_problems_response(response_text, chapter_name, problem_ids):
+    """응답을 문제 번호별로 나눠 {문제 번호: 문제} 반환 (형식이 맞는 항목만)"""
+    data = _extract_json(response_text)
+    if isinstance(data, dict) and len(problem_ids) == 1:
+        problem = _to_problem(chapter_name, problem_ids[0], data)
+        return {problem_ids[0]: problem} if problem else {}
+    if not isinstance(data, list):
+        return {}
     
-    try:
-        response = model.generate_content(prompt)
-        response_text = response.text.strip()
-        
-        # JSON 추출 (마크다운 코드 블록 제거)
-        if "```json" in response_text:
-            response_text = response_text.split("```json")[1].split("```")[0].strip()
-        elif "```" in response_text:
-            response_text = response_text.split("```")[1].split("```")[0].strip()
-        
-        problem_data = json.loads(response_text)
+    parsed = {}
+    for index, item in enumerate(data):
+        # id가 없거나 요청하지 않은 번호면 순서로 대응
+        problem_id = item.get("id") if isinstance(item, dict) else None
+        if problem_id not in problem_ids and index < len(problem_ids):
+            problem_id = problem_ids[index]
+        if problem_id in problem_ids and problem_id not in parsed:
+            problem = _to_problem(chapter_name, problem_id, item)
+            if problem:
+                parsed[problem_id] = problem
+    return parsed
+
+def generate_problem_with_gemini(chapter_name, problem_id, existing_problems, limiter=None):
+    """Gemini API를 사용하여 문제를 생성 (실패하면 기본 템플릿)"""
+    problem = request_problems(chapter_name, [problem_id], existing_problems, limiter).get(problem_id)
+    return problem if problem is not None else fallback_problem(chapter_name, problem_id)
+
+def request_problems(chapter_name, problem_ids, existing_problems, limiter=None, metrics=None,
+                     validate=VALIDATE_GENERATED, chapter_index=None, dedup_index=None):
+    """Gemini API로 문제 여러 개를 한 번에 요청 {문제 번호: 문제}
+
+    existing_problems는 이미 만든 문제 목록 또는 TitleSummary (최근 제목만 프롬프트에 넣음).
+    limiter로 호출 속도를 제한하고, 429면 버킷 전체를 멈춘 뒤 재시도한다.
+    응답에서 형식이 맞지 않은 문제만 모아 다시 요청하며, 끝내 실패한 번호는 결과에서 빠진다.
+    validate=True 이면 정답 코드를 샌드박스에서 실행해 테스트 케이스와 맞지 않는 문제도 다시 요청하고,
+    재시도 후에도 맞지 않으면 마지막 문제에 "validation_status"를 붙여 검토 대상으로 남긴다.
+    dedup_index를 주면 색인에 이미 있는 문제와 거의 같은 문제를 버리고 다시 요청하며,
+    받아들인 문제는 (chapter_index, 문제 번호)로 색인에 추가한다.
+    호출마다 프롬프트 크기/토큰/지연 시간/재시도 횟수를 metrics에 기록한다.
+    """
+    limiter = limiter or get_rate_limiter()
+    metrics = metrics or get_generation_metrics()
+    titles = existing_problems if isinstance(existing_problems, TitleSummary) else TitleSummary(existing_problems or ())
+    problems = {}
+    flagged = {}  # 검증에 실패한 마지막 버전
+    remaining = list(problem_ids)
+    attempt = 0
+    while remaining and attempt <= MAX_RETRIES:
+        attempt += 1
+        prompt = build_prompt(chapter_name, remaining, titles)
+        reserved_tokens = estimate_tokens(prompt) + EXPECTED_OUTPUT_TOKENS * len(remaining)
+        limiter.acquire(reserved_tokens)
+        entry = {
+            "chapter": chapter_name,
+            "problem_ids": remaining,
+            "attempt": attempt,
+            "prompt_chars": len(prompt),
+            "prefix_chars": len(chapter_prompt_prefix(chapter_name)),
+            "prompt_tokens_estimate": estimate_tokens(prompt),
+        }
+        started = time.perf_counter()
+        try:
+            response = get_model().generate_content(prompt)
+            usage = _usage(response)
+            limiter.settle(reserved_tokens, usage.get("total"))
+            entry.update(prompt_tokens=usage.get("prompt"), output_tokens=usage.get("output"),
+                         cached_tokens=usage.get("cached"))
+        except Exception as e:
+            error_str = str(e)
+            rate_limited = is_rate_limit_error(error_str)
+            metrics.record(**entry, latency=round(time.perf_counter() - started, 3),
+                           status="rate_limited" if rate_limited else "error", parsed=0)
+            
+            # 429 에러 (할당량 초과) 처리: 공유 버킷을 멈춰 다른 요청도 함께 기다리게 한다
+            if rate_limited:
+                if attempt <= MAX_RETRIES:
+                    retry_delay = parse_retry_delay(error_str)
+                    print(f"\n⚠️ 할당량 초과 (문제 {_format_ids(remaining)}). {retry_delay:.1f}초 후 재시도... (시도 {attempt}/{MAX_RETRIES})")
+                    limiter.pause(retry_delay + 1)  # 여유를 두고 1초 추가
+                    continue
+                print(f"\n❌ 최대 재시도 횟수 초과 (문제 {_format_ids(remaining)}). 기본 템플릿 사용")
+            else:
+                print(f"\n⚠️ 에러 발생 (문제 {_format_ids(remaining)}): {error_str[:100]}...")
+            break
         
-        # 기본 구조 보장
-        if "test_cases" not in problem_data:
-            problem_data["test_cases"] = [{"input": "", "output": ""}]
+        latency = round(time.perf_counter() - started, 3)
+        try:
+            parsed = parse_problems_response(response.text, chapter_name, remaining)
+        except ValueError:
+            # 응답 전체가 JSON으로 읽히지 않으면(잘렸거나 깨짐) 남은 문제 모두 형식 오류로 보고 다시 요청
+            parsed = {}
         
-        return {
-            "id": problem_id,
-            "title": problem_data.get("title", f"{chapter_name} 문제 {problem_id}"),
-            "description": problem_data.get("description", ""),
-            "default_code": problem_data.get("default_code", "# 여기에 코드를 작성하세요\n"),
-            "test_cases": problem_data.get("test_cases", [])
-        }
-    except Exception as e:
-        error_str = str(e)
+        rejected = []
+        if validate and parsed:
+            for report in validate_problems(list(parsed.values())):
+                if report["status"] != "ok":
+                    problem = parsed.pop(report["id"])
+                    problem["validation_status"] = report["status"]
+                    flagged[report["id"]] = problem
+                    rejected.append(report["id"])
         
-        # 429 에러 (할당량 초과) 처리
-        if "429" in error_str or "quota" in error_str.lower() or "rate limit" in error_str.lower():
-            if retry_count < MAX_RETRIES:
-                retry_delay = parse_retry_delay(error_str)
-                print(f"\n⚠️ 할당량 초과 (문제 {problem_id}). {retry_delay:.1f}초 후 재시도... (시도 {retry_count + 1}/{MAX_RETRIES})")
-                time.sleep(retry_delay + 1)  # 여유를 두고 1초 추가
-                return generate_problem_with_gemini(chapter_name, problem_id, existing_problems, retry_count + 1)
-            else:
-                print(f"\n❌ 최대 재시도 횟수 초과 (문제 {problem_id}). 기본 템플릿 사용")
-        else:
-            print(f"\n⚠️ 에러 발생 (문제 {problem_id}): {error_str[:100]}...")
+        duplicates = []
+        if dedup_index is not None:
+            for problem_id in list(parsed):
+                key = (chapter_index, problem_id)
+                if dedup_index.add_if_unique(key, parsed[problem_id], exclude=key):
+                    del parsed[problem_id]
+                    duplicates.append(problem_id)
         
-        # 기본 템플릿 반환
-        return {
-            "id": problem_id,
-            "title": f"{chapter_name} 문제 {problem_id}",
-            "description": f"{chapter_name} 단원의 {problem_id}번 문제입니다.",
-            "default_code": "# 여기에 코드를 작성하세요\n",
-            "test_cases": [{"input": "", "output": ""}]
-        }
+        metrics.record(**entry, latency=latency, status="ok" if len(parsed) == len(remaining) else "partial",
+                       parsed=len(parsed), rejected=len(rejected), duplicates=len(duplicates))
+        for problem_id in remaining:
+            if problem_id in parsed:
+                titles.add(parsed[problem_id])
+        problems.update(parsed)
+        remaining = [pid for pid in remaining if pid not in parsed]
+        if remaining and attempt <= MAX_RETRIES:
+            if rejected:
+                print(f"\n⚠️ 정답 코드 검증 실패 (문제 {_format_ids(rejected)}). 다시 요청...")
+            if duplicates:
+                print(f"\n⚠️ 기존 문제와 중복 (문제 {_format_ids(duplicates)}). 다시 요청...")
+            malformed = [pid for pid in remaining if pid not in rejected and pid not in duplicates]
+            if malformed:
+                print(f"\n⚠️ 응답 형식 오류 (문제 {_format_ids(malformed)}). 해당 문제만 다시 요청...")
+    
+    # 끝내 검증을 통과하지 못한 문제는 검토 대상으로 표시해 남긴다
+    for problem_id in remaining:
+        if problem_id in flagged:
+            print(f"\n❗ 검증 실패로 검토 필요 (문제 {problem_id}): {flagged[problem_id]['validation_status']}")
+            problems[problem_id] = flagged[problem_id]
+    return problems
+
+def _format_ids(problem_ids):
+    return ", ".join(str(pid) for pid in problem_ids)
+
+# ==========================================
+# 체크포인트
+# ==========================================
+
+class GenerationJournal:
+    """단원 생성 체크포인트 (문제가 하나 생성될 때마다 한 줄 추가 후 fsync)
+
+    중단된 뒤 다시 실행하면 journal에 남은 문제부터 이어서 생성하고,
+    단원 파일을 원자적으로 저장한 뒤 journal을 지운다.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
 
-def generate_chapter_problems(chapter_name, chapter_index, total_problems, skip_existing=True):
-    """특정 챕터의 모든 문제를 생성"""
+    def load(self):
+        """기록된 문제 {id: 문제} (비정상 종료로 잘린 마지막 줄은 무시)"""
+        return {p["id"]: p for p in read_jsonl(self.path) if isinstance(p, dict) and "id" in p}
+
+    def append(self, problem):
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            needs_newline = False
+            if os.path.exists(self.path) and os.path.getsize(self.path) > 0:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    needs_newline = f.read(1) != b"\n"
+            self._file = open(self.path, "a", encoding="utf-8")
+            if needs_newline:
+                self._file.write("\n")
+        self._file.write(json.dumps(problem, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+def generate_chapter_problems(chapter_name, chapter_index, total_problems, skip_existing=True,
+                              max_workers=MAX_CONCURRENT_REQUESTS, batch_size=BATCH_SIZE):
+    """특정 챕터의 모든 문제를 생성 (없는 문제만 batch_size개씩 묶어 max_workers개 요청을 동시에)"""
     filename = f"{chapter_index+1:02d}_{chapter_name}.json"
     filepath = os.path.join(PROBLEMS_DIR, filename)
     
@@ -246,51 +730,96 @@ def generate_chapter_problems(chapter_name, chapter_index, total_problems, skip_
     existing_problems = {}
     if skip_existing and os.path.exists(filepath):
         try:
-            with open(filepath, "r", encoding="utf-8") as f:
-                existing_data = json.load(f)
-                for p in existing_data.get("problems", []):
-                    existing_problems[p["id"]] = p
+            for p in iter_problems(filepath):
+                existing_problems[p["id"]] = p
             print(f"\n[{chapter_name}] 기존 파일 발견: {len(existing_problems)}문제 로드됨")
         except:
             existing_problems = {}
+        # 이전 실행에서 생성에 실패해 기본 템플릿으로 저장된 문제는 다시 요청한다
+        placeholders = [i for i, p in existing_problems.items() if is_placeholder(p.get("test_cases") or [])]
+        for problem_id in placeholders:
+            del existing_problems[problem_id]
+        if placeholders:
+            print(f"[{chapter_name}] 기본 템플릿 {len(placeholders)}문제 다시 생성")
+    
+    # 이전 실행이 중단되었으면 체크포인트에서 이어서 생성
+    journal = GenerationJournal(os.path.join(JOURNAL_DIR, f"{chapter_index+1:02d}_{chapter_name}.jsonl"))
+    resumed = journal.load()
+    if resumed:
+        print(f"[{chapter_name}] 체크포인트 발견: {len(resumed)}문제 이어서 생성")
     
     print(f"[{chapter_name}] 문제 생성 시작... (총 {total_problems}문제)")
     
-    problems = []
+    generated = {i: existing_problems[i] for i in range(1, total_problems + 1) if i in existing_problems}
+    generated.update((i, p) for i, p in resumed.items() if 1 <= i <= total_problems)
+    pending = [i for i in range(1, total_problems + 1) if i not in generated]
+    titles = TitleSummary(generated[i] for i in sorted(generated))
+    metrics = GenerationMetrics()
+    dedup_index = get_duplicate_index(PROBLEMS_DIR) if REJECT_DUPLICATES else None
+    if dedup_index is not None:
+        # 체크포인트에서 이어받은 문제도 이번 실행의 중복 검사 대상에 넣는다
+        for problem_id, problem in resumed.items():
+            dedup_index.add((chapter_index, problem_id), problem)
     created_count = 0
-    skipped_count = 0
+    failed_count = 0
+    skipped_count = len(generated)
     
-    for i in range(1, total_problems + 1):
-        if i in existing_problems and skip_existing:
-            problems.append(existing_problems[i])
-            skipped_count += 1
-            print(f"  - {i}/{total_problems} 건너뛰기 (기존 문제) [{created_count} 생성, {skipped_count} 건너뜀]", end="\r")
-        else:
-            print(f"  - {i}/{total_problems} 생성 중... [{created_count} 생성, {skipped_count} 건너뜀]", end="\r")
-            problem = generate_problem_with_gemini(chapter_name, i, problems)
-            problems.append(problem)
-            created_count += 1
-            
-            # API 호출 제한을 고려한 딜레이 (무료 티어: 분당 5개 제한)
-            # 최소 15초 간격으로 호출하여 분당 4개 이하로 제한
-            if i < total_problems:  # 마지막 문제는 대기 불필요
-                time.sleep(MIN_REQUEST_INTERVAL)
-    
-    print(f"\n  ✓ 완료: {total_problems}문제 (신규 {created_count}개, 기존 {skipped_count}개)")
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    futures = {}
+    try:
+        batch_size = max(1, batch_size)
+        batches = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        futures = {
+            executor.submit(request_problems, chapter_name, batch, titles, None, metrics,
+                            chapter_index=chapter_index, dedup_index=dedup_index): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch_problems = future.result()
+            for problem_id in futures[future]:
+                problem = batch_problems.get(problem_id)
+                if problem is None:
+                    # 실패한 문제는 기본 템플릿으로 저장하고 체크포인트에는 남기지 않는다
+                    # (다음 실행 때 기본 템플릿 문제로 읽혀 다시 요청된다)
+                    problem = fallback_problem(chapter_name, problem_id)
+                    failed_count += 1
+                else:
+                    journal.append(problem)
+                generated[problem_id] = problem
+                created_count += 1
+            print(f"  - {created_count + skipped_count}/{total_problems} 생성 완료 [{created_count} 생성, {skipped_count} 건너뜀]", end="\r")
+    finally:
+        # Ctrl+C 등으로 중단되면 아직 시작하지 않은 요청은 취소 (완료된 문제는 journal에 남음)
+        executor.shutdown(wait=True, cancel_futures=True)
+        # 중단 직전에 응답이 도착한 요청도 체크포인트에 남긴다
+        for future, batch in futures.items():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                for problem_id, problem in future.result().items():
+                    if problem_id not in generated:
+                        journal.append(problem)
+        journal.close()
     
-    # JSON 파일로 저장
-    data = {
-        "chapter_name": chapter_name,
-        "problems": problems
-    }
+    problems = [generated[i] for i in range(1, total_problems + 1)]
+    print(f"\n  ✓ 완료: {total_problems}문제 (신규 {created_count - failed_count}개, 기존 {skipped_count}개, 실패 {failed_count}개)")
+    if failed_count:
+        print(f"  ⚠️ 실패한 {failed_count}문제는 기본 템플릿으로 저장됩니다. 다시 실행하면 다시 요청합니다.")
+    if metrics.entries:
+        print_metrics_summary(summarize_metrics(metrics.entries))
     
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    # 단원 파일로 저장 (임시 파일에 한 문제씩 쓴 뒤 원자적으로 교체) 후 체크포인트 삭제
+    write_chapter(filepath, chapter_name, problems)
+    journal.remove()
     
     print(f"  ✓ 저장 완료: {filename}\n")
     return filepath
 
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "metrics":
+        # 지금까지 기록된 단원별 생성 비용 요약
+        path = sys.argv[2] if len(sys.argv) > 2 else GENERATION_METRICS_FILE
+        print_metrics_summary(summarize_metrics(read_jsonl(path)))
+        return
+    
     print("=" * 60)
     print("Gemini API를 사용한 파이썬 문제 자동 생성")
     print("=" * 60)
@@ -302,8 +831,11 @@ def main():
     for idx, (chapter_name, count) in enumerate(CHAPTERS_INFO):
         try:
             generate_chapter_problems(chapter_name, idx, count)
+        except KeyboardInterrupt:
+            print(f"\n중단됨: {chapter_name} - 생성된 문제는 체크포인트에 저장되어 다시 실행하면 이어서 생성합니다.")
+            return
         except Exception as e:
-            print(f"에러: {chapter_name} 챕터 생성 실패 - {e}")
+            print(f"에러: {chapter_name} 챕터 생성 실패 - {e} (다시 실행하면 이어서 생성합니다)")
             continue
     
     print("=" * 60)
@@ -0,0 +1,870 @@
+"""
+채점 백엔드
+
+학생 코드를 Streamlit 서버 프로세스 안에서 exec() 하지 않고,
+미리 띄워둔 워커 프로세스 풀에서 실행한다.
+각 워커는 CPU 시간 제한, 실행 시간(wall-clock) 제한, 메모리 상한, 출력 크기 상한을 가진다.
+표준 출력은 통째로 모으지 않고 쓰는 즉시 문제의 채점기(checkers.py)로 예상 출력과 비교해,
+틀리면 바로 실행을 멈춘다.
+테스트 케이스 결과마다 실행 시간/CPU 시간/최대 메모리/출력 크기(CASE_METRICS)를 함께 돌려준다.
+채점 단계별 소요 시간(compile, case_run, case_exec, run_test_cases 등)은 latency_metrics에 기록한다.
+"""
+import ast
+import atexit
+import builtins
+import contextlib
+import hashlib
+import io
+import marshal
+import math
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from checkers import (checker_key, custom_checker_context, custom_checker_source, make_checker, normalize_output,
+                      parse_checker, parse_custom_verdict)
+from latency_metrics import observe, timed, timer
+
+try:
+    import resource
+except ImportError:  # Windows에는 resource 모듈이 없음
+    resource = None
+
+# 채점 워커 설정
+WORKER_COUNT = int(os.getenv("GRADER_WORKERS", max(2, os.cpu_count() or 1)))
+CPU_TIME_LIMIT = 2  # 테스트 케이스 1개당 CPU 시간 제한 (초)
+WALL_TIME_LIMIT = 5  # 테스트 케이스 1개당 실행 시간 제한 (초)
+MEMORY_LIMIT_MB = 256  # 워커 프로세스 메모리 상한
+MAX_JOBS_PER_WORKER = 200  # 이 횟수만큼 실행한 워커는 새 프로세스로 교체
+CANCEL_POLL_INTERVAL = 0.02  # 취소 여부 확인 주기 (초)
+ACQUIRE_TIMEOUT = 30  # 유휴 워커를 기다리는 최대 시간 (초)
+RESPAWN_RETRIES = 3  # 워커 재시작 실패 시 재시도 횟수
+RESPAWN_BACKOFF = 0.5  # 재시도 사이 대기 시간 (초, 매번 두 배)
+CODE_CACHE_SIZE = 512  # 컴파일 결과 캐시 크기
+VERDICT_CACHE_SIZE = 4096  # 실행 결과 캐시 크기
+VERDICT_CACHE_TTL = 600  # 실행 결과 캐시 유지 시간 (초)
+VERDICT_CACHE_MAX_OUTPUT = 64 * 1024  # 이보다 긴 출력은 캐시하지 않음
+OUTPUT_LIMIT_BYTES = int(os.getenv("GRADER_OUTPUT_LIMIT", 1024 * 1024))  # 실행 1회의 표준 출력 상한 (UTF-8 바이트)
+OUTPUT_PREVIEW_SIZE = 64 * 1024  # 예상 출력과 비교할 때 결과에 남기는 출력 앞부분 (글자 수)
+COMPARE_CHUNK_SIZE = 8 * 1024  # 이미 받은 출력을 compare_output으로 비교할 때 조각 크기 (글자 수)
+
+# 테스트 케이스 결과에 붙는 실행 지표
+#   wall_time       실행 시간 (초, 시간 초과/비정상 종료면 채점 서버에서 잰 대기 시간)
+#   cpu_time        워커의 CPU 시간 (초)
+#   peak_memory_kb  실행 중 워커 프로세스의 최대 RSS (KB, 인터프리터 기본 사용량 포함)
+#   output_bytes    표준 출력 크기 (UTF-8 바이트)
+CASE_METRICS = ("wall_time", "cpu_time", "peak_memory_kb", "output_bytes")
+
+# 파싱/컴파일 중 날 수 있는 예외 (아주 깊게 중첩된 식은 RecursionError/MemoryError를 낸다)
+COMPILE_ERRORS = (SyntaxError, ValueError, RecursionError, MemoryError, OverflowError)
+
+# 실행 결과 캐시 대상에서 제외할 요소 (실행할 때마다 결과가 달라질 수 있음)
+DETERMINISTIC_MODULES = {
+    "math", "string", "itertools", "functools", "collections", "operator",
+    "re", "fractions", "decimal", "heapq", "bisect", "statistics", "copy", "textwrap",
+}
+NONDETERMINISTIC_NAMES = {
+    "open", "eval", "exec", "compile", "__import__", "globals", "locals", "vars",
+    "id", "hash", "set", "frozenset", "breakpoint", "help",
+}
+
+
+class MockInput:
+    def __init__(self, inputs_str):
+        self.inputs = inputs_str.strip().split('\n') if inputs_str else []
+        self.current = 0
+
+    def readline(self):
+        if self.current < len(self.inputs):
+            ret = self.inputs[self.current]
+            self.current += 1
+            return ret
+        return ""
+
+    def __call__(self, prompt=""):
+        return self.readline()
+
+class OutputStopped(BaseException):
+    """출력 때문에 실행을 멈춤 (학생 코드의 except Exception에 잡히지 않도록 BaseException)"""
+
+
+class OutputLimitExceeded(OutputStopped):
+    """출력 크기 상한 초과"""
+
+
+class OutputMismatch(OutputStopped):
+    """출력이 예상 출력과 달라짐"""
+
+
+def compare_output(expected, actual, checker=None, chunk_size=COMPARE_CHUNK_SIZE):
+    """정규화된 expected와 actual을 채점기(기본 exact)로 앞에서부터 비교
+
+    actual을 통째로 정규화하지 않고 조각씩 흘려보내며, 틀리는 즉시 멈춘다.
+    checker는 parse_checker 결과 (custom 채점기는 run_test_cases가 워커에서 실행한다).
+    -> (일치 여부, 처음 틀린 {"line", "col"} 또는 None)
+    """
+    matcher = make_checker(checker or parse_checker(None), expected)
+    actual = actual or ""
+    for start in range(0, len(actual), chunk_size):
+        if not matcher.feed(actual[start:start + chunk_size]):
+            break
+    matcher.finish()
+    return matcher.matched, matcher.position()
+
+
+class BoundedOutput(io.TextIOBase):
+    """크기 상한이 있는 표준 출력 대체 스트림
+
+    limit 바이트를 넘으면 OutputLimitExceeded, matcher(checkers의 스트리밍 비교기)를 주면
+    출력이 틀리는 순간 OutputMismatch를 일으켜 실행을 멈춘다.
+    keep 글자까지만 출력을 보관한다 (None이면 상한까지 모두).
+    """
+
+    def __init__(self, limit=OUTPUT_LIMIT_BYTES, matcher=None, keep=None):
+        self.limit = limit
+        self.keep = keep
+        self.matcher = matcher
+        self.bytes_written = 0
+        self.kept = 0
+        self.truncated = False  # 보관하지 못한 출력이 있음
+        self.exceeded = False
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        if not isinstance(text, str):
+            raise TypeError(f"write() argument must be str, not {type(text).__name__}")
+        if self.exceeded:
+            raise OutputLimitExceeded()
+        if self.matcher is not None and not self.matcher.matched:
+            raise OutputMismatch()
+
+        size = len(text) if text.isascii() else len(text.encode("utf-8", "replace"))
+        self.bytes_written += size
+        if self.limit is not None and self.bytes_written > self.limit:
+            self.exceeded = True
+            raise OutputLimitExceeded()
+
+        if self.keep is None or self.kept + len(text) <= self.keep:
+            self._chunks.append(text)
+            self.kept += len(text)
+        else:
+            if self.kept < self.keep:
+                self._chunks.append(text[:self.keep - self.kept])
+                self.kept = self.keep
+            self.truncated = True
+
+        if self.matcher is not None and not self.matcher.feed(text):
+            raise OutputMismatch()
+        return len(text)
+
+    def getvalue(self):
+        return "".join(self._chunks)
+
+    @property
+    def stopped(self):
+        return self.exceeded or (self.matcher is not None and not self.matcher.matched)
+
+    def matched(self):
+        """예상 출력과 같은지 (예상 출력이 없으면 None)"""
+        return self.matcher.finish() if self.matcher is not None else None
+
+    def mismatch(self):
+        """예상 출력과 처음 달라지는 {"line", "col"} (같거나 예상 출력이 없으면 None)"""
+        return self.matcher.position() if self.matcher is not None else None
+
+
+@contextlib.contextmanager
+def stdout_capture(capture=None):
+    """sys.stdout을 capture(기본: 출력 상한만 있는 BoundedOutput)로 바꾼다"""
+    if capture is None:
+        capture = BoundedOutput()
+    old_stdout = sys.stdout
+    sys.stdout = capture
+    try:
+        yield capture
+    finally:
+        sys.stdout = old_stdout
+
+class LRUCache:
+    """크기 제한(및 선택적 TTL)이 있는 스레드 안전 LRU 캐시"""
+
+    def __init__(self, maxsize, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()  # key -> (만료 시각, 값)
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] is not None and entry[0] < time.monotonic():
+                del self._data[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def __len__(self):
+        return len(self._data)
+
+
+_code_cache = LRUCache(CODE_CACHE_SIZE)
+
+
+def compile_user_code(source):
+    """소스 해시를 키로 컴파일 결과를 캐시한다
+
+    (marshal된 코드 객체, None) 또는 문법 오류 등 컴파일 실패 시 (None, 에러 메시지)를 반환.
+    같은 코드를 다시 제출하면 파싱/컴파일 없이 캐시에서 꺼낸다.
+    """
+    digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    cached = _code_cache.get(digest)
+    if cached is None:
+        try:
+            cached = (marshal.dumps(compile(source, "<string>", "exec")), None)
+        except COMPILE_ERRORS as e:
+            cached = (None, _compile_error_message(e))
+        _code_cache.put(digest, cached)
+    return cached
+
+
+def _compile_error_message(error):
+    if isinstance(error, (SyntaxError, ValueError)):
+        return str(error)
+    detail = f"{type(error).__name__}: {error}" if str(error) else type(error).__name__
+    return f"코드가 너무 복잡해서 컴파일할 수 없습니다 ({detail})"
+
+
+_verdict_cache = LRUCache(VERDICT_CACHE_SIZE, ttl=VERDICT_CACHE_TTL)
+_normalized_cache = LRUCache(CODE_CACHE_SIZE)
+
+
+def _is_deterministic(tree):
+    """입출력 외의 부수효과나 무작위성이 없는 코드인지 AST로 판별"""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            if any(alias.name.split(".")[0] not in DETERMINISTIC_MODULES for alias in node.names):
+                return False
+        elif isinstance(node, ast.ImportFrom):
+            if not node.module or node.module.split(".")[0] not in DETERMINISTIC_MODULES:
+                return False
+        elif isinstance(node, ast.Name) and node.id in NONDETERMINISTIC_NAMES:
+            return False
+        elif isinstance(node, ast.Attribute) and node.attr.startswith("__"):
+            return False
+        elif isinstance(node, (ast.Set, ast.SetComp)):
+            return False
+    return True
+
+
+def normalized_code_digest(source):
+    """공백/주석을 무시한 코드 해시 (실행 결과 캐시 불가능한 코드면 None)
+
+    AST 덤프를 해시하므로 들여쓰기 외의 공백, 빈 줄, 주석 차이는 같은 코드로 본다.
+    """
+    source_digest = hashlib.sha256(source.encode("utf-8")).hexdigest()
+    cached = _normalized_cache.get(source_digest, "")
+    if cached != "":
+        return cached
+    try:
+        tree = ast.parse(source)
+        digest = hashlib.sha256(ast.dump(tree).encode("utf-8")).hexdigest() if _is_deterministic(tree) else None
+    except COMPILE_ERRORS:
+        # ast.dump도 재귀하므로 파싱과 함께 감싼다 (캐시하지 않을 뿐 채점은 그대로 진행)
+        digest = None
+    _normalized_cache.put(source_digest, digest)
+    return digest
+
+
+def get_verdict_cache_stats():
+    """실행 결과 캐시의 적중/미스 통계"""
+    return _verdict_cache.stats()
+
+
+# ==========================================
+# 워커 프로세스
+# ==========================================
+
+class CpuTimeExceeded(BaseException):
+    """CPU 시간 제한 초과 (학생 코드의 except Exception에 잡히지 않도록 BaseException)"""
+
+
+def _on_cpu_limit(signum, frame):
+    raise CpuTimeExceeded()
+
+
+def _apply_memory_limit(memory_limit_mb):
+    if resource is None or not memory_limit_mb:
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _set_cpu_limit(seconds):
+    """지금까지 사용한 CPU 시간 + seconds 로 soft limit 설정 (None이면 해제)"""
+    if resource is None:
+        return
+    try:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        if seconds is None:
+            soft = hard
+        else:
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            soft = math.ceil(usage.ru_utime + usage.ru_stime + seconds)
+            if hard != resource.RLIM_INFINITY:
+                soft = min(soft, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    except (ValueError, OSError):
+        pass
+
+
+def _reset_peak_memory():
+    """워커의 최대 RSS 기록을 0으로 되돌린다 (Linux 전용, 안 되면 프로세스 전체 최대값이 기록된다)"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+def _peak_memory_kb():
+    """워커의 최대 RSS (KB, 알 수 없으면 None)"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak  # macOS는 바이트 단위
+
+
+def _run_job(job):
+    """워커 안에서 학생 코드 1회 실행 (결과에 실행 지표를 붙인다)"""
+    expected = job.get("expected")
+    try:
+        matcher = make_checker(job.get("checker") or parse_checker(None), expected) if expected is not None else None
+    except ValueError as e:
+        # 예상 출력을 정규식으로 쓰는 regex 채점기에서 예상 출력이 올바른 정규식이 아닌 경우
+        return {"status": "error", "output": None, "error": f"채점기 오류: {e}", **dict.fromkeys(CASE_METRICS)}
+    capture = BoundedOutput(job.get("output_limit", OUTPUT_LIMIT_BYTES), matcher,
+                            OUTPUT_PREVIEW_SIZE if matcher is not None else None)
+    _reset_peak_memory()
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    result = _execute_job(job, capture)
+    result["wall_time"] = round(time.perf_counter() - wall_started, 4)
+    result["cpu_time"] = round(time.process_time() - cpu_started, 4)
+    result["peak_memory_kb"] = _peak_memory_kb()
+    result["output_bytes"] = capture.bytes_written
+    return result
+
+
+def _execute_job(job, capture):
+    mock_input_obj = MockInput(job["input"])
+    exec_builtins = builtins.__dict__.copy()
+    exec_builtins['input'] = mock_input_obj
+    exec_globals = {'__name__': '__main__', 'input': mock_input_obj, '__builtins__': exec_builtins}
+    exec_globals.update(job.get("context") or {})
+
+    code = job["code"]
+    if isinstance(code, bytes):
+        code = marshal.loads(code)
+
+    _set_cpu_limit(job["cpu_time_limit"])
+    try:
+        with stdout_capture(capture):
+            try:
+                exec(code, exec_globals)
+            except (SystemExit, OutputStopped):
+                pass
+    except CpuTimeExceeded:
+        return {"status": "timeout", "output": None,
+                "error": f"시간 초과: CPU 시간 {job['cpu_time_limit']}초를 넘었습니다."}
+    except MemoryError:
+        return {"status": "memory", "output": None, "error": "메모리 초과: 사용 가능한 메모리를 넘었습니다."}
+    except Exception as e:
+        # 학생 코드가 출력 중단을 가로채고 다른 예외로 끝난 경우는 출력 기준으로 판정
+        if not capture.stopped:
+            return {"status": "error", "output": None, "error": str(e)}
+    except BaseException as e:
+        if not capture.stopped:
+            return {"status": "error", "output": None, "error": f"{type(e).__name__}: {e}"}
+    finally:
+        _set_cpu_limit(None)
+
+    if capture.exceeded:
+        return {"status": "output_limit", "output": None,
+                "error": f"출력 초과: 출력이 {capture.limit // 1024}KB를 넘었습니다."}
+    return {"status": "ok", "output": capture.getvalue(), "error": None, "matched": capture.matched(),
+            "mismatch": capture.mismatch(), "truncated": capture.truncated or capture.stopped}
+
+
+def _worker_main(conn, memory_limit_mb):
+    """워커 프로세스 진입점: 작업을 받아 실행하고 결과를 돌려준다"""
+    if hasattr(signal, "SIGXCPU"):
+        signal.signal(signal.SIGXCPU, _on_cpu_limit)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _apply_memory_limit(memory_limit_mb)
+
+    while True:
+        try:
+            job = conn.recv()
+        except (EOFError, OSError):
+            break
+        if job is None:
+            break
+        result = _run_job(job)
+        try:
+            conn.send(result)
+        except MemoryError:
+            conn.send({"status": "memory", "output": None, "error": "메모리 초과: 출력이 너무 큽니다."})
+
+
+# ==========================================
+# 워커 풀
+# ==========================================
+
+class _Worker:
+    def __init__(self, ctx, memory_limit_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_limit_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.jobs_done = 0
+
+    def stop(self, kill=False):
+        try:
+            if kill:
+                self.process.kill()
+            else:
+                self.conn.send(None)
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=1)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+
+
+class GradingPool:
+    """미리 띄워둔 워커 프로세스에 채점 작업을 분배하는 풀 (스레드 안전)"""
+
+    def __init__(self, size=WORKER_COUNT, cpu_time_limit=CPU_TIME_LIMIT, wall_time_limit=WALL_TIME_LIMIT,
+                 memory_limit_mb=MEMORY_LIMIT_MB, max_jobs_per_worker=MAX_JOBS_PER_WORKER,
+                 output_limit_bytes=OUTPUT_LIMIT_BYTES, acquire_timeout=ACQUIRE_TIMEOUT):
+        self.size = size
+        self.cpu_time_limit = cpu_time_limit
+        self.wall_time_limit = wall_time_limit
+        self.memory_limit_mb = memory_limit_mb
+        self.max_jobs_per_worker = max_jobs_per_worker
+        self.output_limit_bytes = output_limit_bytes
+        self.acquire_timeout = acquire_timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._idle = queue.Queue()
+        self._closed = False
+        self._lost = 0  # 재시작에 실패해 비어 있는 워커 자리 수
+        self._lost_lock = threading.Lock()
+        self.last_spawn_error = None
+        for _ in range(size):
+            self._idle.put(self._spawn())
+
+    def _spawn(self):
+        return _Worker(self._ctx, self.memory_limit_mb)
+
+    def _try_spawn(self, attempts):
+        """워커를 띄운다. 실패하면 간격을 늘려 가며 재시도하고, 끝내 실패하면 None"""
+        delay = RESPAWN_BACKOFF
+        for attempt in range(attempts):
+            try:
+                return self._spawn()
+            except Exception as e:
+                self.last_spawn_error = e
+                if attempt + 1 < attempts:
+                    time.sleep(delay)
+                    delay *= 2
+        return None
+
+    def _restore_lost(self):
+        """재시작에 실패했던 워커 자리를 다시 채워 본다"""
+        with self._lost_lock:
+            if self._lost == 0:
+                return
+            self._lost -= 1
+        worker = self._try_spawn(1)
+        if worker is None:
+            with self._lost_lock:
+                self._lost += 1
+        else:
+            self._idle.put(worker)
+
+    def _acquire(self, cancel_event):
+        """유휴 워커를 하나 가져온다 (취소되거나 acquire_timeout이 지나면 None)"""
+        deadline = time.monotonic() + self.acquire_timeout
+        while cancel_event is None or not cancel_event.is_set():
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            if self._lost:
+                self._restore_lost()
+            try:
+                return self._idle.get(timeout=min(remaining, CANCEL_POLL_INTERVAL if cancel_event else 1))
+            except queue.Empty:
+                continue
+        return None
+
+    def _wait(self, worker, cancel_event):
+        """결과를 기다린다. 시간 초과면 "timeout", 취소되면 "cancelled" 문자열을 반환"""
+        deadline = time.monotonic() + self.wall_time_limit
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return "timeout"
+            interval = remaining if cancel_event is None else min(remaining, CANCEL_POLL_INTERVAL)
+            if worker.conn.poll(interval):
+                return worker.conn.recv()
+            if cancel_event is not None and cancel_event.is_set():
+                return "cancelled"
+
+    def _replace(self, worker):
+        """워커를 종료하고 새 워커를 백그라운드에서 띄워 풀에 넣는다
+
+        재시도해도 새 워커를 띄우지 못하면 그 자리를 _lost로 세어 두고
+        (실패 원인은 last_spawn_error), 다음 _acquire에서 다시 띄워 본다.
+        """
+        def respawn():
+            worker.stop(kill=True)
+            if self._closed:
+                return
+            new_worker = self._try_spawn(RESPAWN_RETRIES)
+            if new_worker is None:
+                with self._lost_lock:
+                    self._lost += 1
+            else:
+                self._idle.put(new_worker)
+        threading.Thread(target=respawn, daemon=True).start()
+
+    def run(self, code, user_inputs="", cancel_event=None, expected=None, checker=None, context=None):
+        """코드를 워커에서 실행하고 {"status", "output", "error", *CASE_METRICS} 를 반환
+
+        code는 소스 문자열 또는 compile_user_code()가 돌려준 marshal 바이트.
+
+        expected(normalize_output을 거친 예상 출력)를 주면 checker(parse_checker 결과, 기본 exact)로
+        출력을 비교하다가 틀리는 즉시 실행을 멈추고, 결과에 "matched"(통과 여부),
+        "mismatch"(처음 틀린 {"line", "col"}), "truncated"(output이 앞부분만 담겼는지)를 붙인다.
+        custom 채점기는 워커 안에서 비교할 수 없으므로 expected 없이 실행해 출력을 모두 받는다.
+        context는 코드의 전역 변수로 넣을 값 (custom 채점기에 데이터를 넘길 때 사용).
+        출력이 output_limit_bytes를 넘으면 status "output_limit".
+
+        cancel_event(threading.Event)가 설정되면 대기/실행 중인 작업을 중단하고
+        status "cancelled" 를 반환한다.
+        acquire_timeout 동안 유휴 워커를 얻지 못하면 status "unavailable".
+        """
+        if self._closed:
+            raise RuntimeError("채점 풀이 종료되었습니다.")
+        job = {"code": code, "input": user_inputs, "cpu_time_limit": self.cpu_time_limit,
+               "output_limit": self.output_limit_bytes, "expected": expected, "checker": checker,
+               "context": context}
+
+        worker = self._acquire(cancel_event)
+        if worker is None:
+            if cancel_event is not None and cancel_event.is_set():
+                return {"status": "cancelled", "output": None, "error": None}
+            result = {"status": "unavailable", "output": None,
+                      "error": "채점 서버가 바쁩니다. 잠시 후 다시 제출해 주세요."}
+            result.update(dict.fromkeys(CASE_METRICS))
+            return result
+        started = time.perf_counter()
+        replace = False
+        try:
+            try:
+                worker.conn.send(job)
+                result = self._wait(worker, cancel_event)
+                if result == "timeout":
+                    result = {"status": "timeout", "output": None,
+                              "error": f"시간 초과: 실행 시간이 {self.wall_time_limit}초를 넘었습니다."}
+                elif result == "cancelled":
+                    result = {"status": "cancelled", "output": None, "error": None}
+            except (EOFError, OSError):
+                # CPU 제한 등으로 워커가 강제 종료된 경우
+                result = {"status": "crashed", "output": None, "error": "실행 중 프로세스가 비정상 종료되었습니다."}
+
+            if "wall_time" not in result:
+                # 워커가 지표를 돌려주지 못한 경우 (시간 초과/취소/비정상 종료)
+                result.update(dict.fromkeys(CASE_METRICS), wall_time=round(time.perf_counter() - started, 4))
+
+            worker.jobs_done += 1
+            if result["status"] not in ("ok", "error", "output_limit"):
+                replace = True
+            elif worker.jobs_done >= self.max_jobs_per_worker:
+                replace = True
+            return result
+        finally:
+            if replace:
+                self._replace(worker)
+            else:
+                self._idle.put(worker)
+
+    def close(self):
+        self._closed = True
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            worker.stop()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """프로세스 전체에서 공유하는 채점 풀 (처음 호출할 때 생성)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = GradingPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+# ==========================================
+# 채점 API
+# ==========================================
+
+@timed("execute_user_code")
+def execute_user_code(code_input, user_inputs=""):
+    code, syntax_error = compile_user_code(code_input)
+    if syntax_error:
+        return None, syntax_error
+    result = get_pool().run(code, user_inputs)
+    if result["status"] != "ok":
+        return None, result["error"]
+    return result["output"], None
+
+def _run_custom_checker(pool, checker, test_input, expected_output, output, cancel_event):
+    """custom 채점기를 워커에서 실행 -> (통과 여부, 메시지, 채점기 오류) (취소되면 통과 여부가 None)"""
+    code, syntax_error = compile_user_code(custom_checker_source(checker))
+    if syntax_error:
+        return False, None, f"채점기 오류: {syntax_error}"
+    context = custom_checker_context(test_input, expected_output, normalize_output(output))
+    with timer("checker_run"):
+        run = pool.run(code, "", cancel_event, context=context)
+    if run["status"] == "cancelled":
+        return None, None, None
+    verdict = parse_custom_verdict(run["output"]) if run["status"] == "ok" else None
+    if verdict is None:
+        return False, None, f"채점기 오류: {run['error'] or 'check()가 판정을 반환하지 않았습니다.'}"
+    return verdict[0], verdict[1] or None, None
+
+
+def _grade_case(pool, code, test_num, test_case, cancel_event, cache_key=None, checker=None):
+    """테스트 케이스 1개 채점 (checker는 parse_checker 결과)"""
+    checker = checker or parse_checker(None)
+    custom = checker["type"] == "custom"
+    test_input = test_case.get('input', '')
+    expected_output = normalize_output(test_case.get('output', ''))
+
+    if cache_key is not None:
+        # 캐시된 실행 결과에는 예상 출력과 비교한 판정(matched/mismatch)이 들어 있으므로
+        # 예상 출력이 고쳐지면 다른 키가 되도록 예상 출력의 해시도 넣는다
+        expected_digest = hashlib.sha256(expected_output.encode("utf-8")).hexdigest()
+        cache_key = cache_key + (test_input, expected_digest)
+    run = _verdict_cache.get(cache_key) if cache_key is not None else None
+    cached = run is not None
+    if run is None:
+        if cancel_event is not None and cancel_event.is_set():
+            run = {"status": "cancelled", "output": None, "error": None}
+        else:
+            with timer("case_run"):
+                run = pool.run(code, test_input, cancel_event, None if custom else expected_output, checker)
+            if run.get("wall_time") is not None and run["status"] != "cancelled":
+                # 워커 안에서 잰 실행 시간 (case_run과의 차이는 대기/프로세스 간 통신 비용)
+                observe("case_exec", run["wall_time"])
+            if (cache_key is not None and run["status"] in ("ok", "error", "output_limit")
+                    and len(run["output"] or "") <= VERDICT_CACHE_MAX_OUTPUT):
+                _verdict_cache.put(cache_key, run)
+
+    message = checker_error = None
+    if run["status"] == "ok" and custom:
+        passed, message, checker_error = _run_custom_checker(pool, checker, test_input, expected_output,
+                                                            run["output"], cancel_event)
+        mismatch = None
+        if passed is None:
+            run = {"status": "cancelled"}
+
+    if run["status"] == "cancelled":
+        return {
+            'test_num': test_num,
+            'passed': False,
+            'skipped': True,
+            'input': test_input,
+            'expected': expected_output,
+            'actual': None
+        }
+
+    if checker_error:
+        result = {
+            'test_num': test_num,
+            'passed': False,
+            'error': checker_error,
+            'input': test_input,
+            'expected': expected_output,
+            'actual': normalize_output(run["output"])
+        }
+    elif run["status"] != "ok":
+        result = {
+            'test_num': test_num,
+            'passed': False,
+            'error': run["error"],
+            'input': test_input,
+            'expected': expected_output,
+            'actual': None
+        }
+    else:
+        if not custom:
+            passed, mismatch = run.get("matched"), run.get("mismatch")
+            if passed is None:
+                passed, mismatch = compare_output(expected_output, run["output"], checker)
+        # exact 채점기로 통과했으면 워커가 출력을 앞부분만 돌려줬어도 예상 출력과 같다
+        exact_pass = passed and checker["type"] == "exact"
+        result = {
+            'test_num': test_num,
+            'passed': passed,
+            'input': test_input,
+            'expected': expected_output,
+            'actual': expected_output if exact_pass else normalize_output(run["output"]),
+            'output_truncated': not exact_pass and run.get("truncated", False),
+            'mismatch': mismatch
+        }
+        if message:
+            result['checker_message'] = message
+
+    # 캐시된 결과면 처음 실행했을 때의 지표
+    result.update({name: run.get(name) for name in CASE_METRICS}, cached=cached)
+
+    if not result['passed'] and cancel_event is not None:
+        cancel_event.set()
+    return result
+
+@timed("run_test_cases")
+def run_test_cases(user_code, test_cases, parallel=False, fail_fast=False, problem_key=None, checker=None):
+    """여러 테스트 케이스를 실행하고 결과를 반환
+
+    parallel=True 이면 모든 케이스를 여러 워커에서 동시에 실행한다.
+    fail_fast=True 이면 하나라도 실패하는 즉시 나머지 케이스를 취소한다
+    (취소된 케이스는 'skipped': True 로 표시).
+    checker는 문제의 "checker" 값 (checkers.py, 기본 exact). 출력은 실행 중에 채점기로
+    예상 출력과 비교해 틀리는 즉시 멈추며, 틀린 케이스에는 처음 틀린 위치
+    'mismatch': {"line", "col"} 를 붙인다. checker 값이 잘못되었으면 'error' 결과 하나를 돌려준다.
+    코드는 한 번만 컴파일하며, 문법 오류는 케이스를 실행하기 전에
+    'syntax_error': True 인 결과 하나로 보고한다.
+    problem_key("단원_문제번호")를 주면 결정적인 코드의 실행 결과를
+    (문제, 정규화된 코드 해시, 채점기, 입력, 예상 출력 해시) 단위로 프로세스 전역 캐시에 저장해 재사용한다.
+    """
+    try:
+        checker = parse_checker(checker)
+    except ValueError as e:
+        return False, [{
+            'test_num': 0,
+            'passed': False,
+            'error': f"채점기 설정 오류: {e}",
+            'input': '',
+            'expected': '',
+            'actual': None
+        }]
+
+    with timer("compile"):
+        code, syntax_error = compile_user_code(user_code)
+    if syntax_error:
+        return False, [{
+            'test_num': 0,
+            'passed': False,
+            'syntax_error': True,
+            'error': syntax_error,
+            'input': '',
+            'expected': '',
+            'actual': None
+        }]
+
+    pool = get_pool()
+    cancel_event = threading.Event() if fail_fast else None
+    cache_key = None
+    if problem_key is not None:
+        digest = normalized_code_digest(user_code)
+        if digest is not None:
+            cache_key = (problem_key, digest, checker_key(checker))
+
+    if parallel and len(test_cases) > 1:
+        with ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+            futures = [executor.submit(_grade_case, pool, code, i + 1, test_case, cancel_event, cache_key, checker)
+                       for i, test_case in enumerate(test_cases)]
+            results = [future.result() for future in futures]
+    else:
+        results = [_grade_case(pool, code, i + 1, test_case, cancel_event, cache_key, checker)
+                   for i, test_case in enumerate(test_cases)]
+
+    all_passed = all(r['passed'] for r in results)
+    return all_passed, results
+
+def summarize_case_metrics(results):
+    """run_test_cases 결과 목록의 실행 지표 요약
+
+    wall_time/cpu_time/output_bytes는 실행한 케이스의 합, peak_memory_kb는 최대값,
+    max_wall_time은 가장 느린 케이스의 실행 시간. 지표가 없으면 None.
+    """
+    measured = [r for r in results if r.get('wall_time') is not None]
+
+    def total(name, func=sum):
+        values = [r[name] for r in measured if r.get(name) is not None]
+        return func(values) if values else None
+
+    wall_time, cpu_time = total('wall_time'), total('cpu_time')
+    return {
+        'wall_time': round(wall_time, 4) if wall_time is not None else None,
+        'cpu_time': round(cpu_time, 4) if cpu_time is not None else None,
+        'peak_memory_kb': total('peak_memory_kb', max),
+        'output_bytes': total('output_bytes'),
+        'max_wall_time': total('wall_time', max),
+    }
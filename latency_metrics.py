@@ -0,0 +1,257 @@
+"""
+지연 시간 계측
+
+채점 경로의 단계별 소요 시간을 고정 구간 히스토그램(Prometheus 방식의 누적 버킷)에 모은다.
+관측 한 번은 잠금 한 번과 정수 몇 개를 더하는 정도라 요청 처리 중에 그대로 써도 된다.
+
+    with timer("save_results"):
+        ...
+
+    @timed("load_problem")
+    def load_problem(...):
+        ...
+
+내보내기 (start_exporter, 프로세스마다 한 번):
+    LATENCY_METRICS_FILE      단계별 횟수/평균/p50/p95/p99를 주기적으로 쓰는 JSON 파일
+                              (기본 results/latency_metrics.json, 빈 값이면 쓰지 않음)
+    LATENCY_METRICS_INTERVAL  파일 갱신 주기 (초, 기본 10)
+    LATENCY_METRICS_PORT      지정하면 http://<호스트>:<포트>/metrics 에서 Prometheus 텍스트 형식으로 제공
+    LATENCY_METRICS_HOST      /metrics 서버가 바인딩할 주소 (기본 127.0.0.1, 이 컴퓨터에서만 접속 가능)
+                              다른 컴퓨터의 Prometheus가 수집해야 할 때만 0.0.0.0 등으로 바꾼다
+                              (교실 네트워크의 모든 컴퓨터에 내부 지표가 보이게 된다)
+
+백분위수는 버킷 안에서 선형 보간한 근사값이다.
+"""
+import atexit
+import bisect
+import functools
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from file_io import write_json_atomic
+
+# 버킷 상한 (초): 0.1ms부터 1.5배씩 약 29초까지 (백분위수 추정 오차가 버킷 폭 이내)
+BUCKETS = tuple(round(0.0001 * 1.5 ** i, 6) for i in range(32))
+QUANTILES = (0.5, 0.95, 0.99)
+METRIC_PREFIX = "study_py"
+
+METRICS_FILE = os.getenv("LATENCY_METRICS_FILE", os.path.join("results", "latency_metrics.json"))
+EXPORT_INTERVAL = float(os.getenv("LATENCY_METRICS_INTERVAL", "10"))
+METRICS_PORT = os.getenv("LATENCY_METRICS_PORT", "")
+METRICS_HOST = os.getenv("LATENCY_METRICS_HOST", "127.0.0.1")
+
+
+class Histogram:
+    """고정 버킷 지연 시간 히스토그램 (스레드 안전)"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 마지막 칸은 +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            self.counts[i] += 1
+            self.count += 1
+            self.sum += seconds
+            if seconds > self.max:
+                self.max = seconds
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum, self.max
+
+    @staticmethod
+    def quantile(q, buckets, counts, count, max_value):
+        """버킷 카운트로 추정한 q 분위수 (초)"""
+        if count == 0:
+            return None
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(counts):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = buckets[i - 1] if i > 0 else 0.0
+                upper = buckets[i] if i < len(buckets) else max_value
+                upper = min(upper, max_value)
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return max_value
+
+
+class LatencyRegistry:
+    """단계 이름별 히스토그램과 내보낼 게이지 모음"""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self.started_at = datetime.now().isoformat(timespec="seconds")
+        self._histograms = {}
+        self._gauges = {}  # 이름 -> dict를 돌려주는 함수
+        self._lock = threading.Lock()
+
+    def histogram(self, stage):
+        histogram = self._histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(stage, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    @contextmanager
+    def timer(self, stage):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - started)
+
+    def timed(self, stage):
+        """함수 호출 시간을 stage 히스토그램에 기록하는 데코레이터"""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.timer(stage):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def register_gauges(self, name, collect):
+        """내보낼 때마다 collect()가 돌려주는 {이름: 숫자}를 게이지로 함께 내보낸다"""
+        with self._lock:
+            self._gauges[name] = collect
+
+    def _collect_gauges(self):
+        with self._lock:
+            gauges = list(self._gauges.items())
+        collected = {}
+        for name, collect in gauges:
+            try:
+                collected[name] = {key: value for key, value in collect().items()
+                                   if isinstance(value, (int, float))}
+            except Exception:
+                continue
+        return collected
+
+    def summary(self):
+        """단계별 {"count", "mean", "max", "p50", "p95", "p99"} (밀리초)와 게이지"""
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        stages = {}
+        for stage, histogram in histograms:
+            counts, count, total, max_value = histogram.snapshot()
+            entry = {
+                "count": count,
+                "mean": round(total / count * 1000, 3) if count else None,
+                "max": round(max_value * 1000, 3),
+            }
+            for q in QUANTILES:
+                value = Histogram.quantile(q, self.buckets, counts, count, max_value)
+                entry[f"p{round(q * 100)}"] = round(value * 1000, 3) if value is not None else None
+            stages[stage] = entry
+        return {
+            "generated_at": datetime.now().isoformat(timespec="seconds"),
+            "started_at": self.started_at,
+            "pid": os.getpid(),
+            "unit": "ms",
+            "stages": stages,
+            "gauges": self._collect_gauges(),
+        }
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식 (히스토그램 하나에 stage 레이블)"""
+        name = f"{METRIC_PREFIX}_stage_duration_seconds"
+        lines = [f"# HELP {name} 단계별 소요 시간", f"# TYPE {name} histogram"]
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+        for stage, histogram in histograms:
+            counts, count, total, _ = histogram.snapshot()
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {count}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {count}')
+        for gauge_name, values in sorted(self._collect_gauges().items()):
+            for key, value in sorted(values.items()):
+                metric = f"{METRIC_PREFIX}_{gauge_name}_{key}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = LatencyRegistry()
+observe = REGISTRY.observe
+timer = REGISTRY.timer
+timed = REGISTRY.timed
+register_gauges = REGISTRY.register_gauges
+
+
+# ==========================================
+# 내보내기
+# ==========================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split("?", 1)[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def write_metrics_file(path=METRICS_FILE, registry=REGISTRY):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    write_json_atomic(path, registry.summary())
+
+
+_exporter_started = False
+_exporter_lock = threading.Lock()
+
+
+def start_exporter(path=METRICS_FILE, interval=EXPORT_INTERVAL, port=METRICS_PORT, host=METRICS_HOST):
+    """지표 파일 갱신 스레드와 (포트가 있으면) /metrics HTTP 서버를 한 번만 띄운다"""
+    global _exporter_started
+    with _exporter_lock:
+        if _exporter_started:
+            return
+        _exporter_started = True
+
+    if path:
+        def export_loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    write_metrics_file(path)
+                except Exception:
+                    pass
+        threading.Thread(target=export_loop, name="latency-metrics", daemon=True).start()
+        atexit.register(write_metrics_file, path)
+
+    if port:
+        try:
+            server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except (OSError, ValueError) as e:
+            print(f"지표 서버를 시작하지 못했습니다 ({host}:{port}): {e}")
+            return
+        threading.Thread(target=server.serve_forever, name="latency-metrics-http", daemon=True).start()
@@ -1,15 +1,16 @@
 import streamlit as st
 import streamlit.components.v1 as components
 from streamlit_ace import st_ace
-import sys
-import io
-import contextlib
-import json
-import os
 import time
 import random
 from datetime import datetime
 
+from grader import (execute_user_code, get_verdict_cache_stats, normalize_output, run_test_cases,
+                    summarize_case_metrics)
+from latency_metrics import register_gauges, start_exporter, timed, timer
+from problem_bank import get_problem_bank
+from results_store import get_results_writer
+
 # ==========================================
 # 1. 설정 및 초기화
 # ==========================================
@@ -24,7 +25,7 @@ if 'start_time' not in st.session_state:
 if 'end_time' not in st.session_state:
     st.session_state['end_time'] = None
 if 'solve_status' not in st.session_state:
-    st.session_state['solve_status'] = {}  # { "chapter_problemId": {"status": "PASS"/"FAIL", "submissions": 3, "first_pass": "..."} }
+    st.session_state['solve_status'] = {}  # { "chapter_problemId": {"status": "PASS"/"FAIL", "submissions": 3, "first_pass": "...", "wall_time": ..., ...} }
 if 'test_finished' not in st.session_state:
     st.session_state['test_finished'] = False
 if 'selected_problems' not in st.session_state:
@@ -32,6 +33,7 @@ if 'selected_problems' not in st.session_state:
 
 # 결과 저장 폴더
 RESULTS_DIR = "results"
+RESULTS_DB = f"{RESULTS_DIR}/results.db"  # admin.py와 공유하는 SQLite 결과 DB
 PROBLEMS_DIR = "problems"
 
 # 챕터 정보 (각 단원당 100문제)
@@ -60,6 +62,14 @@ CHAPTERS_INFO = [
 # 각 단원당 출제할 문제 수
 PROBLEMS_PER_CHAPTER = 10
 
+# 채점 방식: 테스트 케이스 동시 실행 / 첫 실패 시 나머지 케이스 취소
+GRADING_PARALLEL = True
+GRADING_FAIL_FAST = False
+
+# 단계별 지연 시간 내보내기 (results/latency_metrics.json, LATENCY_METRICS_PORT를 주면 /metrics)
+register_gauges("verdict_cache", get_verdict_cache_stats)
+start_exporter()
+
 # ==========================================
 # 2. 자바스크립트 (부정행위 감지)
 # ==========================================
@@ -85,14 +95,18 @@ components.html(js_code, height=0, width=0)
 # 3. 유틸리티 함수
 # ==========================================
 
-def save_results(final=False):
-    """현재까지의 풀이 기록을 JSON 파일로 저장"""
+@timed("save_results")
+def save_results(final=False, event=None, wait=False):
+    """현재까지의 풀이 기록을 저장
+
+    event(dict)는 세션 이벤트 로그에 한 줄로 추가되고, 결과 JSON 스냅샷은
+    백그라운드에서 묶어서 갱신된다. final=True 또는 wait=True 이면 디스크에 쓸 때까지 기다린다.
+    """
     if not st.session_state['user_name']:
         return None
 
     now_str = datetime.now().strftime("%Y-%m-%d")
     filename = f"{now_str}_{st.session_state['user_name']}_result.json"
-    file_path = os.path.join(RESULTS_DIR, filename)
 
     data = {
         "user_name": st.session_state['user_name'],
@@ -107,23 +121,32 @@ def save_results(final=False):
     }
 
     try:
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        writer = get_results_writer(RESULTS_DIR, RESULTS_DB)
+        writer.record(data, event)
+        if final or wait:
+            writer.flush()
         return filename
     except Exception as e:
         st.error(f"저장 중 오류 발생: {e}")
         return None
 
-def load_problem_data(chapter_name, chapter_index):
-    expected_filename = f"{chapter_index+1:02d}_{chapter_name}.json"
-    file_path = os.path.join(PROBLEMS_DIR, expected_filename)
-    if os.path.exists(file_path):
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except:
-            return None
-    return None
+def submission_event(prob_key, chapter_index):
+    """채점 결과 이벤트 (이벤트 로그용)"""
+    return {
+        "type": "submission",
+        "key": prob_key,
+        "chapter": chapter_index,
+        "selected": st.session_state['selected_problems'].get(chapter_index, []),
+        **st.session_state['solve_status'][prob_key]
+    }
+
+def get_bank():
+    """프로세스 전체에서 공유하는 문제 은행 (파일은 변경됐을 때만 다시 읽음)"""
+    return get_problem_bank([info[0] for info in CHAPTERS_INFO], PROBLEMS_DIR)
+
+@timed("load_problem")
+def load_problem(chapter_index, problem_id):
+    return get_bank().get_problem(chapter_index, problem_id)
 
 def get_selected_problems_for_chapter(chapter_index, total_problems):
     """각 단원에서 랜덤으로 선택된 문제 목록을 반환"""
@@ -134,88 +157,6 @@ def get_selected_problems_for_chapter(chapter_index, total_problems):
         st.session_state['selected_problems'][chapter_index] = selected
     return st.session_state['selected_problems'][chapter_index]
 
-class MockInput:
-    def __init__(self, inputs_str):
-        self.inputs = inputs_str.strip().split('\n') if inputs_str else []
-        self.current = 0
-    
-    def readline(self):
-        if self.current < len(self.inputs):
-            ret = self.inputs[self.current]
-            self.current += 1
-            return ret
-        return "" 
-
-    def __call__(self, prompt=""):
-        return self.readline()
-
-@contextlib.contextmanager
-def stdout_capture():
-    capture = io.StringIO()
-    old_stdout = sys.stdout
-    sys.stdout = capture
-    try:
-        yield capture
-    finally:
-        sys.stdout = old_stdout
-
-def execute_user_code(code_input, user_inputs=""):
-    mock_input_obj = MockInput(user_inputs)
-    exec_globals = {'input': mock_input_obj, '__builtins__': __builtins__.copy()}
-    exec_globals['__builtins__']['input'] = mock_input_obj
-
-    try:
-        with stdout_capture() as captured_output:
-            exec(code_input, exec_globals)
-        return captured_output.getvalue(), None
-    except Exception as e:
-        return None, str(e)
-
-def normalize_output(output):
-    """출력을 정규화하여 비교 (공백 제거, 줄바꿈 정리)"""
-    if output is None:
-        return ""
-    return output.strip().replace('\r\n', '\n').replace('\r', '\n')
-
-def run_test_cases(user_code, test_cases):
-    """여러 테스트 케이스를 실행하고 결과를 반환"""
-    results = []
-    all_passed = True
-    
-    for i, test_case in enumerate(test_cases):
-        test_input = test_case.get('input', '')
-        expected_output = normalize_output(test_case.get('output', ''))
-        
-        # 코드 실행
-        output, error = execute_user_code(user_code, test_input)
-        
-        if error:
-            results.append({
-                'test_num': i + 1,
-                'passed': False,
-                'error': error,
-                'input': test_input,
-                'expected': expected_output,
-                'actual': None
-            })
-            all_passed = False
-        else:
-            actual_output = normalize_output(output)
-            passed = (expected_output == actual_output)
-            
-            if not passed:
-                all_passed = False
-            
-            results.append({
-                'test_num': i + 1,
-                'passed': passed,
-                'input': test_input,
-                'expected': expected_output,
-                'actual': actual_output
-            })
-    
-    return all_passed, results
-
 # ==========================================
 # 4. 결과 리포트 화면
 # ==========================================
@@ -286,7 +227,7 @@ def main():
                 st.session_state['start_time'] = datetime.now().strftime("%H:%M:%S")
                 st.session_state['test_finished'] = False
                 st.session_state['selected_problems'] = {}  # 새 테스트 시작 시 문제 목록 초기화
-                save_results()
+                save_results(event={"type": "start", "start_time": st.session_state['start_time']})
                 st.rerun()
             else:
                 st.warning("이름을 입력해주세요.")
@@ -306,7 +247,7 @@ def main():
         st.caption(f"시작: {st.session_state['start_time']}")
     with col_info3:
         if st.button("💾 중간 저장"):
-            save_results()
+            save_results(event={"type": "save"}, wait=True)
             st.toast("저장 완료")
 
     st.markdown("---")
@@ -366,17 +307,11 @@ def main():
     if st.sidebar.button("🛑 테스트 종료 및 제출", type="primary", help="평가를 마치고 결과를 확인합니다."):
         st.session_state['end_time'] = datetime.now().strftime("%H:%M:%S")
         st.session_state['test_finished'] = True
-        save_results(final=True)
+        save_results(final=True, event={"type": "finish", "end_time": st.session_state['end_time']})
         st.rerun()
 
     # 문제 로드
-    data = load_problem_data(selected_chapter, chapter_idx)
-    current_problem = None
-    if data and "problems" in data:
-        for p in data["problems"]:
-            if p["id"] == problem_number:
-                current_problem = p
-                break
+    current_problem = load_problem(chapter_idx, problem_number)
     
     if not current_problem:
         st.error("문제를 불러올 수 없습니다.")
@@ -474,10 +409,19 @@ def main():
             
             # test_cases가 있으면 자동 채점, 없으면 기존 방식
             if test_cases:
-                all_passed, test_results = run_test_cases(user_code, test_cases)
+                all_passed, test_results = run_test_cases(user_code, test_cases,
+                                                          parallel=GRADING_PARALLEL, fail_fast=GRADING_FAIL_FAST,
+                                                          problem_key=prob_key,
+                                                          checker=current_problem.get('checker'))
                 
                 # 테스트 결과 표시
                 for result in test_results:
+                    if result.get('syntax_error'):
+                        st.error(f"문법 오류: {result['error']}")
+                        continue
+                    if result.get('skipped'):
+                        st.caption(f"테스트 케이스 {result['test_num']} ⏭️ 건너뜀 (앞선 케이스 실패)")
+                        continue
                     with st.expander(f"테스트 케이스 {result['test_num']} {'✅ 통과' if result['passed'] else '❌ 실패'}", expanded=not result['passed']):
                         if result.get('error'):
                             st.error(f"에러: {result['error']}")
@@ -492,7 +436,13 @@ def main():
                                 st.text("실제 출력:")
                                 st.code(result['actual'], language="text")
                                 if not result['passed']:
-                                    st.warning("❌ 출력이 일치하지 않습니다.")
+                                    mismatch = result.get('mismatch')
+                                    where = f" ({mismatch['line']}번째 줄 {mismatch['col']}번째 글자부터 다름)" if mismatch else ""
+                                    st.warning(f"❌ 출력이 일치하지 않습니다.{where}")
+                                if result.get('checker_message'):
+                                    st.info(result['checker_message'])
+                                if result.get('output_truncated'):
+                                    st.caption("출력이 달라진 뒤에는 실행을 멈추므로 앞부분만 표시합니다.")
                 
                 # 최종 결과
                 # 제출 횟수 업데이트
@@ -504,6 +454,8 @@ def main():
                     }
                 
                 st.session_state['solve_status'][prob_key]["submissions"] += 1
+                # 마지막 제출의 실행 시간/CPU 시간/메모리/출력 크기
+                st.session_state['solve_status'][prob_key].update(summarize_case_metrics(test_results))
                 
                 if all_passed:
                     st.balloons()
@@ -511,12 +463,12 @@ def main():
                     st.session_state['solve_status'][prob_key]["status"] = "PASS"
                     if st.session_state['solve_status'][prob_key]["first_pass"] is None:
                         st.session_state['solve_status'][prob_key]["first_pass"] = st.session_state['solve_status'][prob_key]["submissions"]
-                    save_results()
+                    save_results(event=submission_event(prob_key, chapter_idx))
                 else:
                     passed_count = sum(1 for r in test_results if r['passed'])
                     st.error(f"❌ 테스트 실패: {passed_count}/{len(test_cases)} 통과")
                     st.session_state['solve_status'][prob_key]["status"] = "FAIL"
-                    save_results()
+                    save_results(event=submission_event(prob_key, chapter_idx))
                 
                 # 제출 횟수 표시
                 submissions = st.session_state['solve_status'][prob_key]["submissions"]
@@ -555,16 +507,18 @@ def main():
                         st.session_state['solve_status'][prob_key]["status"] = "PASS"
                         if st.session_state['solve_status'][prob_key]["first_pass"] is None:
                             st.session_state['solve_status'][prob_key]["first_pass"] = st.session_state['solve_status'][prob_key]["submissions"]
-                        save_results()
+                        save_results(event=submission_event(prob_key, chapter_idx))
                         submissions = st.session_state['solve_status'][prob_key]["submissions"]
                         first_pass = st.session_state['solve_status'][prob_key]["first_pass"]
                         st.info(f"✅ 정답! (제출 횟수: {submissions}회, {first_pass}회째에 정답)")
                     elif expected and expected != "-":
                         st.warning("결과가 예시와 다릅니다. 다시 확인해보세요.")
                         st.session_state['solve_status'][prob_key]["status"] = "FAIL"
-                        save_results()
+                        save_results(event=submission_event(prob_key, chapter_idx))
                         submissions = st.session_state['solve_status'][prob_key]["submissions"]
                         st.info(f"❌ 오답 (제출 횟수: {submissions}회)")
 
 if __name__ == "__main__":
-    main()
+    # 스크립트 한 번 실행(화면 다시 그리기 포함) 전체 시간
+    with timer("script_run"):
+        main()
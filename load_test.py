@@ -0,0 +1,441 @@
+"""
+교실 부하 테스트
+
+streamlit run level_test.py 프로세스 하나가 동시에 몇 명까지 버티는지 확인하기 위해,
+가상 학생 N명이 같은 프로세스 안에서(Streamlit 세션처럼 스레드 하나씩) 채점 경로를 직접 호출한다.
+문제 은행/채점 워커 풀/결과 저장 스레드는 level_test.py와 똑같이 프로세스 전체에서 공유한다.
+
+가상 학생 한 명:
+    입장(start 이벤트) -> 단원 선택, 단원마다 문제 PROBLEMS_PER_CHAPTER개 무작위 출제
+    -> 생각하는 시간(지수 분포) 뒤 제출 -> 채점 -> 제출 이벤트 저장 (가끔 중간 저장)
+    -> 시간이 끝나면 종료(finish 이벤트, 디스크에 쓸 때까지 대기)
+
+제출 종류 (--mix로 비율 조정):
+    correct   테스트 케이스를 통과하는 코드 (정답 코드가 있으면 정답 코드, 없으면 입력->출력 표)
+    wrong     틀린 출력
+    loop      무한 루프 (CPU 시간 제한까지 실행)
+    memory    메모리를 계속 늘리는 코드 (메모리 상한까지 실행)
+학생마다 코드가 조금씩 달라서 실행 결과 캐시는 같은 학생이 같은 코드를 다시 낼 때만 적중한다.
+
+보고서: 처리량(제출/초, 테스트 케이스/초), 제출/저장 지연 시간 백분위수, 종류별 지연 시간,
+이 프로세스와 채점 워커들의 CPU 사용률/RSS(/proc에서 주기적으로 측정, Linux 전용),
+latency_metrics의 단계별 지연 시간.
+
+    python load_test.py --students 40 --duration 120
+    python load_test.py --students 100 --duration 300 --think 20 --mix correct=60,wrong=30,loop=5,memory=5 \\
+        --report load_report.json
+
+결과는 기본적으로 임시 폴더에 저장하므로 results/ 의 실제 결과는 건드리지 않는다.
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import latency_metrics
+from grader import WORKER_COUNT, get_pool, get_verdict_cache_stats, run_test_cases, summarize_case_metrics
+from problem_bank import PROBLEMS_DIR, discover_chapters, get_problem_bank
+from results_store import RESULTS_DB_FILENAME, ResultsWriter
+
+PROBLEMS_PER_CHAPTER = 10  # level_test.py와 같은 출제 수
+DEFAULT_MIX = {"correct": 60, "wrong": 25, "loop": 10, "memory": 5}
+SAVE_PROBABILITY = 0.1  # 제출 후 "중간 저장"(디스크에 쓸 때까지 대기)을 누를 확률
+SAMPLE_INTERVAL = 0.5  # CPU/RSS 측정 주기 (초)
+PERCENTILES = (50, 90, 95, 99)
+
+WRONG_CODE = "print('오답')\n"
+LOOP_CODE = "n = 0\nwhile True:\n    n += 1\n"
+MEMORY_CODE = "chunks = []\nwhile True:\n    chunks.append(' ' * 10**7)\n"
+
+
+# ==========================================
+# 제출 코드
+# ==========================================
+
+def lookup_solution(test_cases):
+    """입력 -> 기대 출력 표로 모든 테스트 케이스를 통과하는 코드"""
+    answers = {tc.get("input", "").strip(): tc.get("output", "") for tc in test_cases}
+    max_lines = max(len(inp.split("\n")) for inp in answers) if answers else 0
+    return (
+        f"answers = {answers!r}\n"
+        f"lines = [input() for _ in range({max_lines})]\n"
+        "print(answers.get('\\n'.join(lines).strip(), ''))\n"
+    )
+
+
+def submission_code(kind, problem, student_id):
+    """제출 종류별 코드 (학생마다 다른 코드가 되도록 학생 번호를 넣는다)"""
+    if kind == "correct":
+        code = problem.get("reference_solution") or lookup_solution(problem.get("test_cases") or [])
+    elif kind == "wrong":
+        code = WRONG_CODE
+    elif kind == "loop":
+        code = LOOP_CODE
+    else:
+        code = MEMORY_CODE
+    return f"student = {student_id}\n{code}"
+
+
+# ==========================================
+# 가상 학생
+# ==========================================
+
+class LoadStats:
+    """가상 학생들이 함께 기록하는 측정값"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.submit_latency = []  # (종류, 채점 시간)
+        self.save_latency = []  # 중간 저장(flush 대기) 시간
+        self.record_latency = []  # 제출 이벤트 기록(대기열에 넣기) 시간
+        self.test_cases = 0
+        self.passed = 0
+        self.errors = []
+
+    def add_submission(self, kind, seconds, case_count, all_passed):
+        with self.lock:
+            self.submit_latency.append((kind, seconds))
+            self.test_cases += case_count
+            self.passed += int(all_passed)
+
+
+class VirtualStudent(threading.Thread):
+    def __init__(self, student_id, args, bank, chapter_names, writer, stats, deadline, start_delay):
+        super().__init__(name=f"student-{student_id}", daemon=True)
+        self.student_id = student_id
+        self.args = args
+        self.bank = bank
+        self.chapter_names = chapter_names
+        self.writer = writer
+        self.stats = stats
+        self.deadline = deadline
+        self.start_delay = start_delay
+        self.rng = random.Random(f"{args.seed}:{student_id}")
+        self.kinds, self.weights = zip(*args.mix.items())
+        self.snapshot = None
+        self.submissions = 0
+
+    def run(self):
+        try:
+            time.sleep(self.start_delay)
+            self.login()
+            while time.monotonic() < self.deadline:
+                if not self.think():
+                    break
+                self.submit()
+            self.finish()
+        except Exception as e:
+            with self.stats.lock:
+                self.stats.errors.append(f"{self.name}: {type(e).__name__}: {e}")
+
+    def think(self):
+        """생각하는 시간만큼 기다린다 (끝나기 전에 시험 시간이 지나면 False)"""
+        pause = self.rng.expovariate(1 / self.args.think) if self.args.think > 0 else 0
+        remaining = self.deadline - time.monotonic()
+        time.sleep(max(0.0, min(pause, remaining)))
+        return pause < remaining
+
+    def login(self):
+        now = datetime.now()
+        self.snapshot = {
+            "user_name": f"가상학생{self.student_id:04d}",
+            "date": now.strftime("%Y-%m-%d"),
+            "start_time": now.strftime("%H:%M:%S"),
+            "end_time": None,
+            "last_updated": now.strftime("%H:%M:%S"),
+            "is_finished": False,
+            "solve_status": {},
+            "selected_problems": {},
+            "exit_logs": [],
+        }
+        self.record({"type": "start", "start_time": self.snapshot["start_time"]})
+
+    def record(self, event, wait=False):
+        self.snapshot["last_updated"] = datetime.now().strftime("%H:%M:%S")
+        started = time.perf_counter()
+        self.writer.record(self.snapshot, event)
+        if wait:
+            self.writer.flush()
+        elapsed = time.perf_counter() - started
+        with self.stats.lock:
+            (self.stats.save_latency if wait else self.stats.record_latency).append(elapsed)
+
+    def pick_problem(self):
+        """단원을 고르고, 처음 고른 단원이면 level_test.py처럼 문제를 무작위로 출제"""
+        chapter_index = self.rng.choice(list(self.chapter_names))
+        selected = self.snapshot["selected_problems"]
+        if str(chapter_index) not in selected:
+            chapter = self.bank.get_chapter(chapter_index) or {"problems": []}
+            ids = [p["id"] for p in chapter["problems"] if p.get("test_cases")]
+            selected[str(chapter_index)] = sorted(self.rng.sample(ids, min(PROBLEMS_PER_CHAPTER, len(ids))))
+        if not selected[str(chapter_index)]:
+            return chapter_index, None
+        problem_id = self.rng.choice(selected[str(chapter_index)])
+        return chapter_index, self.bank.get_problem(chapter_index, problem_id)
+
+    def submit(self):
+        chapter_index, problem = self.pick_problem()
+        if problem is None:
+            return
+        kind = self.rng.choices(self.kinds, self.weights)[0]
+        code = submission_code(kind, problem, self.student_id)
+        prob_key = f"{chapter_index}_{problem['id']}"
+
+        started = time.perf_counter()
+        all_passed, results = run_test_cases(code, problem["test_cases"], parallel=True,
+                                             problem_key=prob_key, checker=problem.get("checker"))
+        self.stats.add_submission(kind, time.perf_counter() - started, len(results), all_passed)
+
+        status = self.snapshot["solve_status"].setdefault(
+            prob_key, {"status": "FAIL", "submissions": 0, "first_pass": None})
+        status["submissions"] += 1
+        status.update(summarize_case_metrics(results))
+        if all_passed:
+            status["status"] = "PASS"
+            if status["first_pass"] is None:
+                status["first_pass"] = status["submissions"]
+        else:
+            status["status"] = "FAIL"
+        self.submissions += 1
+        self.record({"type": "submission", "key": prob_key, "chapter": chapter_index,
+                     "selected": self.snapshot["selected_problems"][str(chapter_index)], **status})
+        if self.rng.random() < SAVE_PROBABILITY:
+            self.record({"type": "save"}, wait=True)
+
+    def finish(self):
+        self.snapshot["end_time"] = datetime.now().strftime("%H:%M:%S")
+        self.snapshot["is_finished"] = True
+        self.record({"type": "finish", "end_time": self.snapshot["end_time"]}, wait=True)
+
+
+# ==========================================
+# CPU / RSS 측정 (/proc, Linux 전용)
+# ==========================================
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _proc_stat(pid):
+    """(부모 pid, CPU 시간(초), RSS(바이트)) 또는 None"""
+    try:
+        with open(f"/proc/{pid}/stat", "rb") as f:
+            fields = f.read().rsplit(b")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    # fields[0]이 state(3번째 필드)
+    ppid, utime, stime, rss = int(fields[1]), int(fields[11]), int(fields[12]), int(fields[21])
+    return ppid, (utime + stime) / _CLOCK_TICKS, rss * _PAGE_SIZE
+
+
+class ResourceSampler(threading.Thread):
+    """이 프로세스와 자식 프로세스(채점 워커)의 CPU 사용률과 RSS를 주기적으로 측정"""
+
+    def __init__(self, interval=SAMPLE_INTERVAL):
+        super().__init__(name="resource-sampler", daemon=True)
+        self.interval = interval
+        self.samples = []  # (시각, CPU 코어 사용량, 메인 RSS, 워커 RSS 합, 워커 수)
+        self._stop_event = threading.Event()
+        self._cpu = {}  # pid -> 마지막 CPU 시간
+        self._dead_cpu = 0.0  # 종료된 워커가 쓴 CPU 시간
+
+    def _measure(self):
+        me = os.getpid()
+        stats = {}
+        for name in os.listdir("/proc"):
+            if name.isdigit():
+                stat = _proc_stat(int(name))
+                if stat is not None and (int(name) == me or stat[0] == me):
+                    stats[int(name)] = stat
+        for pid in set(self._cpu) - set(stats):
+            self._dead_cpu += self._cpu.pop(pid)
+        for pid, (_, cpu, _) in stats.items():
+            self._cpu[pid] = cpu
+        main_rss = stats[me][2] if me in stats else 0
+        worker_rss = sum(rss for pid, (_, _, rss) in stats.items() if pid != me)
+        return sum(self._cpu.values()) + self._dead_cpu, main_rss, worker_rss, len(stats) - 1
+
+    def run(self):
+        last_time, (last_cpu, *_) = time.monotonic(), self._measure()
+        while not self._stop_event.wait(self.interval):
+            now = time.monotonic()
+            cpu, main_rss, worker_rss, workers = self._measure()
+            self.samples.append((now, (cpu - last_cpu) / (now - last_time), main_rss, worker_rss, workers))
+            last_time, last_cpu = now, cpu
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+    def summary(self):
+        if not self.samples:
+            return {}
+        cores = [s[1] for s in self.samples]
+        total_rss = [s[2] + s[3] for s in self.samples]
+        mb = 1024 * 1024
+        return {
+            "cpu_cores_mean": round(sum(cores) / len(cores), 2),
+            "cpu_cores_max": round(max(cores), 2),
+            "cpu_count": os.cpu_count(),
+            "main_rss_mb_max": round(max(s[2] for s in self.samples) / mb, 1),
+            "worker_rss_mb_max": round(max(s[3] for s in self.samples) / mb, 1),
+            "total_rss_mb_mean": round(sum(total_rss) / len(total_rss) / mb, 1),
+            "total_rss_mb_max": round(max(total_rss) / mb, 1),
+            "workers_max": max(s[4] for s in self.samples),
+        }
+
+
+# ==========================================
+# 보고서
+# ==========================================
+
+def percentiles(values):
+    """{"count", "mean", "p50", ..., "max"} (밀리초, 정렬 후 최근접 순위)"""
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+    result = {"count": len(values), "mean": round(sum(values) / len(values) * 1000, 1)}
+    for p in PERCENTILES:
+        result[f"p{p}"] = round(values[min(len(values) - 1, int(len(values) * p / 100))] * 1000, 1)
+    result["max"] = round(values[-1] * 1000, 1)
+    return result
+
+
+def build_report(args, stats, sampler, elapsed):
+    submit = [seconds for _, seconds in stats.submit_latency]
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "config": {
+            "students": args.students, "duration": args.duration, "ramp_up": args.ramp_up,
+            "think": args.think, "mix": args.mix, "seed": args.seed, "grader_workers": WORKER_COUNT,
+        },
+        "elapsed": round(elapsed, 2),
+        "throughput": {
+            "submissions_per_sec": round(len(submit) / elapsed, 2),
+            "test_cases_per_sec": round(stats.test_cases / elapsed, 2),
+            "submissions": len(submit),
+            "passed": stats.passed,
+        },
+        "latency_ms": {
+            "submit": percentiles(submit),
+            "by_kind": {kind: percentiles([s for k, s in stats.submit_latency if k == kind]) for kind in args.mix},
+            "record_event": percentiles(stats.record_latency),
+            "save_wait": percentiles(stats.save_latency),
+        },
+        "resources": sampler.summary(),
+        "stages_ms": latency_metrics.REGISTRY.summary()["stages"],
+        "verdict_cache": get_verdict_cache_stats(),
+        "errors": stats.errors[:20],
+    }
+
+
+def print_report(report):
+    t = report["throughput"]
+    print(f"\n== 결과 ({report['elapsed']}초) ==")
+    print(f"처리량: 제출 {t['submissions_per_sec']}/초, 테스트 케이스 {t['test_cases_per_sec']}/초 "
+          f"(제출 {t['submissions']}회, 정답 {t['passed']}회)")
+
+    def line(label, p):
+        if not p.get("count"):
+            return f"  {label:<14} -"
+        return (f"  {label:<14} n={p['count']:<6} 평균 {p['mean']:>8.1f}  p50 {p['p50']:>8.1f}  "
+                f"p95 {p['p95']:>8.1f}  p99 {p['p99']:>8.1f}  최대 {p['max']:>8.1f}")
+
+    latency = report["latency_ms"]
+    print("지연 시간 (ms):")
+    print(line("채점", latency["submit"]))
+    for kind, p in latency["by_kind"].items():
+        print(line(f" - {kind}", p))
+    print(line("이벤트 기록", latency["record_event"]))
+    print(line("중간 저장", latency["save_wait"]))
+    r = report["resources"]
+    if r:
+        print(f"CPU: 평균 {r['cpu_cores_mean']}코어, 최대 {r['cpu_cores_max']}코어 (코어 {r['cpu_count']}개) / "
+              f"RSS: 메인 최대 {r['main_rss_mb_max']}MB, 워커 합 최대 {r['worker_rss_mb_max']}MB "
+              f"(워커 최대 {r['workers_max']}개)")
+    if report["errors"]:
+        print(f"오류 {len(report['errors'])}건: {report['errors'][0]}")
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        kind = kind.strip()
+        if kind not in DEFAULT_MIX:
+            raise argparse.ArgumentTypeError(f"알 수 없는 제출 종류: {kind} (가능: {', '.join(DEFAULT_MIX)})")
+        mix[kind] = float(weight or 1)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가상 학생으로 채점 경로 부하 테스트")
+    parser.add_argument("--students", type=int, default=30, help="동시 접속 가상 학생 수")
+    parser.add_argument("--duration", type=float, default=60, help="시험 시간 (초)")
+    parser.add_argument("--ramp-up", type=float, default=10, help="모든 학생이 입장하기까지 걸리는 시간 (초)")
+    parser.add_argument("--think", type=float, default=5, help="제출 사이 평균 생각하는 시간 (초, 지수 분포)")
+    parser.add_argument("--mix", type=parse_mix, default=DEFAULT_MIX,
+                        help="제출 종류 비율 (예: correct=60,wrong=25,loop=10,memory=5)")
+    parser.add_argument("--seed", type=int, default=0, help="가상 학생 행동 시드")
+    parser.add_argument("--problems-dir", default=PROBLEMS_DIR, help="문제 폴더")
+    parser.add_argument("--results-dir", default=None, help="결과 저장 폴더 (기본: 끝나면 지우는 임시 폴더)")
+    parser.add_argument("--report", default=None, help="보고서 JSON 파일")
+    args = parser.parse_args()
+
+    chapters = discover_chapters(args.problems_dir)
+    chapter_names = {idx: name for idx, name, _ in chapters}
+    if not chapter_names:
+        print(f"{args.problems_dir}: 단원 파일이 없습니다.")
+        return
+    names = [chapter_names.get(i, "") for i in range(max(chapter_names) + 1)]
+    bank = get_problem_bank(names, args.problems_dir)
+
+    results_dir = args.results_dir or tempfile.mkdtemp(prefix="load_test_")
+    writer = ResultsWriter(results_dir, os.path.join(results_dir, RESULTS_DB_FILENAME))
+
+    print(f"채점 워커 {WORKER_COUNT}개 준비 중...")
+    get_pool()
+    print(f"가상 학생 {args.students}명, {args.duration:g}초 (입장 {args.ramp_up:g}초, 생각 평균 {args.think:g}초), "
+          f"제출 비율 {args.mix}")
+
+    stats = LoadStats()
+    sampler = ResourceSampler()
+    sampler.start()
+    started = time.monotonic()
+    deadline = started + args.duration
+    students = [
+        VirtualStudent(i, args, bank, chapter_names, writer, stats, deadline,
+                       args.ramp_up * i / max(1, args.students))
+        for i in range(args.students)
+    ]
+    for student in students:
+        student.start()
+
+    try:
+        while any(s.is_alive() for s in students):
+            time.sleep(5)
+            elapsed = time.monotonic() - started
+            with stats.lock:
+                done = len(stats.submit_latency)
+            print(f"  {elapsed:6.1f}초: 제출 {done}회 ({done / elapsed:.1f}/초)", flush=True)
+    except KeyboardInterrupt:
+        print("\n중단: 지금까지의 결과로 보고서를 만듭니다.")
+
+    elapsed = time.monotonic() - started
+    sampler.stop()
+    report = build_report(args, stats, sampler, elapsed)
+    print_report(report)
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"보고서 저장: {args.report}")
+    if args.results_dir is None:
+        shutil.rmtree(results_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,329 @@
+"""
+문제 은행
+
+problems/ 의 단원별 JSON 파일을 프로세스 전체에서 한 번만 읽어
+(단원 인덱스, 문제 번호)로 바로 찾을 수 있게 색인한다.
+파일이 바뀐 단원(mtime/크기 변경)만 다시 읽는다.
+반환하는 문제 dict는 여러 세션이 공유하므로 읽기 전용으로 사용해야 한다.
+
+패킹된 문제 은행 (problems/problems.bank):
+    python problem_bank.py build
+로 모든 단원 JSON을 파일 하나로 묶어두고 PROBLEM_BANK_PACKED=1 로 실행하면, 파일을 mmap 하고
+(단원, 문제 번호) 오프셋 테이블로 필요한 문제만 그때그때 디코딩한다.
+문제를 조회할 때마다 압축을 풀고 JSON을 디코딩하므로 메모리 대신 조회 시간을 쓴다
+(메모리에 올린 ProblemBank보다 수십 배 느리다). 그래서 기본값은 JSON 문제 은행이고,
+메모리가 부족한 서버에서만 켠다.
+JSON을 수정한 뒤에는 다시 build 해야 하며, 실행 중에도 단원 JSON이 패킹 파일보다
+새로워지면 다시 build 할 때까지 JSON 문제 은행으로 넘어간다.
+
+패킹 파일 형식 (리틀 엔디언):
+    헤더        magic "PYPB", version(u16), 단원 수(u16), 문제 수(u32)
+    단원 이름   단원마다 길이(u16) + UTF-8 이름
+    오프셋 표   문제마다 (단원 u16, 문제 번호 u32, 오프셋 u64, 길이 u32), (단원, 번호) 순 정렬
+    레코드      문제마다 zlib 압축된 compact JSON
+"""
+import glob
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+
+PROBLEMS_DIR = "problems"
+PACKED_BANK_FILENAME = "problems.bank"
+RELOAD_CHECK_INTERVAL = 1.0  # 파일 변경 여부를 확인하는 최소 간격 (초)
+USE_PACKED_BANK = os.getenv("PROBLEM_BANK_PACKED", "") not in ("", "0")  # 패킹된 문제 은행 사용 여부
+
+PACK_MAGIC = b"PYPB"
+PACK_VERSION = 1
+_HEADER = struct.Struct("<4sHHI")
+_NAME_LEN = struct.Struct("<H")
+_ENTRY = struct.Struct("<HIQI")
+
+
+def chapter_filename(chapter_index, chapter_name):
+    return f"{chapter_index+1:02d}_{chapter_name}.json"
+
+
+class _Chapter:
+    def __init__(self, path):
+        self.path = path
+        self.signature = None  # (mtime_ns, size)
+        self.checked_at = 0.0
+        self.data = None
+        self.problems = {}  # problem_id -> problem dict
+
+
+class ProblemBank:
+    """단원별 문제 파일을 메모리에 올려두고 (단원, 문제 번호)로 조회"""
+
+    def __init__(self, chapter_names, problems_dir=PROBLEMS_DIR):
+        self.problems_dir = problems_dir
+        self._lock = threading.Lock()
+        self._chapters = [
+            _Chapter(os.path.join(problems_dir, chapter_filename(idx, name)))
+            for idx, name in enumerate(chapter_names)
+        ]
+        for idx in range(len(self._chapters)):
+            self._refresh(idx, force=True)
+
+    def _refresh(self, chapter_index, force=False):
+        chapter = self._chapters[chapter_index]
+        now = time.monotonic()
+        if not force and now - chapter.checked_at < RELOAD_CHECK_INTERVAL:
+            return chapter
+        with self._lock:
+            chapter.checked_at = now
+            try:
+                stat = os.stat(chapter.path)
+            except OSError:
+                chapter.signature, chapter.data, chapter.problems = None, None, {}
+                return chapter
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == chapter.signature:
+                return chapter
+            try:
+                with open(chapter.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                # 저장 도중인 파일이면 다음 확인 때 다시 읽는다
+                chapter.checked_at = 0.0
+                return chapter
+            chapter.signature = signature
+            chapter.data = data
+            chapter.problems = {p["id"]: p for p in data.get("problems", []) if "id" in p}
+        return chapter
+
+    def get_chapter(self, chapter_index):
+        """단원 전체 데이터 ({"chapter_name", "problems"}) 또는 None"""
+        if not 0 <= chapter_index < len(self._chapters):
+            return None
+        return self._refresh(chapter_index).data
+
+    def get_problem(self, chapter_index, problem_id):
+        """문제 하나 (없으면 None)"""
+        if not 0 <= chapter_index < len(self._chapters):
+            return None
+        return self._refresh(chapter_index).problems.get(problem_id)
+
+
+# ==========================================
+# 패킹된 문제 은행
+# ==========================================
+
+def parse_chapter_filename(path):
+    """"NN_단원명.json" -> (단원 인덱스, 단원명), 형식이 다르면 None"""
+    match = re.match(r"(\d+)_(.+)\.json$", os.path.basename(path))
+    if match:
+        return int(match.group(1)) - 1, match.group(2)
+    return None
+
+def discover_chapters(problems_dir=PROBLEMS_DIR):
+    """problems/ 의 "NN_단원명.json" 파일에서 [(단원 인덱스, 단원명, 경로)] 목록을 만든다"""
+    chapters = []
+    for path in sorted(glob.glob(os.path.join(problems_dir, "*.json"))):
+        parsed = parse_chapter_filename(path)
+        if parsed:
+            chapters.append((*parsed, path))
+    return chapters
+
+
+def build_packed_bank(problems_dir=PROBLEMS_DIR, output_path=None):
+    """단원 JSON 파일들을 패킹 파일 하나로 묶는다 (임시 파일에 쓴 뒤 원자적으로 교체)"""
+    output_path = output_path or os.path.join(problems_dir, PACKED_BANK_FILENAME)
+    chapters = discover_chapters(problems_dir)
+    chapter_count = max((idx for idx, _, _ in chapters), default=-1) + 1
+    names = [""] * chapter_count
+
+    records = []  # (단원, 문제 번호, 압축된 레코드)
+    for idx, name, path in chapters:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        names[idx] = data.get("chapter_name", name)
+        for problem in data.get("problems", []):
+            encoded = json.dumps(problem, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            records.append((idx, problem["id"], zlib.compress(encoded, 9)))
+    records.sort(key=lambda r: (r[0], r[1]))
+
+    header = _HEADER.pack(PACK_MAGIC, PACK_VERSION, chapter_count, len(records))
+    name_table = b"".join(_NAME_LEN.pack(len(n.encode("utf-8"))) + n.encode("utf-8") for n in names)
+    offset = len(header) + len(name_table) + _ENTRY.size * len(records)
+    entries = []
+    for idx, pid, blob in records:
+        entries.append(_ENTRY.pack(idx, pid, offset, len(blob)))
+        offset += len(blob)
+
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(name_table)
+        f.write(b"".join(entries))
+        for _, _, blob in records:
+            f.write(blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_path)
+    return output_path, len(records)
+
+
+class _PackView:
+    """mmap된 패킹 파일 하나에 대한 읽기 전용 뷰 (재빌드 시 통째로 교체)"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.signature = (os.fstat(f.fileno()).st_mtime_ns, os.fstat(f.fileno()).st_size)
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, chapter_count, self.count = _HEADER.unpack_from(self.mm, 0)
+        if magic != PACK_MAGIC or version != PACK_VERSION:
+            self.mm.close()
+            raise ValueError(f"지원하지 않는 문제 은행 파일입니다: {path}")
+
+        pos = _HEADER.size
+        self.chapter_names = []
+        for _ in range(chapter_count):
+            (length,) = _NAME_LEN.unpack_from(self.mm, pos)
+            pos += _NAME_LEN.size
+            self.chapter_names.append(self.mm[pos:pos + length].decode("utf-8"))
+            pos += length
+        self.table_pos = pos
+
+    def entry(self, i):
+        return _ENTRY.unpack_from(self.mm, self.table_pos + i * _ENTRY.size)
+
+    def lower_bound(self, chapter_index, problem_id):
+        lo, hi = 0, self.count
+        target = (chapter_index, problem_id)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.entry(mid)[:2] < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def decode(self, offset, length):
+        return json.loads(zlib.decompress(self.mm[offset:offset + length]).decode("utf-8"))
+
+
+class PackedProblemBank:
+    """패킹 파일을 mmap 해서 문제를 필요할 때만 디코딩하는 문제 은행
+
+    problems_dir를 주면 확인할 때마다 단원 JSON이 패킹 파일보다 새로운지도 보고,
+    그렇다면 다시 build 될 때까지 JSON 문제 은행(ProblemBank)으로 조회한다.
+    """
+
+    def __init__(self, path, problems_dir=None):
+        self.path = path
+        self.problems_dir = problems_dir
+        self._lock = threading.Lock()
+        self._view = _PackView(path)
+        self._fallback = None  # 패킹 파일이 오래되었을 때 쓰는 ProblemBank
+        self.checked_at = 0.0
+
+    def _refresh(self):
+        """지금 조회에 쓸 패킹 뷰 (패킹 파일이 오래되었으면 None)"""
+        now = time.monotonic()
+        if now - self.checked_at >= RELOAD_CHECK_INTERVAL:
+            with self._lock:
+                self.checked_at = now
+                try:
+                    stat = os.stat(self.path)
+                    if (stat.st_mtime_ns, stat.st_size) != self._view.signature:
+                        # 이전 뷰는 사용 중인 스레드가 끝나면 GC가 정리한다
+                        self._view = _PackView(self.path)
+                except (OSError, ValueError):
+                    pass
+                if self.problems_dir is not None:
+                    if _packed_bank_is_fresh(self.path, self._view.chapter_names, self.problems_dir):
+                        self._fallback = None
+                    elif self._fallback is None:
+                        self._fallback = ProblemBank(self._view.chapter_names, self.problems_dir)
+        return self._view if self._fallback is None else None
+
+    @property
+    def chapter_names(self):
+        return self._view.chapter_names
+
+    def get_problem(self, chapter_index, problem_id):
+        """문제 하나 (없으면 None) - 오프셋 표를 이진 탐색한 뒤 그 레코드만 디코딩"""
+        view = self._refresh()
+        if view is None:
+            return self._fallback.get_problem(chapter_index, problem_id)
+        i = view.lower_bound(chapter_index, problem_id)
+        if i < view.count:
+            chapter, pid, offset, length = view.entry(i)
+            if (chapter, pid) == (chapter_index, problem_id):
+                return view.decode(offset, length)
+        return None
+
+    def get_chapter(self, chapter_index):
+        """단원 전체 데이터 ({"chapter_name", "problems"}) 또는 None"""
+        view = self._refresh()
+        if view is None:
+            return self._fallback.get_chapter(chapter_index)
+        if not 0 <= chapter_index < len(view.chapter_names):
+            return None
+        problems = []
+        i = view.lower_bound(chapter_index, 0)
+        while i < view.count:
+            chapter, _, offset, length = view.entry(i)
+            if chapter != chapter_index:
+                break
+            problems.append(view.decode(offset, length))
+            i += 1
+        return {"chapter_name": view.chapter_names[chapter_index], "problems": problems}
+
+
+def _packed_bank_is_fresh(packed_path, chapter_names, problems_dir):
+    try:
+        packed_mtime = os.stat(packed_path).st_mtime_ns
+    except OSError:
+        return False
+    for idx, name in enumerate(chapter_names):
+        try:
+            if os.stat(os.path.join(problems_dir, chapter_filename(idx, name))).st_mtime_ns > packed_mtime:
+                return False
+        except OSError:
+            continue
+    return True
+
+
+_banks = {}
+_banks_lock = threading.Lock()
+
+
+def get_problem_bank(chapter_names, problems_dir=PROBLEMS_DIR, packed=None):
+    """프로세스 전체에서 공유하는 문제 은행 (Streamlit rerun 사이에도 유지)
+
+    기본은 JSON 기반 ProblemBank. packed(기본 PROBLEM_BANK_PACKED)가 켜져 있고 최신 패킹 파일이 있으면
+    PackedProblemBank를 쓴다 (실행 중 JSON이 바뀌면 JSON으로 넘어간다).
+    """
+    if packed is None:
+        packed = USE_PACKED_BANK
+    key = (os.path.abspath(problems_dir), tuple(chapter_names), bool(packed))
+    with _banks_lock:
+        bank = _banks.get(key)
+        if bank is None:
+            packed_path = os.path.join(problems_dir, PACKED_BANK_FILENAME)
+            if packed and _packed_bank_is_fresh(packed_path, chapter_names, problems_dir):
+                bank = PackedProblemBank(packed_path, problems_dir)
+            else:
+                bank = ProblemBank(chapter_names, problems_dir)
+            _banks[key] = bank
+        return bank
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "build":
+        print("사용법: python problem_bank.py build [출력 파일]")
+        return
+    output_path = sys.argv[2] if len(sys.argv) > 2 else None
+    path, count = build_packed_bank(PROBLEMS_DIR, output_path)
+    print(f"패킹 완료: {path} ({count}문제, {os.path.getsize(path) / 1024:.1f} KB)")
+
+if __name__ == "__main__":
+    main()
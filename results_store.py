@@ -0,0 +1,533 @@
+"""
+결과 저장소
+
+save_results 호출마다 결과 파일 전체를 다시 쓰지 않고,
+세션별 이벤트 로그(results/{날짜}_{이름}_events.jsonl)에 한 줄씩 추가한 뒤
+주기적으로 스냅샷 파일(results/{날짜}_{이름}_result.json)로 합친다(compaction).
+
+- 쓰기는 백그라운드 스레드가 묶어서 처리하므로 요청 처리 중에는 디스크를 기다리지 않는다.
+- 스냅샷은 임시 파일에 쓴 뒤 os.replace 로 교체하므로 중간에 죽어도 깨진 파일이 남지 않는다.
+- 스냅샷에는 마지막으로 반영한 이벤트 번호(event_seq)가 들어 있어, 비정상 종료 후
+  다음 실행 때 스냅샷 이후의 이벤트를 다시 적용해 복구한다.
+- 스냅샷 교체가 디스크에 반영되면 이벤트 로그를 비우므로 로그는 마지막 합치기 이후의 이벤트만 담는다
+  (이벤트 번호는 스냅샷의 event_seq부터 이어서 매긴다).
+
+SQLite 저장소 (results/results.db, WAL 모드):
+  ResultsWriter에 db_path를 주면 같은 배치에서 세션/출제 문제/제출/이탈 기록을
+  DB에도 반영한다. admin.py는 파일을 하나씩 읽는 대신 이 DB를 조회한다.
+  기존 results/*_result.json 파일은 DB를 처음 만들 때 자동으로 가져오며,
+      python results_store.py import
+  로 언제든 다시 가져올 수 있다.
+  제출 기록의 실행 지표(SUBMISSION_METRICS) 열이 없는 예전 DB는 열면서 열을 추가한다.
+"""
+import atexit
+import copy
+import glob
+import json
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+
+from file_io import fsync_dir, read_jsonl, write_json_atomic
+from latency_metrics import timer
+
+RESULTS_DIR = "results"
+RESULTS_DB_FILENAME = "results.db"
+FLUSH_INTERVAL = 0.5  # 이벤트 로그를 디스크에 쓰는 주기 (초)
+COMPACT_DELAY = 5.0  # 마지막 이벤트 후 스냅샷으로 합치기까지 기다리는 시간 (초)
+MAX_COMPACT_DELAY = 30.0  # 이벤트가 계속 들어와도 이 시간 안에는 스냅샷을 갱신
+
+EVENTS_SUFFIX = "_events.jsonl"
+RESULT_SUFFIX = "_result.json"
+
+# solve_status 항목에 함께 저장하는 마지막 제출의 실행 지표 (grader.summarize_case_metrics)
+SUBMISSION_METRICS = {
+    "wall_time": "REAL",  # 테스트 케이스 실행 시간 합 (초)
+    "cpu_time": "REAL",  # CPU 시간 합 (초)
+    "peak_memory_kb": "INTEGER",  # 최대 메모리 (KB)
+    "output_bytes": "INTEGER",  # 출력 크기 합 (바이트)
+    "max_wall_time": "REAL",  # 가장 느린 테스트 케이스의 실행 시간 (초)
+}
+
+
+def session_stem(date, user_name):
+    return f"{date}_{user_name}"
+
+
+def truncate_events(events_path):
+    """스냅샷에 모두 반영된 이벤트 로그를 비운다 (스냅샷 교체를 fsync_dir로 반영한 뒤에 부른다)"""
+    try:
+        with open(events_path, "r+b") as f:
+            f.truncate(0)
+            f.flush()
+            os.fsync(f.fileno())
+    except OSError:
+        pass
+
+
+def read_snapshot_seq(result_path):
+    """스냅샷에 반영된 마지막 이벤트 번호 (스냅샷이 없으면 0)"""
+    try:
+        with open(result_path, "r", encoding="utf-8") as f:
+            return json.load(f).get("event_seq", 0)
+    except (OSError, ValueError, AttributeError):
+        return 0
+
+
+def replay_events(snapshot, events):
+    """스냅샷에 그 이후의 이벤트를 적용한 새 스냅샷을 반환"""
+    data = copy.deepcopy(snapshot) if snapshot else {
+        "user_name": None,
+        "date": None,
+        "start_time": None,
+        "end_time": None,
+        "last_updated": None,
+        "is_finished": False,
+        "solve_status": {},
+        "selected_problems": {},
+        "exit_logs": [],
+    }
+    last_seq = data.get("event_seq", 0)
+    for event in events:
+        if event.get("seq", 0) <= last_seq:
+            continue
+        last_seq = event["seq"]
+        kind = event.get("type")
+        data["user_name"] = event.get("user_name", data["user_name"])
+        data["date"] = event.get("date", data["date"])
+        data["last_updated"] = event.get("time", data["last_updated"])
+        if kind == "start":
+            data["start_time"] = event.get("start_time")
+            data["end_time"] = None
+            data["is_finished"] = False
+            data["solve_status"] = {}
+            data["selected_problems"] = {}
+        elif kind == "submission":
+            data["solve_status"][event["key"]] = {
+                "status": event["status"],
+                "submissions": event["submissions"],
+                "first_pass": event.get("first_pass"),
+                **{name: event[name] for name in SUBMISSION_METRICS if name in event},
+            }
+            if "chapter" in event and "selected" in event:
+                data["selected_problems"][str(event["chapter"])] = event["selected"]
+        elif kind == "exit":
+            data["exit_logs"].append(event.get("time"))
+        elif kind == "finish":
+            data["end_time"] = event.get("end_time")
+            data["is_finished"] = True
+    data["event_seq"] = last_seq
+    return data
+
+
+def recover_snapshots(results_dir=RESULTS_DIR):
+    """스냅샷보다 앞선 이벤트가 남아 있는 세션을 찾아 스냅샷을 다시 만들고 로그를 비운다
+
+    비어 있는 로그는 열지 않으므로 시작 비용은 마지막 합치기 이후에 남은 이벤트 수에만 비례한다.
+    """
+    recovered = 0
+    covered = []  # 스냅샷에 모두 반영되어 비워도 되는 로그
+    for events_path in glob.glob(os.path.join(results_dir, f"*{EVENTS_SUFFIX}")):
+        try:
+            if os.path.getsize(events_path) == 0:
+                continue
+        except OSError:
+            continue
+        stem = os.path.basename(events_path)[:-len(EVENTS_SUFFIX)]
+        result_path = os.path.join(results_dir, stem + RESULT_SUFFIX)
+        snapshot = None
+        try:
+            with open(result_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            pass
+        events = read_jsonl(events_path)
+        if events and events[-1].get("seq", 0) > (snapshot or {}).get("event_seq", 0):
+            write_json_atomic(result_path, replay_events(snapshot, events))
+            recovered += 1
+        covered.append(events_path)
+    if covered:
+        fsync_dir(results_dir)
+        for events_path in covered:
+            truncate_events(events_path)
+    return recovered
+
+
+# ==========================================
+# SQLite 저장소
+# ==========================================
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    user_name TEXT NOT NULL,
+    date TEXT NOT NULL,
+    start_time TEXT,
+    end_time TEXT,
+    last_updated TEXT,
+    is_finished INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (user_name, date)
+);
+CREATE TABLE IF NOT EXISTS selected_problems (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    chapter INTEGER NOT NULL,
+    problem INTEGER NOT NULL,
+    PRIMARY KEY (session_id, chapter, problem)
+);
+CREATE TABLE IF NOT EXISTS submissions (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    chapter INTEGER NOT NULL,
+    problem INTEGER NOT NULL,
+    status TEXT,
+    submissions INTEGER,
+    first_pass INTEGER,
+    wall_time REAL,
+    cpu_time REAL,
+    peak_memory_kb INTEGER,
+    output_bytes INTEGER,
+    max_wall_time REAL,
+    PRIMARY KEY (session_id, chapter, problem)
+);
+CREATE TABLE IF NOT EXISTS exit_logs (
+    session_id INTEGER NOT NULL REFERENCES sessions(id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    logged_at TEXT,
+    PRIMARY KEY (session_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_user_name ON sessions(user_name);
+CREATE INDEX IF NOT EXISTS idx_sessions_date ON sessions(date);
+CREATE INDEX IF NOT EXISTS idx_submissions_problem ON submissions(chapter, problem);
+"""
+
+
+def split_problem_key(key):
+    """"3_17" -> (3, 17), 형식이 다르면 None"""
+    parts = str(key).split("_")
+    if len(parts) != 2:
+        return None
+    try:
+        return int(parts[0]), int(parts[1])
+    except ValueError:
+        return None
+
+
+class SQLiteResultsStore:
+    """결과 스냅샷을 SQLite(WAL)에 저장하고 조회"""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """예전 DB의 submissions 표에 없는 실행 지표 열을 추가"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(submissions)")}
+        with self._conn:
+            for name, sql_type in SUBMISSION_METRICS.items():
+                if name not in columns:
+                    self._conn.execute(f"ALTER TABLE submissions ADD COLUMN {name} {sql_type}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def data_version(self):
+        """다른 연결이 커밋할 때마다 바뀌는 값 (PRAGMA data_version + 이 연결의 변경 수)"""
+        with self._lock:
+            return (self._conn.execute("PRAGMA data_version").fetchone()[0], self._conn.total_changes)
+
+    def save_snapshots(self, snapshots):
+        """스냅샷 여러 개를 한 트랜잭션으로 저장 (세션 단위로 덮어씀)"""
+        with self._lock, self._conn:
+            for data in snapshots:
+                self._save(data)
+
+    def _save(self, data):
+        conn = self._conn
+        conn.execute(
+            """INSERT INTO sessions (user_name, date, start_time, end_time, last_updated, is_finished)
+               VALUES (?, ?, ?, ?, ?, ?)
+               ON CONFLICT (user_name, date) DO UPDATE SET
+                   start_time = excluded.start_time,
+                   end_time = excluded.end_time,
+                   last_updated = excluded.last_updated,
+                   is_finished = excluded.is_finished""",
+            (data["user_name"], data["date"], data.get("start_time"), data.get("end_time"),
+             data.get("last_updated"), int(bool(data.get("is_finished")))),
+        )
+        row = conn.execute("SELECT id FROM sessions WHERE user_name = ? AND date = ?",
+                           (data["user_name"], data["date"])).fetchone()
+        session_id = row[0]
+
+        for table in ("selected_problems", "submissions", "exit_logs"):
+            conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+
+        selected_rows = []
+        for chapter, problems in (data.get("selected_problems") or {}).items():
+            if isinstance(problems, list):
+                selected_rows.extend((session_id, int(chapter), int(pid)) for pid in problems)
+        conn.executemany("INSERT OR IGNORE INTO selected_problems VALUES (?, ?, ?)", selected_rows)
+
+        submission_rows = []
+        for key, value in (data.get("solve_status") or {}).items():
+            parsed = split_problem_key(key)
+            if parsed is None:
+                continue
+            if isinstance(value, dict):
+                submission_rows.append((session_id, *parsed, value.get("status"),
+                                        value.get("submissions"), value.get("first_pass"),
+                                        *(value.get(name) for name in SUBMISSION_METRICS)))
+            else:
+                # 기존 형식 호환 ("PASS"/"FAIL" 문자열)
+                submission_rows.append((session_id, *parsed, value, None, None, *[None] * len(SUBMISSION_METRICS)))
+        columns = ["session_id", "chapter", "problem", "status", "submissions", "first_pass", *SUBMISSION_METRICS]
+        conn.executemany(f"INSERT INTO submissions ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                         submission_rows)
+
+        conn.executemany("INSERT INTO exit_logs VALUES (?, ?, ?)",
+                         [(session_id, i, log) for i, log in enumerate(data.get("exit_logs") or [])])
+
+    def load_results(self, user_name=None, date=None):
+        """결과 JSON 파일과 같은 형태의 dict 목록을 반환"""
+        where, params = [], []
+        if user_name is not None:
+            where.append("user_name = ?")
+            params.append(user_name)
+        if date is not None:
+            where.append("date = ?")
+            params.append(date)
+        where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+        with self._lock:
+            conn = self._conn
+            sessions = conn.execute(
+                f"""SELECT id, user_name, date, start_time, end_time, last_updated, is_finished
+                    FROM sessions {where_sql} ORDER BY date, user_name""", params).fetchall()
+            results = {}
+            for sid, name, day, start, end, updated, finished in sessions:
+                results[sid] = {
+                    "user_name": name,
+                    "date": day,
+                    "start_time": start,
+                    "end_time": end,
+                    "last_updated": updated,
+                    "is_finished": bool(finished),
+                    "solve_status": {},
+                    "selected_problems": {},
+                    "exit_logs": [],
+                }
+            if not results:
+                return []
+            session_filter = f"WHERE session_id IN (SELECT id FROM sessions {where_sql})"
+            for sid, chapter, problem in conn.execute(
+                    f"SELECT session_id, chapter, problem FROM selected_problems {session_filter} "
+                    "ORDER BY session_id, chapter, problem", params):
+                results[sid]["selected_problems"].setdefault(str(chapter), []).append(problem)
+            for sid, chapter, problem, status, submissions, first_pass, *metrics in conn.execute(
+                    f"SELECT session_id, chapter, problem, status, submissions, first_pass, "
+                    f"{', '.join(SUBMISSION_METRICS)} FROM submissions {session_filter}", params):
+                key = f"{chapter}_{problem}"
+                if submissions is None:
+                    results[sid]["solve_status"][key] = status
+                else:
+                    results[sid]["solve_status"][key] = {
+                        "status": status, "submissions": submissions, "first_pass": first_pass,
+                        **{name: value for name, value in zip(SUBMISSION_METRICS, metrics) if value is not None}}
+            for sid, logged_at in conn.execute(
+                    f"SELECT session_id, logged_at FROM exit_logs {session_filter} ORDER BY session_id, seq",
+                    params):
+                results[sid]["exit_logs"].append(logged_at)
+        return list(results.values())
+
+    def import_json_results(self, results_dir=RESULTS_DIR):
+        """results/*_result.json 파일을 DB로 가져온다"""
+        snapshots = []
+        for path in glob.glob(os.path.join(results_dir, f"*{RESULT_SUFFIX}")):
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if data.get("user_name") and data.get("date"):
+                snapshots.append(data)
+        self.save_snapshots(snapshots)
+        return len(snapshots)
+
+
+class _Session:
+    def __init__(self, events_path):
+        self.events_path = events_path
+        self.snapshot = None
+        self.dirty_since = None  # 스냅샷에 아직 반영되지 않은 첫 이벤트 시각
+        self.last_event_at = None
+        events = read_jsonl(events_path)
+        # 로그를 비운 뒤에도 번호가 스냅샷의 event_seq보다 작아지지 않도록 이어서 매긴다
+        self.seq = max(events[-1].get("seq", 0) if events else 0,
+                       read_snapshot_seq(events_path[:-len(EVENTS_SUFFIX)] + RESULT_SUFFIX))
+        # 비정상 종료로 마지막 줄이 잘려 있으면 새 이벤트는 다음 줄부터 쓴다
+        self.needs_newline = False
+        try:
+            with open(events_path, "rb") as f:
+                f.seek(0, os.SEEK_END)
+                if f.tell() > 0:
+                    f.seek(-1, os.SEEK_END)
+                    self.needs_newline = f.read(1) != b"\n"
+        except OSError:
+            pass
+
+
+class ResultsWriter:
+    """이벤트 로그 추가와 스냅샷 합치기를 백그라운드 스레드에서 처리"""
+
+    def __init__(self, results_dir=RESULTS_DIR, db_path=None, flush_interval=FLUSH_INTERVAL,
+                 compact_delay=COMPACT_DELAY, max_compact_delay=MAX_COMPACT_DELAY):
+        self.results_dir = results_dir
+        self.flush_interval = flush_interval
+        self.compact_delay = compact_delay
+        self.max_compact_delay = max_compact_delay
+        self.last_error = None
+        self._queue = queue.Queue()
+        self._sessions = {}
+        os.makedirs(results_dir, exist_ok=True)
+        recover_snapshots(results_dir)
+        self._db = None
+        if db_path:
+            is_new = not os.path.exists(db_path)
+            self._db = SQLiteResultsStore(db_path)
+            if is_new:
+                self._db.import_json_results(results_dir)
+        self._thread = threading.Thread(target=self._loop, name="results-writer", daemon=True)
+        self._thread.start()
+
+    def record(self, snapshot, event=None):
+        """최신 스냅샷과 이벤트 하나를 기록 대기열에 넣고 바로 반환"""
+        self._queue.put(("record", copy.deepcopy(snapshot), dict(event) if event else None))
+
+    def flush(self, timeout=10):
+        """대기 중인 이벤트를 모두 쓰고 스냅샷까지 합칠 때까지 기다린다"""
+        done = threading.Event()
+        self._queue.put(("flush", done, None))
+        if not done.wait(timeout):
+            raise TimeoutError("결과 저장이 지연되고 있습니다.")
+        if self.last_error:
+            error, self.last_error = self.last_error, None
+            raise error
+
+    def _session(self, snapshot):
+        stem = session_stem(snapshot["date"], snapshot["user_name"])
+        session = self._sessions.get(stem)
+        if session is None:
+            session = self._sessions[stem] = _Session(os.path.join(self.results_dir, stem + EVENTS_SUFFIX))
+        return stem, session
+
+    def _loop(self):
+        while True:
+            waiters = []
+            batch = {}  # stem -> [이벤트 줄]
+            touched = set()
+            try:
+                items = [self._queue.get(timeout=self.flush_interval)]
+            except queue.Empty:
+                items = []
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            now = time.monotonic()
+            for kind, payload, event in items:
+                if kind == "flush":
+                    waiters.append(payload)
+                    continue
+                stem, session = self._session(payload)
+                touched.add(stem)
+                if event is not None:
+                    session.seq += 1
+                    event.update(seq=session.seq, user_name=payload["user_name"], date=payload["date"],
+                                 time=payload.get("last_updated"))
+                    batch.setdefault(stem, []).append(json.dumps(event, ensure_ascii=False))
+                payload["event_seq"] = session.seq
+                session.snapshot = payload
+                session.last_event_at = now
+                if session.dirty_since is None:
+                    session.dirty_since = now
+
+            try:
+                with timer("results_write"):
+                    self._append_events(batch)
+                    if self._db is not None and touched:
+                        self._db.save_snapshots([self._sessions[stem].snapshot for stem in touched])
+                    self._compact(force=bool(waiters))
+            except Exception as e:
+                self.last_error = e
+            for done in waiters:
+                done.set()
+
+    def _append_events(self, batch):
+        for stem, lines in batch.items():
+            session = self._sessions[stem]
+            with open(session.events_path, "a", encoding="utf-8") as f:
+                if session.needs_newline:
+                    f.write("\n")
+                    session.needs_newline = False
+                f.write("\n".join(lines) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _compact(self, force=False):
+        now = time.monotonic()
+        compacted = []
+        for stem, session in self._sessions.items():
+            if session.dirty_since is None:
+                continue
+            idle = now - session.last_event_at >= self.compact_delay
+            overdue = now - session.dirty_since >= self.max_compact_delay
+            if force or idle or overdue:
+                write_json_atomic(os.path.join(self.results_dir, stem + RESULT_SUFFIX), session.snapshot)
+                session.dirty_since = None
+                compacted.append(session)
+        if compacted:
+            # 스냅샷이 event_seq까지 모두 담고 있으므로 교체가 디스크에 반영된 뒤 로그를 비운다
+            fsync_dir(self.results_dir)
+            for session in compacted:
+                truncate_events(session.events_path)
+                session.needs_newline = False
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_results_writer(results_dir=RESULTS_DIR, db_path=None):
+    """프로세스 전체에서 공유하는 결과 저장 스레드"""
+    key = os.path.abspath(results_dir)
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = _writers[key] = ResultsWriter(results_dir, db_path)
+            atexit.register(writer.flush)
+        return writer
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "import":
+        print("사용법: python results_store.py import [결과 폴더] [DB 파일]")
+        return
+    results_dir = sys.argv[2] if len(sys.argv) > 2 else RESULTS_DIR
+    db_path = sys.argv[3] if len(sys.argv) > 3 else os.path.join(results_dir, RESULTS_DB_FILENAME)
+    store = SQLiteResultsStore(db_path)
+    count = store.import_json_results(results_dir)
+    store.close()
+    print(f"가져오기 완료: {count}개 결과 → {db_path}")
+
+if __name__ == "__main__":
+    main()
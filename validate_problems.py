@@ -0,0 +1,141 @@
+"""
+문제 검증
+
+문제의 reference_solution(정답 코드)을 학생 코드와 같은 샌드박스 워커 풀(grader)에서
+모든 테스트 케이스에 대해 실행하고, 출력이 기대 출력과 일치하는지 확인한다.
+정답 코드가 없는 문제는 테스트 케이스 구조만 검사한다.
+
+검증 결과 (status):
+    ok            정답 코드가 모든 테스트 케이스를 통과
+    no_solution   정답 코드가 없어 실행 검증을 하지 못함 (구조는 정상)
+    no_test_cases 테스트 케이스가 없음
+    placeholder   입력/출력이 모두 빈 기본 템플릿 테스트 케이스
+    syntax_error  정답 코드 문법 오류
+    bad_checker   checker 값이 잘못됨 (checkers.py)
+    mismatch      정답 코드의 출력이 기대 출력과 다르거나 실행 중 오류
+
+문제 은행 전체 검증 (모든 코어 사용, 보고서는 problems/validation_report.json):
+    python validate_problems.py [문제 폴더] [보고서 파일]
+"""
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from checkers import parse_checker
+from grader import WORKER_COUNT, run_test_cases
+from problem_bank import PROBLEMS_DIR, discover_chapters
+from file_io import write_json_atomic
+
+REPORT_FILENAME = "validation_report.json"
+REPORT_MAX_CHARS = 200  # 보고서에 남기는 입력/출력 최대 길이
+PROBLEM_STATUSES = ["ok", "no_solution", "no_test_cases", "placeholder", "syntax_error", "bad_checker", "mismatch"]
+
+
+def _clip(value):
+    text = "" if value is None else str(value)
+    return text if len(text) <= REPORT_MAX_CHARS else text[:REPORT_MAX_CHARS] + "..."
+
+
+def is_placeholder(test_cases):
+    """입력과 출력이 모두 빈 테스트 케이스뿐인지 (생성 실패 시 들어가는 기본 템플릿)"""
+    return all(not str(tc.get("input", "")).strip() and not str(tc.get("output", "")).strip()
+               for tc in test_cases)
+
+
+def validate_problem(problem):
+    """문제 하나 검증 -> {"id", "title", "status", "failures"}"""
+    report = {"id": problem.get("id"), "title": problem.get("title", ""), "status": "ok", "failures": []}
+    test_cases = problem.get("test_cases") or []
+    solution = problem.get("reference_solution")
+    try:
+        parse_checker(problem.get("checker"))
+    except ValueError as e:
+        report["status"] = "bad_checker"
+        report["failures"] = [{"error": _clip(str(e))}]
+        return report
+
+    if not test_cases:
+        report["status"] = "no_test_cases"
+    elif is_placeholder(test_cases):
+        report["status"] = "placeholder"
+    elif not solution:
+        report["status"] = "no_solution"
+    else:
+        all_passed, results = run_test_cases(solution, test_cases, parallel=True, checker=problem.get("checker"))
+        if not all_passed:
+            report["status"] = "syntax_error" if results[0].get("syntax_error") else "mismatch"
+            report["failures"] = [
+                {
+                    "test_num": r["test_num"],
+                    "input": _clip(r.get("input")),
+                    "expected": _clip(r.get("expected")),
+                    "actual": _clip(r.get("actual")),
+                    "mismatch": r.get("mismatch"),
+                    "error": _clip(r.get("error")) if r.get("error") else None,
+                }
+                for r in results if not r["passed"]
+            ]
+    return report
+
+
+def validate_problems(problems, max_workers=WORKER_COUNT):
+    """여러 문제를 동시에 검증 (문제 순서대로 보고서 목록 반환)"""
+    if len(problems) <= 1:
+        return [validate_problem(p) for p in problems]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(validate_problem, problems))
+
+
+def validate_bank(problems_dir=PROBLEMS_DIR, max_workers=WORKER_COUNT):
+    """problems/ 의 모든 단원 검증 -> 보고서 dict"""
+    started = time.perf_counter()
+    chapters = []
+    summary = dict.fromkeys(PROBLEM_STATUSES, 0)
+    for chapter_index, chapter_name, path in discover_chapters(problems_dir):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        problems = data.get("problems", [])
+        reports = validate_problems(problems, max_workers)
+
+        counts = dict.fromkeys(PROBLEM_STATUSES, 0)
+        for report in reports:
+            counts[report["status"]] += 1
+            summary[report["status"]] += 1
+        chapters.append({
+            "chapter_index": chapter_index,
+            "chapter_name": data.get("chapter_name", chapter_name),
+            "file": os.path.basename(path),
+            "total": len(problems),
+            "counts": counts,
+            "issues": [r for r in reports if r["status"] != "ok"],
+        })
+        print(f"[{chapter_name}] {len(problems)}문제: " +
+              ", ".join(f"{status} {count}" for status, count in counts.items() if count))
+
+    return {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "problems_dir": problems_dir,
+        "elapsed": round(time.perf_counter() - started, 2),
+        "summary": summary,
+        "chapters": chapters,
+    }
+
+
+def main():
+    problems_dir = sys.argv[1] if len(sys.argv) > 1 else PROBLEMS_DIR
+    report_path = sys.argv[2] if len(sys.argv) > 2 else os.path.join(problems_dir, REPORT_FILENAME)
+
+    print(f"문제 검증 시작: {problems_dir} (워커 {WORKER_COUNT}개)")
+    report = validate_bank(problems_dir)
+    write_json_atomic(report_path, report)
+
+    total = sum(report["summary"].values())
+    print(f"\n총 {total}문제, {report['elapsed']}초: " +
+          ", ".join(f"{status} {count}" for status, count in report["summary"].items() if count))
+    print(f"보고서 저장: {report_path}")
+
+if __name__ == "__main__":
+    main()